@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Index de plus proches voisins approximatifs (IVF)
+Recherche par similarité cosinus sur les vecteurs réduits des CVs, en NumPy pur
+"""
+
+import time
+import logging
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Normalise les vecteurs (norme L2) pour que le produit scalaire soit la similarité cosinus"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k meilleurs scores, triés par score décroissant"""
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+class _InvertedList:
+    """Liste inversée d'un centroïde : identifiants et vecteurs, capacité doublée à la demande"""
+
+    def __init__(self, dim: int, capacity: int = 16):
+        self.ids = []
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, item_id: Hashable, vector: np.ndarray) -> int:
+        slot = len(self.ids)
+        if slot == len(self.vectors):
+            grown = np.empty((max(16, 2 * len(self.vectors)), self.vectors.shape[1]), dtype=np.float32)
+            grown[:slot] = self.vectors[:slot]
+            self.vectors = grown
+        self.vectors[slot] = vector
+        self.ids.append(item_id)
+        return slot
+
+    def pop(self, slot: int) -> Optional[Hashable]:
+        """Retire l'élément en déplaçant le dernier à sa place ; retourne l'identifiant déplacé"""
+        last = len(self.ids) - 1
+        moved_id = None
+        if slot != last:
+            self.vectors[slot] = self.vectors[last]
+            self.ids[slot] = self.ids[last]
+            moved_id = self.ids[slot]
+        self.ids.pop()
+        return moved_id
+
+    def copy(self) -> '_InvertedList':
+        clone = _InvertedList.__new__(_InvertedList)
+        clone.ids = list(self.ids)
+        clone.vectors = self.vectors.copy()
+        return clone
+
+
+class IVFIndex:
+    """Index IVF (centroïdes k-means + listes inversées) pour la similarité cosinus
+
+    `n_probe` règle le compromis rappel/latence : nombre de listes explorées par requête.
+    """
+
+    def __init__(self, dim: int, n_lists: int = 64, n_probe: int = 8, seed: int = 0):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.centroids = None
+        self.lists = []
+        self._locations = {}
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._locations
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @classmethod
+    def build(cls, ids: List[Hashable], vectors: np.ndarray, n_lists: Optional[int] = None,
+              n_probe: int = 8, seed: int = 0) -> 'IVFIndex':
+        """Entraîne les centroïdes puis insère tous les vecteurs"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(len(vectors))))
+        index = cls(vectors.shape[1], n_lists=n_lists, n_probe=n_probe, seed=seed)
+        index.train(vectors)
+        index.add(ids, vectors)
+        return index
+
+    def train(self, vectors: np.ndarray, n_iter: int = 10, max_samples: int = 256):
+        """K-means sphérique sur un échantillon (au plus max_samples vecteurs par liste)"""
+        data = _normalize(vectors)
+        rng = np.random.default_rng(self.seed)
+        n_lists = min(self.n_lists, len(data))
+        if n_lists == 0:
+            raise ValueError("Impossible d'entraîner l'index sans vecteurs")
+
+        if len(data) > n_lists * max_samples:
+            data = data[rng.choice(len(data), n_lists * max_samples, replace=False)]
+
+        centroids = data[rng.choice(len(data), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, data)
+            counts = np.bincount(assignments, minlength=n_lists)
+            # Les centroïdes vides sont réinitialisés sur un point tiré au hasard
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        self.n_lists = n_lists
+        self.centroids = centroids
+        self.lists = [_InvertedList(self.dim) for _ in range(n_lists)]
+        self._locations = {}
+
+    def copy(self) -> 'IVFIndex':
+        """Copie modifiable (les centroïdes, jamais modifiés après l'entraînement, sont partagés)"""
+        clone = IVFIndex(self.dim, n_lists=self.n_lists, n_probe=self.n_probe, seed=self.seed)
+        clone.centroids = self.centroids
+        clone.lists = [inverted.copy() for inverted in self.lists]
+        clone._locations = dict(self._locations)
+        return clone
+
+    def add(self, ids: Iterable[Hashable], vectors: np.ndarray):
+        """Insère (ou remplace) des vecteurs dans leur liste la plus proche"""
+        if not self.is_trained:
+            raise ValueError("L'index doit être entraîné avant l'insertion")
+        ids = list(ids)
+        vectors = _normalize(np.atleast_2d(vectors))
+        assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+        for item_id, vector, list_no in zip(ids, vectors, assignments):
+            if item_id in self._locations:
+                self.remove([item_id])
+            slot = self.lists[list_no].append(item_id, vector)
+            self._locations[item_id] = (int(list_no), slot)
+
+    def remove(self, ids: Iterable[Hashable]) -> int:
+        """Supprime des vecteurs ; retourne le nombre d'éléments effectivement retirés"""
+        removed = 0
+        for item_id in ids:
+            location = self._locations.pop(item_id, None)
+            if location is None:
+                continue
+            list_no, slot = location
+            moved_id = self.lists[list_no].pop(slot)
+            if moved_id is not None:
+                self._locations[moved_id] = (list_no, slot)
+            removed += 1
+        return removed
+
+    def search(self, query: np.ndarray, k: int, n_probe: Optional[int] = None) -> Tuple[List[Hashable], np.ndarray]:
+        """Retourne les k identifiants les plus similaires et leurs similarités cosinus"""
+        if not self.is_trained or not self._locations or k <= 0:
+            return [], np.empty(0, dtype=np.float32)
+
+        query = _normalize(np.ravel(query))
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        probed = _top_k(self.centroids @ query, n_probe)
+
+        candidate_ids = []
+        blocks = []
+        for list_no in probed:
+            inverted = self.lists[list_no]
+            if len(inverted):
+                candidate_ids.extend(inverted.ids)
+                blocks.append(inverted.vectors[:len(inverted)])
+        if not blocks:
+            return [], np.empty(0, dtype=np.float32)
+
+        scores = np.concatenate(blocks) @ query
+        best = _top_k(scores, k)
+        return [candidate_ids[i] for i in best], scores[best]
+
+    def stats(self) -> Dict:
+        """Taille de l'index et répartition des listes"""
+        sizes = [len(inverted) for inverted in self.lists]
+        return {
+            'size': len(self),
+            'n_lists': self.n_lists,
+            'n_probe': self.n_probe,
+            'largest_list': max(sizes) if sizes else 0,
+            'empty_lists': sum(1 for size in sizes if size == 0)
+        }
+
+
+def recall_at_k(exact_ids: List[Hashable], approx_ids: List[Hashable], k: int) -> float:
+    """Part des k premiers résultats exacts retrouvés dans les k premiers résultats approximatifs"""
+    exact = set(exact_ids[:k])
+    if not exact:
+        return 1.0
+    return len(exact & set(approx_ids[:k])) / len(exact)
+
+
+def benchmark_index(n_vectors: int = 50000, dim: int = 100, n_queries: int = 50, k: int = 20,
+                    probes: Tuple[int, ...] = (1, 4, 8, 16, 32), seed: int = 0) -> List[Dict]:
+    """Compare l'index IVF à la recherche exhaustive sur des vecteurs synthétiques groupés"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, n_vectors // 500), dim))
+    vectors = centers[rng.integers(len(centers), size=n_vectors)] + 0.5 * rng.normal(size=(n_vectors, dim))
+    queries = centers[rng.integers(len(centers), size=n_queries)] + 0.5 * rng.normal(size=(n_queries, dim))
+    ids = list(range(n_vectors))
+
+    start = time.perf_counter()
+    index = IVFIndex.build(ids, vectors, seed=seed)
+    build_seconds = time.perf_counter() - start
+
+    normalized = _normalize(vectors)
+    start = time.perf_counter()
+    exact = [list(_top_k(normalized @ _normalize(query), k)) for query in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+    report = []
+    for n_probe in probes:
+        start = time.perf_counter()
+        approx = [index.search(query, k, n_probe=n_probe)[0] for query in queries]
+        latency_ms = (time.perf_counter() - start) * 1000 / n_queries
+        report.append({
+            'n_probe': n_probe,
+            'recall_at_k': float(np.mean([recall_at_k(e, a, k) for e, a in zip(exact, approx)])),
+            'latency_ms': round(latency_ms, 3),
+            'exhaustive_ms': round(exact_ms, 3),
+            'build_seconds': round(build_seconds, 3),
+            'n_lists': index.n_lists
+        })
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark de l'index IVF (rappel@k et latence)")
+    parser.add_argument('--vectors', type=int, default=50000)
+    parser.add_argument('--dim', type=int, default=100)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('-k', type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark_index(args.vectors, args.dim, args.queries, args.k), indent=2))
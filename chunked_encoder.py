@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Encodage par morceaux des textes longs
+Les CVs sont découpés en fenêtres chevauchantes ; les morceaux sont regroupés par longueur
+pour limiter le padding, encodés par grands lots, puis moyennés par document.
+"""
+
+import re
+import time
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Approximation du nombre de tokens sous-mots par mot (français / anglais)
+_TOKENS_PER_WORD = 1.3
+_WORD_PATTERN = re.compile(r'\S+')
+
+
+class ChunkedEncoder:
+    """Encodeur par fenêtres chevauchantes, regroupées par longueur
+
+    `window_words` est déduit de `max_seq_length` du modèle s'il n'est pas fourni, de sorte
+    qu'aucun morceau ne soit tronqué. L'embedding d'un document est la moyenne de ceux
+    de ses morceaux pondérée par leur nombre de mots.
+    """
+
+    def __init__(self, model, window_words: int = None, overlap_words: int = None,
+                 batch_size: int = 64, bucket_words: int = 16):
+        self.model = model
+        if window_words is None:
+            max_tokens = getattr(model, 'max_seq_length', None) or 128
+            window_words = max(16, int(max_tokens / _TOKENS_PER_WORD))
+        if overlap_words is None:
+            overlap_words = window_words // 5
+        if not 0 <= overlap_words < window_words:
+            raise ValueError("Le chevauchement doit être inférieur à la taille de fenêtre")
+        self.window_words = window_words
+        self.overlap_words = overlap_words
+        self.batch_size = batch_size
+        self.bucket_words = bucket_words
+
+    @property
+    def signature(self) -> str:
+        """Identifie la configuration (à inclure dans la version des embeddings mis en cache)"""
+        return f"chunked-{self.window_words}-{self.overlap_words}"
+
+    def split(self, text: str) -> List[str]:
+        """Fenêtres de `window_words` mots, chevauchantes de `overlap_words`"""
+        words = _WORD_PATTERN.findall(text or "")
+        if len(words) <= self.window_words:
+            return [' '.join(words)]
+        step = self.window_words - self.overlap_words
+        chunks = []
+        for start in range(0, len(words), step):
+            chunks.append(' '.join(words[start:start + self.window_words]))
+            if start + self.window_words >= len(words):
+                break
+        return chunks
+
+    def _buckets(self, lengths: np.ndarray, batch_size: int) -> List[np.ndarray]:
+        """Indices des morceaux groupés par tranche de longueur, découpés en lots"""
+        order = np.argsort(lengths, kind='stable')
+        bucket_ids = lengths[order] // self.bucket_words
+        batches = []
+        for bucket in np.unique(bucket_ids):
+            members = order[bucket_ids == bucket]
+            for start in range(0, len(members), batch_size):
+                batches.append(members[start:start + batch_size])
+        return batches
+
+    def encode(self, texts: Sequence[str], batch_size: int = None) -> np.ndarray:
+        """Embeddings (n_textes, dim) couvrant l'intégralité de chaque texte"""
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        chunks, owners = [], []
+        for index, text in enumerate(texts):
+            for chunk in self.split(text):
+                chunks.append(chunk)
+                owners.append(index)
+        owners = np.asarray(owners)
+        lengths = np.fromiter((chunk.count(' ') + 1 if chunk else 0 for chunk in chunks),
+                              dtype=np.int64, count=len(chunks))
+
+        embeddings = None
+        for batch in self._buckets(lengths, batch_size or self.batch_size):
+            encoded = np.asarray(self.model.encode([chunks[i] for i in batch], batch_size=len(batch)),
+                                 dtype=np.float32)
+            if embeddings is None:
+                embeddings = np.empty((len(chunks), encoded.shape[1]), dtype=np.float32)
+            embeddings[batch] = encoded
+
+        # Moyenne par document pondérée par la longueur des morceaux
+        weights = np.maximum(lengths, 1).astype(np.float32)
+        pooled = np.zeros((len(texts), embeddings.shape[1]), dtype=np.float32)
+        np.add.at(pooled, owners, embeddings * weights[:, None])
+        pooled /= np.bincount(owners, weights=weights, minlength=len(texts))[:, None].astype(np.float32)
+        return pooled
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        return self.encode(texts)
+
+
+def benchmark_encoders(model, texts: Sequence[str], repeats: int = 1, **encoder_options) -> Dict:
+    """Compare l'appel actuel (un encode par texte, tronqué par le modèle) à l'encodeur par morceaux
+
+    Rapporte le débit en CVs par seconde et la part du texte effectivement couverte.
+    """
+    texts = list(texts)
+    encoder = ChunkedEncoder(model, **encoder_options)
+    max_words = encoder.window_words
+    word_counts = np.array([len(_WORD_PATTERN.findall(text)) for text in texts])
+
+    def timed(function) -> Tuple[float, np.ndarray]:
+        best, result = float('inf'), None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = function()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    one_shot_seconds, one_shot = timed(lambda: np.vstack([model.encode([text]) for text in texts]))
+    chunked_seconds, chunked = timed(lambda: encoder.encode(texts))
+
+    def normalized(matrix):
+        matrix = np.asarray(matrix, dtype=np.float64)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    agreement = np.sum(normalized(one_shot) * normalized(chunked), axis=1)
+    total_words = max(int(word_counts.sum()), 1)
+    return {
+        'texts': len(texts),
+        'mean_words': round(float(word_counts.mean()), 1) if len(texts) else 0.0,
+        'window_words': encoder.window_words,
+        'overlap_words': encoder.overlap_words,
+        'chunks': int(sum(len(encoder.split(text)) for text in texts)),
+        'one_shot': {
+            'seconds': round(one_shot_seconds, 3),
+            'cvs_per_second': round(len(texts) / one_shot_seconds, 1),
+            'words_covered': round(float(np.minimum(word_counts, max_words).sum()) / total_words, 3)
+        },
+        'chunked': {
+            'seconds': round(chunked_seconds, 3),
+            'cvs_per_second': round(len(texts) / chunked_seconds, 1),
+            'words_covered': 1.0
+        },
+        'mean_cosine_with_one_shot': round(float(agreement.mean()), 4) if len(texts) else 0.0
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import random
+    import argparse
+    import load_test
+    from sentence_transformers import SentenceTransformer
+
+    parser = argparse.ArgumentParser(description="Benchmark de l'encodage par morceaux face à l'appel unique")
+    parser.add_argument('--model', default='distiluse-base-multilingual-cased')
+    parser.add_argument('--cvs', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(0)
+    cv_texts = [load_test.synthetic_cv(rng, i)['content'] for i in range(args.cvs)]
+    print(json.dumps(benchmark_encoders(SentenceTransformer(args.model), cv_texts, args.repeats,
+                                        batch_size=args.batch_size), indent=2))
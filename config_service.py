@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Service de configuration
+config.json est lu une fois puis revalidé par mtime au plus toutes les N ms ;
+les lecteurs reçoivent des instantanés immuables, les écritures sont atomiques.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = "config.json"
+DEFAULT_REVALIDATE_MS = int(os.environ.get('TALENTSCOPE_CONFIG_REVALIDATE_MS', '1000'))
+
+
+def _freeze(value: Any) -> Any:
+    """Copie immuable d'une valeur JSON (dict → mapping en lecture seule, liste → tuple)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Copie modifiable d'une valeur gelée"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class ConfigSnapshot(Mapping):
+    """Configuration à un instant donné (lecture seule, y compris en profondeur)"""
+
+    def __init__(self, data: Optional[Dict] = None, version: Tuple = (0, 0)):
+        self._data = _freeze(data or {})
+        self.version = version
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def to_dict(self) -> Dict:
+        """Copie modifiable (pour préparer une écriture)"""
+        return _thaw(self._data)
+
+
+class ConfigService:
+    """Accès partagé à un fichier de configuration JSON
+
+    `snapshot()` ne touche au disque (un simple stat) que si le dernier contrôle date de plus de
+    `revalidate_ms` ; le fichier n'est relu que si sa date de modification ou sa taille a changé.
+    """
+
+    def __init__(self, path: str = DEFAULT_CONFIG_PATH, revalidate_ms: int = DEFAULT_REVALIDATE_MS):
+        self.path = os.path.abspath(path)
+        self.revalidate_seconds = revalidate_ms / 1000.0
+        self._lock = threading.RLock()
+        self._snapshot = ConfigSnapshot()
+        self._file_version = None
+        self._checked_at = None
+        self.reads = 0
+
+    def _stat_version(self) -> Optional[Tuple]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _revalidate(self):
+        """Relit le fichier s'il a changé (verrou tenu)"""
+        self._checked_at = time.monotonic()
+        file_version = self._stat_version()
+        if file_version == self._file_version:
+            return
+        if file_version is None:
+            self._snapshot = ConfigSnapshot()
+            self._file_version = None
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.reads += 1
+        except (OSError, ValueError) as e:
+            # Fichier en cours d'écriture par un tiers ou invalide : on garde l'instantané précédent
+            logger.warning(f"Configuration illisible ({self.path}): {e}")
+            return
+        self._snapshot = ConfigSnapshot(data if isinstance(data, dict) else {}, file_version)
+        self._file_version = file_version
+
+    def snapshot(self) -> ConfigSnapshot:
+        """Instantané courant de la configuration"""
+        checked_at = self._checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.revalidate_seconds:
+            return self._snapshot
+        with self._lock:
+            if self._checked_at is None or time.monotonic() - self._checked_at >= self.revalidate_seconds:
+                self._revalidate()
+            return self._snapshot
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.snapshot().get(key, default)
+
+    def reload(self) -> ConfigSnapshot:
+        """Revalide immédiatement, sans attendre l'intervalle"""
+        with self._lock:
+            self._revalidate()
+            return self._snapshot
+
+    def write(self, data: Mapping) -> ConfigSnapshot:
+        """Remplace la configuration de façon atomique (fichier temporaire puis renommage)"""
+        data = _thaw(data)
+        directory = os.path.dirname(self.path) or "."
+        with self._lock:
+            fd, temp_path = tempfile.mkstemp(prefix=".config_", suffix=".json.tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # mkstemp crée le fichier en 0600 : on conserve les droits du fichier remplacé
+                try:
+                    mode = os.stat(self.path).st_mode & 0o777
+                except FileNotFoundError:
+                    mode = 0o644
+                os.chmod(temp_path, mode)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._file_version = self._stat_version()
+            self._snapshot = ConfigSnapshot(data, self._file_version)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def update(self, **changes) -> ConfigSnapshot:
+        """Modifie quelques clés en conservant les autres"""
+        with self._lock:
+            self._revalidate()
+            data = self._snapshot.to_dict()
+            data.update(changes)
+            return self.write(data)
+
+
+_services: Dict[str, ConfigService] = {}
+_services_lock = threading.Lock()
+
+
+def get_config_service(path: str = DEFAULT_CONFIG_PATH) -> ConfigService:
+    """Service partagé pour un fichier de configuration (un par chemin absolu)"""
+    absolute_path = os.path.abspath(path)
+    service = _services.get(absolute_path)
+    if service is None:
+        with _services_lock:
+            service = _services.setdefault(absolute_path, ConfigService(absolute_path))
+    return service
+
+
+def get_config(path: str = DEFAULT_CONFIG_PATH) -> ConfigSnapshot:
+    """Instantané de config.json (relu seulement s'il a changé)"""
+    return get_config_service(path).snapshot()
@@ -3,28 +3,31 @@ Algorithme universel de matching CV-Offre d'emploi
 Compatible avec tous les secteurs d'activité
 """
 
-import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
-import spacy
+import os
 import re
+import time
+import threading
 from typing import Dict, List, Tuple, Any, Optional
-from dataclasses import dataclass
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
+from dataclasses import dataclass, field
 import warnings
+from embedding_cache import EmbeddingCache
+from chunked_encoder import ChunkedEncoder
+from sentence_encoders import create_encoder
+from keyword_index import KeywordIndex
 warnings.filterwarnings('ignore')
 
-# Télécharger les ressources NLTK nécessaires
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-except:
-    pass
+# Les bibliothèques lourdes (scikit-learn, NLTK, spaCy, modèle de phrases) ne sont chargées
+# qu'à la construction du matcher : l'import du module reste instantané
+
+def _ensure_nltk_resources():
+    """Télécharger les ressources NLTK nécessaires"""
+    import nltk
+    try:
+        nltk.download('punkt', quiet=True)
+        nltk.download('stopwords', quiet=True)
+    except:
+        pass
 
 @dataclass
 class MatchingScore:
@@ -38,26 +41,59 @@ class MatchingScore:
     soft_skills_score: float
     details: Dict[str, Any]
 
+@dataclass
+class CompiledJob:
+    """Offre analysée une seule fois pour tout un lot de candidats"""
+    description: str
+    competencies: List[str]
+    soft_skills: List[str]
+    required_experience: int
+    required_education: int
+    sector_hint: Optional[str] = None
+    processed_text: str = ""
+
+@dataclass
+class CVProfile:
+    """Caractéristiques extraites d'un CV (indépendantes de l'offre)"""
+    competencies: List[str] = field(default_factory=list)
+    soft_skills: List[str] = field(default_factory=list)
+    experience: int = 0
+    education: int = 0
+
 class UniversalCVJobMatcher:
     """Algorithme universel de matching CV-Offre d'emploi"""
     
-    def __init__(self, language='fr'):
+    def __init__(self, language='fr', encoder_backend: Optional[str] = None,
+                 use_ner: Optional[bool] = None):
+        from nltk.corpus import stopwords
+        from nltk.stem import PorterStemmer
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
+        _ensure_nltk_resources()
         self.language = language
         self.stemmer = PorterStemmer()
         self.stop_words = set(stopwords.words('french' if language == 'fr' else 'english'))
         
         # Modèles pré-entraînés
         print("Chargement des modèles universels...")
-        self.sentence_model = SentenceTransformer('distiluse-base-multilingual-cased')
+        # Backend d'inférence (torch, torch-int8, onnx) et threads configurables par l'environnement
+        self.sentence_model = create_encoder(encoder_backend)
+        self.sentence_model_name = self.sentence_model.name
+        
+        # Textes longs découpés en fenêtres regroupées par longueur (le modèle tronque sinon)
+        self.text_encoder = ChunkedEncoder(self.sentence_model)
+        
+        # Cache des embeddings : chaque texte n'est encodé qu'une fois par version du modèle
+        self.embedding_cache = EmbeddingCache(
+            model_version=f"{self.sentence_model_name}/{self.text_encoder.signature}",
+            max_bytes=int(float(os.environ.get('TALENTSCOPE_EMBEDDING_CACHE_MB', '64')) * 1024 * 1024),
+            disk_dir=os.environ.get('TALENTSCOPE_EMBEDDING_CACHE_DIR') or None
+        )
         
-        try:
-            self.nlp = spacy.load("fr_core_news_sm")
-        except OSError:
-            try:
-                self.nlp = spacy.load("en_core_web_sm")
-            except OSError:
-                print("Modèle spaCy non trouvé. Installation : python -m spacy download fr_core_news_sm")
-                self.nlp = None
+        # NER spaCy en option (TALENTSCOPE_MATCHER_NER=1) : modèle chargé au premier besoin
+        self.use_ner = use_ner if use_ner is not None else os.environ.get('TALENTSCOPE_MATCHER_NER') == '1'
+        self.nlp = None
+        self._nlp_loaded = False
         
         self.tfidf_vectorizer = TfidfVectorizer(
             max_features=10000,
@@ -81,6 +117,35 @@ class UniversalCVJobMatcher:
         self.universal_competencies = self._load_universal_competencies()
         self.soft_skills_keywords = self._load_soft_skills()
         self.education_levels = self._load_education_levels()
+        
+        # Index compilé partagé : un seul passage sur le texte pour les trois bases
+        self.keyword_index = KeywordIndex(
+            [(kw, ('competency', category)) for category, kws in self.universal_competencies.items() for kw in kws] +
+            [(skill, ('soft_skill', skill)) for skill in self.soft_skills_keywords] +
+            [(kw, ('education', level)) for level, kws in self.education_levels.items() for kw in kws]
+        )
+
+    def __getstate__(self):
+        """État envoyé aux workers de classement : le modèle spaCy y est rechargé au premier besoin"""
+        state = self.__dict__.copy()
+        state.update(nlp=None, _nlp_loaded=False)
+        return state
+
+    def _get_nlp(self):
+        """Modèle spaCy, chargé à la première utilisation de la NER"""
+        if not self._nlp_loaded:
+            self._nlp_loaded = True
+            try:
+                import spacy
+                self.nlp = spacy.load("fr_core_news_sm")
+            except ImportError:
+                print("spaCy non installé : extraction d'entités désactivée")
+            except OSError:
+                try:
+                    self.nlp = spacy.load("en_core_web_sm")
+                except OSError:
+                    print("Modèle spaCy non trouvé. Installation : python -m spacy download fr_core_news_sm")
+        return self.nlp
 
     def _load_universal_competencies(self) -> Dict[str, List[str]]:
         """Base de compétences pour tous les secteurs"""
@@ -158,36 +223,49 @@ class UniversalCVJobMatcher:
         
         return text.strip()
 
-    def extract_competencies(self, text: str, sector_hint: Optional[str] = None) -> List[str]:
-        """Extraction des compétences avec contexte sectoriel"""
-        text_lower = text.lower()
-        found_competencies = []
-        
-        categories_to_search = self.universal_competencies.keys()
-        if sector_hint:
-            categories_to_search = [k for k in categories_to_search if sector_hint.lower() in k] + list(categories_to_search)
-        
-        for category, keywords in self.universal_competencies.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    found_competencies.append(category)
-                    break
-        
-        if self.nlp:
-            doc = self.nlp(text)
-            for ent in doc.ents:
-                if ent.label_ in ['PRODUCT', 'ORG', 'MISC', 'SKILL']:
-                    entity_text = ent.text.lower()
-                    for category, keywords in self.universal_competencies.items():
-                        if any(kw in entity_text for kw in keywords):
-                            found_competencies.append(category)
-        
-        return list(set(found_competencies))
-
-    def extract_soft_skills(self, text: str) -> List[str]:
+    def keyword_labels(self, text: str) -> set:
+        """Étiquettes (compétence, soft skill, niveau d'éducation) présentes dans le texte, en un passage"""
+        return self.keyword_index.labels(text.lower()) if text else set()
+
+    def _sector_categories(self, sector_hint: Optional[str]) -> Optional[set]:
+        """Catégories correspondant au secteur indiqué (None : toutes)"""
+        if not sector_hint:
+            return None
+        hint = sector_hint.lower()
+        categories = {category for category in self.universal_competencies if hint in category}
+        return categories or None
+
+    def _competencies_from_labels(self, labels: set, categories: Optional[set]) -> List[str]:
+        return [category for category in self.universal_competencies
+                if ('competency', category) in labels and (categories is None or category in categories)]
+
+    def extract_competencies(self, text: str, sector_hint: Optional[str] = None,
+                             labels: Optional[set] = None) -> List[str]:
+        """Extraction des compétences, restreinte aux catégories du secteur si `sector_hint` correspond
+        
+        La NER (si activée) n'intervient que lorsque le passage par mots-clés ne trouve rien.
+        """
+        if labels is None:
+            labels = self.keyword_labels(text)
+        categories = self._sector_categories(sector_hint)
+        found_competencies = self._competencies_from_labels(labels, categories)
+        
+        if not found_competencies and self.use_ner and text:
+            nlp = self._get_nlp()
+            if nlp:
+                entity_labels = set()
+                for ent in nlp(text).ents:
+                    if ent.label_ in ['PRODUCT', 'ORG', 'MISC', 'SKILL']:
+                        entity_labels |= self.keyword_index.labels(ent.text.lower())
+                found_competencies = self._competencies_from_labels(entity_labels, categories)
+        
+        return found_competencies
+
+    def extract_soft_skills(self, text: str, labels: Optional[set] = None) -> List[str]:
         """Extraction des soft skills"""
-        text_lower = text.lower()
-        return [skill for skill in self.soft_skills_keywords if skill in text_lower]
+        if labels is None:
+            labels = self.keyword_labels(text)
+        return [skill for skill in self.soft_skills_keywords if ('soft_skill', skill) in labels]
 
     def extract_years_experience(self, text: str) -> int:
         """Extraction des années d'expérience"""
@@ -219,17 +297,11 @@ class UniversalCVJobMatcher:
         
         return max_years
 
-    def extract_education_level(self, text: str) -> int:
+    def extract_education_level(self, text: str, labels: Optional[set] = None) -> int:
         """Extraction du niveau d'éducation"""
-        text_lower = text.lower()
-        max_level = 0
-        
-        for level, keywords in self.education_levels.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    max_level = max(max_level, level)
-        
-        return max_level
+        if labels is None:
+            labels = self.keyword_labels(text)
+        return max((level for level in self.education_levels if ('education', level) in labels), default=0)
 
     def calculate_competencies_score(self, cv_competencies: List[str], job_competencies: List[str]) -> float:
         """Calcul du score de compétences"""
@@ -282,13 +354,21 @@ class UniversalCVJobMatcher:
         else:
             return max(cv_education / required_education, 0.5)
 
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Embeddings des textes, via le cache (seuls les textes inconnus sont encodés)"""
+        return self.embedding_cache.get_many(texts, self.text_encoder.encode)
+
+    def embedding_cache_stats(self) -> Dict[str, Any]:
+        """Statistiques du cache d'embeddings"""
+        return self.embedding_cache.stats()
+
     def calculate_semantic_similarity(self, cv_text: str, job_text: str) -> float:
         """Calcul de la similarité sémantique"""
+        from sklearn.metrics.pairwise import cosine_similarity
         try:
-            cv_embedding = self.sentence_model.encode([cv_text])
-            job_embedding = self.sentence_model.encode([job_text])
+            embeddings = self.encode_texts([cv_text, job_text])
             
-            similarity = cosine_similarity(cv_embedding, job_embedding)[0][0]
+            similarity = cosine_similarity(embeddings[0:1], embeddings[1:2])[0][0]
             return max(0, similarity)
         except Exception as e:
             print(f"Erreur similarité sémantique: {e}")
@@ -296,6 +376,7 @@ class UniversalCVJobMatcher:
 
     def calculate_keyword_score(self, cv_text: str, job_text: str) -> float:
         """Calcul du score de mots-clés"""
+        from sklearn.metrics.pairwise import cosine_similarity
         try:
             cv_processed = self.preprocess_text(cv_text)
             job_processed = self.preprocess_text(job_text)
@@ -373,21 +454,178 @@ class UniversalCVJobMatcher:
             details=details
         )
 
-    def rank_candidates(self, candidates: List[Dict[str, Any]], 
-                       job_description: str, required_experience: int = 0,
-                       required_education: int = 0, sector_hint: Optional[str] = None) -> List[Tuple[Dict, MatchingScore]]:
-        """Classement des candidats"""
-        results = []
+    def compile_job(self, job_description: str, required_experience: int = 0,
+                    required_education: int = 0, sector_hint: Optional[str] = None) -> CompiledJob:
+        """Analyse de l'offre, faite une seule fois par lot"""
+        labels = self.keyword_labels(job_description)
+        if required_education == 0:
+            required_education = self.extract_education_level(job_description, labels)
+        
+        return CompiledJob(
+            description=job_description,
+            competencies=self.extract_competencies(job_description, sector_hint, labels),
+            soft_skills=self.extract_soft_skills(job_description, labels),
+            required_experience=required_experience,
+            required_education=required_education,
+            sector_hint=sector_hint,
+            processed_text=self.preprocess_text(job_description)
+        )
+
+    def extract_cv_profile(self, cv_text: str, sector_hint: Optional[str] = None) -> CVProfile:
+        """Extraction (une seule fois par CV) des caractéristiques utilisées par le matching"""
+        labels = self.keyword_labels(cv_text)
+        return CVProfile(
+            competencies=self.extract_competencies(cv_text, sector_hint, labels),
+            soft_skills=self.extract_soft_skills(cv_text, labels),
+            experience=self.extract_years_experience(cv_text),
+            education=self.extract_education_level(cv_text, labels)
+        )
+
+    def calculate_semantic_similarities(self, cv_texts: List[str], job_text: str,
+                                        batch_size: int = 32) -> np.ndarray:
+        """Similarités sémantiques de tous les CVs avec l'offre (un seul passage du modèle)"""
+        try:
+            embeddings = self.embedding_cache.get_many(
+                list(cv_texts) + [job_text],
+                lambda texts: self.text_encoder.encode(texts, batch_size=batch_size)
+            ).astype(np.float64)
+            norms = np.linalg.norm(embeddings, axis=1)
+            norms[norms == 0] = 1.0
+            embeddings /= norms[:, None]
+            
+            similarities = embeddings[:-1] @ embeddings[-1]
+            return np.maximum(similarities, 0.0)
+        except Exception as e:
+            print(f"Erreur similarité sémantique: {e}")
+            return np.zeros(len(cv_texts))
+
+    def calculate_keyword_scores(self, cv_texts: List[str], job: CompiledJob) -> np.ndarray:
+        """Scores de mots-clés de tous les CVs, avec un seul TF-IDF ajusté sur le lot et l'offre"""
+        from sklearn.base import clone
+        scores = np.zeros(len(cv_texts))
+        try:
+            cv_processed = [self.preprocess_text(text) for text in cv_texts]
+            if not job.processed_text or not any(cv_processed):
+                return scores
+            
+            # Vectoriseur cloné : le lot ne modifie pas l'état partagé de l'instance
+            vectorizer = clone(self.tfidf_vectorizer)
+            tfidf_matrix = vectorizer.fit_transform(cv_processed + [job.processed_text])
+            
+            # Lignes normalisées L2 : le produit scalaire est la similarité cosinus
+            similarities = np.asarray((tfidf_matrix[:-1] @ tfidf_matrix[-1].T).todense()).ravel()
+            non_empty = np.fromiter((bool(text) for text in cv_processed), dtype=bool, count=len(cv_processed))
+            scores[non_empty] = np.maximum(similarities[non_empty], 0.0)
+            return scores
+        except Exception as e:
+            print(f"Erreur score mots-clés: {e}")
+            return scores
+
+    def match_cvs_to_job(self, cv_texts: List[str], job_description: str,
+                         required_experience: int = 0, required_education: int = 0,
+                         sector_hint: Optional[str] = None, batch_size: int = 32,
+                         keyword_scores: Optional[np.ndarray] = None) -> List[MatchingScore]:
+        """Matching d'un lot de CVs avec une offre
+        
+        L'offre est analysée une fois, les CVs encodés en un seul appel au modèle et le TF-IDF
+        ajusté une seule fois sur le lot ; les scores sont calculés sous forme de tableaux.
+        `keyword_scores` permet de fournir des scores de mots-clés calculés sur un lot plus large.
+        """
+        cv_texts = list(cv_texts)
+        if not cv_texts:
+            return []
+        
+        job = self.compile_job(job_description, required_experience, required_education, sector_hint)
+        profiles = [self.extract_cv_profile(text, sector_hint) for text in cv_texts]
+        
+        competencies_scores = np.array([
+            self.calculate_competencies_score(p.competencies, job.competencies) for p in profiles
+        ])
+        soft_skills_scores = np.array([
+            self.calculate_soft_skills_score(p.soft_skills, job.soft_skills) for p in profiles
+        ])
+        
+        experience = np.array([p.experience for p in profiles], dtype=float)
+        if job.required_experience == 0:
+            experience_scores = np.ones(len(profiles))
+        else:
+            experience_scores = np.where(
+                experience >= job.required_experience, 1.0,
+                np.maximum(experience / job.required_experience, 0.3)
+            )
         
-        for candidate in candidates:
-            score = self.match_cv_to_job(
-                candidate['cv_text'], 
-                job_description, 
-                required_experience,
-                required_education,
-                sector_hint
+        education = np.array([p.education for p in profiles], dtype=float)
+        if job.required_education == 0:
+            education_scores = np.ones(len(profiles))
+        else:
+            education_scores = np.where(
+                education >= job.required_education, 1.0,
+                np.maximum(education / job.required_education, 0.5)
             )
-            results.append((candidate, score))
+        
+        semantic_scores = self.calculate_semantic_similarities(cv_texts, job_description, batch_size)
+        if keyword_scores is None:
+            keyword_scores = self.calculate_keyword_scores(cv_texts, job)
+        keyword_scores = np.asarray(keyword_scores, dtype=float)
+        
+        # Score global pondéré
+        overall_scores = (
+            competencies_scores * self.weights['competencies'] +
+            experience_scores * self.weights['experience'] +
+            education_scores * self.weights['education'] +
+            semantic_scores * self.weights['semantic'] +
+            keyword_scores * self.weights['keywords'] +
+            soft_skills_scores * self.weights['soft_skills']
+        )
+        
+        job_competencies = set(job.competencies)
+        results = []
+        for i, profile in enumerate(profiles):
+            details = {
+                'cv_competencies': profile.competencies,
+                'job_competencies': job.competencies,
+                'cv_soft_skills': profile.soft_skills,
+                'job_soft_skills': job.soft_skills,
+                'cv_experience': profile.experience,
+                'required_experience': job.required_experience,
+                'cv_education_level': profile.education,
+                'required_education_level': job.required_education,
+                'common_competencies': list(set(profile.competencies) & job_competencies),
+                'missing_competencies': list(job_competencies - set(profile.competencies)),
+                'sector_hint': sector_hint
+            }
+            results.append(MatchingScore(
+                overall_score=round(float(overall_scores[i]), 3),
+                competencies_score=round(float(competencies_scores[i]), 3),
+                experience_score=round(float(experience_scores[i]), 3),
+                education_score=round(float(education_scores[i]), 3),
+                semantic_score=round(float(semantic_scores[i]), 3),
+                keyword_score=round(float(keyword_scores[i]), 3),
+                soft_skills_score=round(float(soft_skills_scores[i]), 3),
+                details=details
+            ))
+        
+        return results
+
+    def rank_candidates(self, candidates: List[Dict[str, Any]], 
+                       job_description: str, required_experience: int = 0,
+                       required_education: int = 0, sector_hint: Optional[str] = None,
+                       batch_size: int = 32, n_workers: int = 1) -> List[Tuple[Dict, MatchingScore]]:
+        """Classement des candidats (matching par lot, réparti sur `n_workers` processus si > 1)"""
+        if n_workers > 1:
+            from parallel_ranking import rank_candidates_parallel
+            return rank_candidates_parallel(self, candidates, job_description, required_experience,
+                                            required_education, sector_hint, n_workers, batch_size)
+        
+        scores = self.match_cvs_to_job(
+            [candidate['cv_text'] for candidate in candidates],
+            job_description,
+            required_experience,
+            required_education,
+            sector_hint,
+            batch_size
+        )
+        results = list(zip(candidates, scores))
         
         results.sort(key=lambda x: x[1].overall_score, reverse=True)
         return results
@@ -428,5 +666,86 @@ class UniversalCVJobMatcher:
         
         return '\n'.join(feedback)
 
-# Création d'une instance globale
-matcher = UniversalCVJobMatcher()
+# Instance globale, construite à la première utilisation (ou par le préchauffage en arrière-plan)
+_matcher = None
+_matcher_error = None
+_matcher_lock = threading.Lock()
+_warmup_thread = None
+
+# Après un échec, le préchauffage n'est relancé qu'après un délai doublé à chaque échec
+WARMUP_RETRY_SECONDS = float(os.environ.get('TALENTSCOPE_MATCHER_RETRY_SECONDS', '30'))
+WARMUP_RETRY_MAX_SECONDS = 600.0
+_failures = 0
+_failed_at = 0.0
+
+def get_matcher() -> UniversalCVJobMatcher:
+    """Retourne l'instance globale du matcher, en la construisant si nécessaire"""
+    global _matcher, _matcher_error, _failures, _failed_at
+    if _matcher is not None:
+        return _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            try:
+                _matcher = UniversalCVJobMatcher()
+                _matcher_error = None
+                _failures = 0
+            except Exception as e:
+                _matcher_error = str(e)
+                _failures += 1
+                _failed_at = time.monotonic()
+                raise
+    return _matcher
+
+def is_matcher_ready() -> bool:
+    """Indique si les modèles du matcher sont chargés"""
+    return _matcher is not None
+
+def _retry_delay() -> float:
+    """Délai avant un nouveau préchauffage automatique après `_failures` échecs consécutifs"""
+    if not _failures:
+        return 0.0
+    return min(WARMUP_RETRY_SECONDS * 2 ** (_failures - 1), WARMUP_RETRY_MAX_SECONDS)
+
+def matcher_status() -> Dict[str, Any]:
+    """État du matcher global, pour affichage dans l'interface"""
+    loading = _warmup_thread is not None and _warmup_thread.is_alive()
+    retry_in = max(0.0, _failed_at + _retry_delay() - time.monotonic()) if _matcher_error else 0.0
+    return {
+        'ready': _matcher is not None,
+        'loading': loading and _matcher is None,
+        'error': _matcher_error,
+        'failures': _failures,
+        'retry_in': round(retry_in, 1)
+    }
+
+def start_warmup(force: bool = False) -> Optional[threading.Thread]:
+    """Construit le matcher dans un thread d'arrière-plan (sans effet s'il est déjà prêt ou en cours)
+    
+    Après un échec, les appels suivants (une réexécution Streamlit chacun) ne relancent le
+    chargement qu'une fois le délai de reprise écoulé, sauf avec `force`.
+    Désactivable avec TALENTSCOPE_MATCHER_WARMUP=0.
+    """
+    global _warmup_thread
+    if os.environ.get('TALENTSCOPE_MATCHER_WARMUP', '1') == '0' or _matcher is not None:
+        return None
+    with _matcher_lock:
+        if _warmup_thread is not None and _warmup_thread.is_alive():
+            return _warmup_thread
+        if _matcher_error is not None and not force and time.monotonic() - _failed_at < _retry_delay():
+            return None
+        
+        def warmup():
+            try:
+                get_matcher()
+            except Exception as e:
+                print(f"Erreur préchauffage du matcher: {e}")
+        
+        _warmup_thread = threading.Thread(target=warmup, name='matcher-warmup', daemon=True)
+        _warmup_thread.start()
+        return _warmup_thread
+
+def __getattr__(name):
+    # Compatibilité : `from cv_matching_algorithm import matcher` construit l'instance à la demande
+    if name == 'matcher':
+        return get_matcher()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Cache des embeddings de phrases
+Clé = empreinte du contenu et version du modèle ; LRU en mémoire borné en octets,
+éventuellement adossé à un stockage disque en float16.
+Chaque texte distinct est encodé au plus une fois par version de modèle.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DTYPE = np.float32
+DISK_DTYPE = np.float16
+
+
+class EmbeddingCache:
+    """Cache LRU d'embeddings borné en octets, avec stockage disque optionnel
+
+    `get_many` n'encode que les textes absents, en un seul appel à la fonction d'encodage ;
+    un texte en cours d'encodage par un autre thread est attendu plutôt que réencodé.
+    """
+
+    def __init__(self, model_version: str, max_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: Optional[str] = None):
+        self.model_version = model_version
+        self.max_bytes = max_bytes
+        self.disk_dir = os.path.join(disk_dir, self._safe_name(model_version)) if disk_dir else None
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.encoded = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _safe_name(model_version: str) -> str:
+        return "".join(c if c.isalnum() or c in '-_.' else '_' for c in model_version)
+
+    def make_key(self, text: str) -> str:
+        """Empreinte SHA-256 du texte pour la version de modèle courante"""
+        digest = hashlib.sha256(self.model_version.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.npy")
+
+    def _load_from_disk(self, key: str) -> Optional[np.ndarray]:
+        if not self.disk_dir:
+            return None
+        try:
+            return np.load(self._disk_path(key)).astype(EMBEDDING_DTYPE)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Embedding disque illisible ({key}): {e}")
+            return None
+
+    def _save_to_disk(self, key: str, vector: np.ndarray):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                np.save(f, vector.astype(DISK_DTYPE))
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire l'embedding sur disque ({key}): {e}")
+
+    def _store(self, key: str, vector: np.ndarray):
+        """Insère un vecteur en mémoire (verrou tenu) en évinçant les moins récemment utilisés"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = vector
+        self.bytes += vector.nbytes
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def get_many(self, texts: Sequence[str],
+                 encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Embeddings (n_textes, dim) des textes, en encodant uniquement les absents"""
+        keys = [self.make_key(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        to_encode: Dict[str, str] = {}
+        waiting: Dict[str, threading.Event] = {}
+
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in vectors or key in to_encode or key in waiting:
+                    continue
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    vectors[key] = vector
+                elif key in self._pending:
+                    self.hits += 1
+                    waiting[key] = self._pending[key]
+                else:
+                    to_encode[key] = text
+                    self._pending[key] = threading.Event()
+        claimed = list(to_encode)
+
+        try:
+            # Le disque est consulté hors verrou ; seuls les textes inconnus partout sont encodés
+            for key in list(to_encode):
+                vector = self._load_from_disk(key)
+                if vector is not None:
+                    vectors[key] = vector
+                    del to_encode[key]
+                    with self._lock:
+                        self.disk_hits += 1
+                        self._store(key, vector)
+
+            with self._lock:
+                self.misses += len(to_encode)
+            if to_encode:
+                encoded = np.asarray(encode(list(to_encode.values())), dtype=EMBEDDING_DTYPE)
+                encoded = encoded.reshape(len(to_encode), -1)
+                with self._lock:
+                    self.encoded += len(to_encode)
+                    for key, vector in zip(to_encode, encoded):
+                        vector = vector.copy()
+                        vectors[key] = vector
+                        self._store(key, vector)
+                for key in to_encode:
+                    self._save_to_disk(key, vectors[key])
+        finally:
+            with self._lock:
+                for key in claimed:
+                    self._pending.pop(key).set()
+
+        for key, event in waiting.items():
+            event.wait()
+            with self._lock:
+                vector = self._entries.get(key)
+            if vector is None:
+                # Évincé entre-temps ou échec de l'encodage chez l'autre thread
+                vector = self._load_from_disk(key)
+            if vector is None:
+                vector = np.asarray(encode([texts[keys.index(key)]]), dtype=EMBEDDING_DTYPE)[0]
+                with self._lock:
+                    self.encoded += 1
+                    self._store(key, vector)
+            vectors[key] = vector
+
+        return np.stack([vectors[key] for key in keys]) if keys else np.empty((0, 0), dtype=EMBEDDING_DTYPE)
+
+    def get(self, text: str, encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Embedding d'un seul texte"""
+        return self.get_many([text], encode)[0]
+
+    def __getstate__(self):
+        """Configuration seule : un cache envoyé à un worker y repart vide, avec son propre verrou"""
+        state = self.__dict__.copy()
+        state.update(_entries=OrderedDict(), _pending={}, _lock=None, bytes=0)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset_locks(self):
+        """Recrée le verrou et oublie les encodages en cours (à appeler dans un processus forké)"""
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def clear(self):
+        """Vide le cache mémoire (le stockage disque est conservé)"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict:
+        """Statistiques d'utilisation du cache"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'model_version': self.model_version,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'encoded': self.encoded,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'disk_dir': self.disk_dir
+            }
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Moteur de features sans vocabulaire appris
+Hachage des n-grammes dans un espace de taille fixe, IDF tenu à jour par compteurs de
+fréquence documentaire, puis projection aléatoire creuse à la place de la PCA.
+Tout worker peut vectoriser un texte avec les seuls compteurs publiés.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from model_artifacts import MappedScaler
+
+logger = logging.getLogger(__name__)
+
+# Features numériques : expérience, éducation, nb compétences, nb langues, nb certifications
+N_NUMERIC = 5
+
+
+class DocumentFrequencies:
+    """Fréquences documentaires par feature hachée (jamais modifiées après création)"""
+
+    def __init__(self, counts: np.ndarray, n_documents: int = 0):
+        self.counts = counts
+        self.n_documents = n_documents
+
+    def updated(self, added=None, removed=None) -> 'DocumentFrequencies':
+        """Copie tenant compte de documents ajoutés et retirés (matrices de comptes creuses)"""
+        counts = self.counts.copy()
+        n_documents = self.n_documents
+        for matrix, sign in ((added, 1), (removed, -1)):
+            if matrix is None or matrix.shape[0] == 0:
+                continue
+            counts += sign * np.bincount(matrix.indices, minlength=len(counts)).astype(counts.dtype)
+            n_documents += sign * matrix.shape[0]
+        return DocumentFrequencies(counts, n_documents)
+
+
+class HashedTfidfProjector:
+    """TF-IDF haché puis projeté : remplace le couple TfidfVectorizer + PCA"""
+
+    def __init__(self, engine: 'HashingFeatureEngine', idf: np.ndarray):
+        self.engine = engine
+        self.idf_ = idf
+
+    def transform(self, texts: Iterable[str]) -> np.ndarray:
+        """Vecteurs textuels réduits (n_textes, n_components)"""
+        from sklearn.preprocessing import normalize
+
+        tfidf = self.engine.counts(texts)
+        tfidf.data *= self.idf_[tfidf.indices]
+        tfidf.eliminate_zeros()
+        return np.asarray((normalize(tfidf) @ self.engine.projection).todense())
+
+
+class HashingFeatureEngine:
+    """Espace de features fixe (hachage) et projection aléatoire creuse déterministe
+
+    `min_df` et `max_df` reproduisent l'élagage du TfidfVectorizer : les features trop rares
+    ou trop fréquentes reçoivent un poids IDF nul.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, n_components: int = 100,
+                 min_df: int = 2, max_df: float = 0.95, seed: int = 0):
+        from scipy import sparse
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.random_projection import SparseRandomProjection
+
+        self.n_features = n_features
+        self.n_components = n_components
+        self.min_df = min_df
+        self.max_df = max_df
+        self._hasher = HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                                         alternate_sign=False, norm=None)
+        # La matrice de projection ne dépend que de la graine et des dimensions
+        projection = SparseRandomProjection(n_components=n_components, random_state=seed)
+        projection.fit(sparse.csr_matrix((1, n_features)))
+        self.projection = projection.components_.T.tocsr()
+
+    def counts(self, texts: Iterable[str]):
+        """Comptes de n-grammes hachés (CSR, indices triés et uniques par ligne)"""
+        matrix = self._hasher.transform(list(texts))
+        matrix.sum_duplicates()
+        return matrix
+
+    def empty_frequencies(self) -> DocumentFrequencies:
+        return DocumentFrequencies(np.zeros(self.n_features, dtype=np.int32))
+
+    def update_frequencies(self, frequencies: DocumentFrequencies, added: Iterable[str] = (),
+                           removed: Iterable[str] = ()) -> DocumentFrequencies:
+        """Nouveaux compteurs après ajout et retrait de textes"""
+        added, removed = list(added), list(removed)
+        return frequencies.updated(self.counts(added) if added else None,
+                                   self.counts(removed) if removed else None)
+
+    def idf(self, frequencies: DocumentFrequencies) -> np.ndarray:
+        """IDF lissé (formule de scikit-learn), nul pour les features élaguées"""
+        n = frequencies.n_documents
+        df = frequencies.counts.astype(np.float64)
+        idf = np.log((1 + n) / (1 + df)) + 1
+        max_count = self.max_df * n if isinstance(self.max_df, float) else self.max_df
+        idf[(df < self.min_df) | (df > max_count)] = 0.0
+        return idf
+
+    def numeric_statistics(self, numeric: Optional[np.ndarray] = None):
+        """Moyenne et échelle des features numériques, apprises sur les documents d'entraînement
+
+        L'échelle est l'écart-type multiplié par sqrt(n_components) : une feature centrée réduite
+        pèse alors autant qu'une composante d'un vecteur textuel projeté de norme 1. Sans
+        documents (ou pour une colonne constante), l'écart-type vaut 1.
+        """
+        numeric = np.asarray(numeric if numeric is not None else np.empty((0, N_NUMERIC)), dtype=np.float64)
+        numeric = numeric.reshape(-1, N_NUMERIC)
+        mean = numeric.mean(axis=0) if len(numeric) else np.zeros(N_NUMERIC)
+        std = numeric.std(axis=0) if len(numeric) else np.ones(N_NUMERIC)
+        std[std == 0] = 1.0
+        return mean, std * np.sqrt(self.n_components)
+
+    def estimators(self, frequencies: DocumentFrequencies, numeric: Optional[np.ndarray] = None) -> Dict:
+        """Vectoriseur, normaliseur et réducteur à publier dans un instantané du modèle
+
+        `numeric` : features numériques des CVs d'entraînement (une ligne par CV).
+        """
+        numeric_mean, numeric_scale = self.numeric_statistics(numeric)
+        return {
+            'tfidf_vectorizer': HashedTfidfProjector(self, self.idf(frequencies)),
+            'scaler': MappedScaler(
+                np.concatenate([np.zeros(self.n_components), numeric_mean]),
+                np.concatenate([np.ones(self.n_components), numeric_scale])
+            ),
+            'pca': None
+        }
@@ -1,5 +1,7 @@
 from typing import Dict
 
+from config_service import get_config, get_config_service
+
 
 LANG_FR: Dict[str, str] = {
     # Common
@@ -420,13 +422,10 @@ LANG_EN: Dict[str, str] = {
 
 
 def get_language() -> str:
-    # Lire la langue depuis le fichier config.json
+    # Lire la langue depuis config.json (instantané en cache, relu seulement s'il a changé)
     try:
-        import json
-        config_path = Path("config.json")
-        if config_path.exists():
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
+        config = get_config()
+        if config:
             language = config.get("language", "Français")
             # Mettre à jour la session state
             try:
@@ -450,16 +449,11 @@ def get_language() -> str:
 
 
 def t(key: str) -> str:
-    # Lire la langue depuis le fichier config.json à chaque appel
+    # Lire la langue depuis config.json (instantané en cache, sans accès disque à chaque appel)
     lang = "Français"  # Par défaut
     
     try:
-        import json
-        config_path = Path("config.json")
-        if config_path.exists():
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-            lang = config.get("language", "Français")
+        lang = get_config().get("language", "Français")
     except Exception:
         pass
     
@@ -492,11 +486,8 @@ def t(key: str) -> str:
 def force_language_reload():
     """Force le rechargement de la langue depuis le fichier config.json"""
     try:
-        import json
-        config_path = Path("config.json")
-        if config_path.exists():
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
+        config = get_config_service().reload()
+        if config:
             language = config.get("language", "Français")
             if hasattr(st, 'session_state'):
                 st.session_state.language = language
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Index compilé de mots-clés
+Toutes les correspondances (y compris chevauchantes) de tous les mots-clés en un seul passage
+sur le texte, avec la même sémantique que `mot_clé in texte`.
+"""
+
+import re
+from typing import Dict, FrozenSet, Hashable, Iterable, Set, Tuple
+
+
+class KeywordIndex:
+    """Automate mots-clés → étiquettes compilé en une seule expression régulière (trie)
+
+    À chaque position où un mot-clé commence, l'expression capture le plus long ;
+    les mots-clés plus courts qui commencent au même endroit en sont forcément des préfixes,
+    dont les étiquettes sont précalculées à la compilation.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Hashable]]):
+        self._labels: Dict[str, Set[Hashable]] = {}
+        for keyword, label in keywords:
+            keyword = keyword.lower()
+            if keyword:
+                self._labels.setdefault(keyword, set()).add(label)
+
+        ordered = sorted(self._labels, key=lambda k: (-len(k), k))
+        # Étiquettes de chaque mot-clé et de tous les mots-clés qui en sont des préfixes
+        self._expanded: Dict[str, FrozenSet[Hashable]] = {
+            keyword: frozenset().union(*(self._labels[other] for other in self._labels
+                                         if keyword.startswith(other)))
+            for keyword in ordered
+        }
+        self._pattern = re.compile(self._trie_pattern(ordered)) if ordered else None
+
+    @staticmethod
+    def _trie_pattern(keywords: Iterable[str]) -> str:
+        """Alternative factorisée en trie : à chaque position, une seule branche est explorée
+        et les groupes optionnels gourmands donnent le plus long mot-clé"""
+        trie: Dict = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        def build(node: Dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            if '' in node:
+                return '(?:' + body + ')?'
+            return body
+
+        return build(trie)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def keywords(self, text_lower: str) -> Set[str]:
+        """Plus longs mots-clés trouvés à chaque position du texte (déjà en minuscules)"""
+        if self._pattern is None or not text_lower:
+            return set()
+        found = set()
+        search = self._pattern.search
+        match = search(text_lower)
+        while match is not None:
+            # Reprise juste après le début de la correspondance : les chevauchements sont conservés
+            found.add(match.group())
+            match = search(text_lower, match.start() + 1)
+        return found
+
+    def labels(self, text_lower: str) -> Set[Hashable]:
+        """Étiquettes de tous les mots-clés présents dans le texte (déjà en minuscules)"""
+        found = set()
+        for keyword in self.keywords(text_lower):
+            found |= self._expanded[keyword]
+        return found
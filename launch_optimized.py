@@ -6,7 +6,12 @@ Version haute performance avec mise en cache et optimisations
 import streamlit as st
 import time
 from pathlib import Path
-from performance_optimizer import configure_streamlit_performance, MemoryManager
+from performance_optimizer import (
+    configure_streamlit_performance,
+    MemoryManager,
+    start_matcher_warmup,
+    render_matcher_status
+)
 from ui_optimizer import UIOptimizer, apply_optimized_styling
 from optimized_data_functions import (
     get_optimized_sample_data,
@@ -24,6 +29,9 @@ def main():
     # Nettoyage de la mémoire au démarrage
     MemoryManager.cleanup_session_state()
     
+    # Chargement des modèles de matching en arrière-plan
+    start_matcher_warmup()
+    
     # Vérification de l'authentification
     if 'authenticated' not in st.session_state or not st.session_state['authenticated']:
         render_auth_redirect()
@@ -90,6 +98,7 @@ def render_optimized_sidebar():
     """Sidebar optimisée"""
     with st.sidebar:
         st.markdown("### 🚀 TalentScope Optimisé")
+        render_matcher_status()
         
         # Métriques de performance
         if st.checkbox("📊 Stats Performance"):
@@ -2,13 +2,16 @@ import streamlit as st
 import base64
 from pathlib import Path
 from i18n import t
+from config_service import get_config, get_config_service
 from performance_optimizer import (
     PerformanceOptimizer, 
     MemoryManager, 
     RenderOptimizer,
     configure_streamlit_performance,
     get_sample_data_optimized,
-    get_sample_cv_data_optimized
+    get_sample_cv_data_optimized,
+    start_matcher_warmup,
+    render_matcher_status
 )
 
 @PerformanceOptimizer.cache_data(ttl=3600)  # Cache 1 heure
@@ -18,9 +21,7 @@ def set_page_config():
     
     # Charger la configuration
     try:
-        import json
-        with open("config.json", "r", encoding="utf-8") as f:
-            config = json.load(f)
+        config = get_config()
         theme = config.get('theme', 'Clair')
         language = config.get('language', 'Français')
     except:
@@ -1612,7 +1613,6 @@ def render_configuration_page():
     with col1:
         if st.button(f"💾 {t('config.save_config')}", use_container_width=True):
             # Sauvegarder dans un fichier JSON
-            import json
             config_data = {
                 "technical_weight": technical_weight,
                 "experience_weight": experience_weight,
@@ -1630,8 +1630,8 @@ def render_configuration_page():
                 "email_reports": False  # Toujours désactivé
             }
             
-            with open("config.json", "w", encoding="utf-8") as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
+            # Écriture atomique (fichier temporaire puis renommage) via le service de configuration
+            get_config_service().write(config_data)
             
             # Mettre à jour la session state immédiatement AVANT d'afficher les messages
             st.session_state.language = language
@@ -1729,6 +1729,7 @@ def render_configuration_page():
 def main():
     """Point d'entrée principal de l'application"""
     set_page_config()
+    start_matcher_warmup()
     
     # Vérification de l'authentification
     # Vérifier les paramètres URL pour l'authentification depuis le serveur HTML
@@ -1988,6 +1989,7 @@ def main():
         st.markdown("---")
         st.markdown("### ℹ️ Informations")
         st.markdown("**Version:** 1.0.0")
+        render_matcher_status()
         st.markdown(f"**{t('app.subtitle')}**")
         
         st.markdown("---")
@@ -2174,7 +2176,6 @@ if __name__ == "__main__":
     with col1:
         if st.button(f"💾 {t('config.save_config')}", use_container_width=True):
             # Sauvegarder dans un fichier JSON
-            import json
             config_data = {
                 "technical_weight": technical_weight,
                 "experience_weight": experience_weight,
@@ -2192,8 +2193,8 @@ if __name__ == "__main__":
                 "email_reports": False  # Toujours désactivé
             }
             
-            with open("config.json", "w", encoding="utf-8") as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
+            # Écriture atomique (fichier temporaire puis renommage) via le service de configuration
+            get_config_service().write(config_data)
             
             # Mettre à jour la session state immédiatement AVANT d'afficher les messages
             st.session_state.language = language
@@ -2291,6 +2292,7 @@ if __name__ == "__main__":
 def main():
     """Point d'entrée principal de l'application"""
     set_page_config()
+    start_matcher_warmup()
     
     # Vérification de l'authentification
     # Vérifier les paramètres URL pour l'authentification depuis le serveur HTML
@@ -2550,6 +2552,7 @@ def main():
         st.markdown("---")
         st.markdown("### ℹ️ Informations")
         st.markdown("**Version:** 1.0.0")
+        render_matcher_status()
         st.markdown(f"**{t('app.subtitle')}**")
         
         st.markdown("---")
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Banc de charge pour les applications FastAPI
+Pilote talent_scope_ml_api, backend/main.py ou hybrid_app.py en processus (ASGI) ou via localhost,
+avec concurrence et mélange de requêtes configurables, et produit un rapport JSON
+(débit, latences p50/p95/p99, taux d'erreurs).
+
+Exemples :
+    python load_test.py --app talent_scope --concurrency 16 --requests 2000
+    python load_test.py --app talent_scope --mix rank=5,list=3,upload=1 --seed-cvs 1000
+    python load_test.py --app hybrid --base-url http://localhost:8000 --duration 30
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import importlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Vocabulaire des CVs et offres synthétiques
+_SKILLS = ['Python', 'Java', 'SQL', 'Machine Learning', 'Data Science', 'Docker', 'Kubernetes', 'React',
+           'TensorFlow', 'PyTorch', 'Spark', 'AWS', 'Azure', 'Comptabilité', 'Audit', 'Marketing']
+_WORDS = ['développeur', 'ingénieur', 'analyse', 'données', 'projet', 'équipe', 'gestion', 'client',
+          'production', 'modèle', 'pipeline', 'cloud', 'sécurité', 'finance', 'budget', 'reporting',
+          'api', 'backend', 'frontend', 'statistiques', 'optimisation', 'qualité', 'agile', 'scrum']
+_EDUCATION = ['Bac', 'Licence', 'Master', 'Ingénieur', 'Doctorat']
+_LANGUAGES = ['Français', 'Anglais', 'Arabe', 'Espagnol']
+
+
+def synthetic_cv(rng: random.Random, index: int) -> Dict:
+    """Enregistrement de CV synthétique (format de l'import NDJSON)"""
+    skills = rng.sample(_SKILLS, rng.randint(2, 6))
+    words = rng.choices(_WORDS + [skill.lower() for skill in skills], k=rng.randint(60, 300))
+    return {
+        'filename': f"cv_synthetique_{index}.pdf",
+        'content': ' '.join(words),
+        'skills': skills,
+        'experience_years': rng.randint(0, 15),
+        'education_level': rng.choice(_EDUCATION),
+        'languages': rng.sample(_LANGUAGES, rng.randint(1, 3)),
+        'certifications': []
+    }
+
+
+def synthetic_job(rng: random.Random, index: int) -> Dict:
+    """Offre d'emploi synthétique (champs du formulaire /api/jobs/create)"""
+    required = rng.sample(_SKILLS, 3)
+    return {
+        'title': f"Poste synthétique {index}",
+        'description': ' '.join(rng.choices(_WORDS + [skill.lower() for skill in required], k=80)),
+        'required_skills': ','.join(required),
+        'preferred_skills': ','.join(rng.sample(_SKILLS, 2)),
+        'min_experience': str(rng.randint(0, 8)),
+        'required_education': rng.choice(_EDUCATION),
+        'languages': ','.join(rng.sample(_LANGUAGES, 1))
+    }
+
+
+@dataclass
+class Operation:
+    """Requête du mélange : nom, poids et construction (méthode, url, arguments httpx)"""
+    name: str
+    weight: float
+    build: Callable[[random.Random, Dict], Tuple[str, str, Dict]]
+
+
+@dataclass
+class AppProfile:
+    """Application cible : module, ressources à copier, amorçage des données et opérations
+
+    `resources` associe un chemin relatif du répertoire de travail à sa source dans le dépôt :
+    l'application en processus tourne dans un répertoire temporaire où seules ces ressources
+    sont copiées, sans jamais écrire dans le dépôt.
+    """
+    module: str
+    operations: List[Operation]
+    seed: Callable
+    resources: Dict[str, str] = field(default_factory=dict)
+    state: Dict = field(default_factory=dict)
+
+
+# === talent_scope_ml_api ===
+
+async def _seed_talent_scope(client, rng: random.Random, state: Dict, seed_cvs: int, seed_jobs: int):
+    response = await client.post('/api/demo/setup')
+    response.raise_for_status()
+    if seed_cvs:
+        body = '\n'.join(json.dumps(synthetic_cv(rng, i)) for i in range(seed_cvs))
+        response = await client.post('/api/cvs/bulk', content=body,
+                                     headers={'content-type': 'application/x-ndjson'})
+        response.raise_for_status()
+    for i in range(seed_jobs):
+        response = await client.post('/api/jobs/create', data=synthetic_job(rng, i))
+        response.raise_for_status()
+    jobs = (await client.get('/api/jobs/list')).json()['jobs']
+    state['job_ids'] = [job['id'] for job in jobs]
+    state['cv_ids'] = [cv['id'] for cv in (await client.get('/api/cvs/list', params={'limit': 1000})).json()['cvs']]
+    state['upload_counter'] = 0
+
+
+def _talent_scope_upload(rng: random.Random, state: Dict):
+    state['upload_counter'] += 1
+    record = synthetic_cv(rng, 10 ** 6 + state['upload_counter'])
+    return 'POST', '/api/cvs/upload', {'data': {
+        'filename': record['filename'],
+        'content': record['content'],
+        'skills': ','.join(record['skills']),
+        'experience_years': str(record['experience_years']),
+        'education_level': record['education_level'],
+        'languages': ','.join(record['languages'])
+    }}
+
+
+TALENT_SCOPE = AppProfile(
+    module='talent_scope_ml_api',
+    seed=_seed_talent_scope,
+    operations=[
+        Operation('rank', 5, lambda rng, state: ('POST', '/api/analysis/rank', {
+            'data': {'job_id': rng.choice(state['job_ids']), 'top_n': '10'}})),
+        Operation('results', 2, lambda rng, state: ('GET', f"/api/analysis/results/{rng.choice(state['job_ids'])}",
+                                                    {'params': {'top_n': 10}})),
+        Operation('list', 3, lambda rng, state: ('GET', '/api/cvs/list', {'params': {'limit': 50}})),
+        Operation('jobs_for_cv', 1, lambda rng, state: ('GET', f"/api/analysis/jobs-for-cv/{rng.choice(state['cv_ids'])}",
+                                                        {'params': {'top_n': 5}})),
+        Operation('upload', 1, _talent_scope_upload),
+    ]
+)
+
+
+# === backend/main.py ===
+
+async def _seed_backend(client, rng: random.Random, state: Dict, seed_cvs: int, seed_jobs: int):
+    state['cvs'] = []
+    for i in range(seed_cvs):
+        cv = _backend_cv(rng, i)
+        response = await client.post('/api/cvs', json=cv)
+        response.raise_for_status()
+        state['cvs'].append(cv)
+    state['upload_counter'] = 0
+
+
+def _backend_cv(rng: random.Random, index: int) -> Dict:
+    return {
+        'name': f"synthetique_{index}", 'person': f"Candidat {index}", 'position': rng.choice(_SKILLS),
+        'experience': f"{rng.randint(0, 15)} ans", 'level': rng.choice(['Junior', 'Intermédiaire', 'Senior']),
+        'score': rng.uniform(50, 100), 'skills': rng.uniform(50, 100),
+        'experience_score': rng.uniform(50, 100), 'education': rng.uniform(50, 100)
+    }
+
+
+def _backend_add(rng: random.Random, state: Dict):
+    state['upload_counter'] += 1
+    return 'POST', '/api/cvs', {'json': _backend_cv(rng, 10 ** 6 + state['upload_counter'])}
+
+
+BACKEND = AppProfile(
+    module='backend.main',
+    resources={'static': os.path.join(ROOT_DIR, 'backend', 'static')},
+    seed=_seed_backend,
+    operations=[
+        Operation('analysis', 5, lambda rng, state: ('POST', '/api/analysis', {'json': {
+            'job_description': ' '.join(rng.choices(_WORDS, k=40)),
+            'cvs': rng.sample(state['cvs'], min(10, len(state['cvs'])))}})),
+        Operation('list', 3, lambda rng, state: ('GET', '/api/cvs', {})),
+        Operation('dashboard', 2, lambda rng, state: ('GET', '/api/dashboard', {})),
+        Operation('upload', 1, _backend_add),
+    ]
+)
+
+
+# === hybrid_app.py ===
+
+async def _seed_hybrid(client, rng: random.Random, state: Dict, seed_cvs: int, seed_jobs: int):
+    response = await client.post('/api/login', data={'email': 'user@ministere.gov.ma', 'password': 'user123'})
+    response.raise_for_status()
+    state['session_id'] = response.json()['session_id']
+    state['documents'] = [
+        (f"cv_synthetique_{i}.txt", synthetic_cv(rng, i)['content'].encode('utf-8'))
+        for i in range(max(1, min(seed_cvs, 20)))
+    ]
+
+
+HYBRID = AppProfile(
+    module='hybrid_app',
+    resources={'static': os.path.join(ROOT_DIR, 'static'), 'templates': os.path.join(ROOT_DIR, 'templates')},
+    seed=_seed_hybrid,
+    operations=[
+        Operation('analyze', 3, lambda rng, state: ('POST', '/api/analyze', {
+            'data': {'job_description': ' '.join(rng.choices(_WORDS, k=40)), 'session_id': state['session_id']},
+            'files': [('files', (name, content, 'text/plain'))
+                      for name, content in rng.sample(state['documents'], min(5, len(state['documents'])))]})),
+        Operation('dashboard', 5, lambda rng, state: ('GET', '/api/dashboard-data',
+                                                      {'params': {'session_id': state['session_id']}})),
+        Operation('login', 1, lambda rng, state: ('POST', '/api/login', {
+            'data': {'email': 'user@ministere.gov.ma', 'password': 'user123'}})),
+    ]
+)
+
+PROFILES = {'talent_scope': TALENT_SCOPE, 'backend': BACKEND, 'hybrid': HYBRID}
+
+
+# === Mesures ===
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Percentile par rang le plus proche sur une liste triée"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(q / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Débit, latences (ms) et taux d'erreurs d'un ensemble de requêtes"""
+    values = sorted(latencies)
+    count = len(values)
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'requests': count,
+        'errors': errors,
+        'error_rate': errors / count if count else 0.0,
+        'throughput_rps': round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'mean': ms(sum(values) / count) if count else None,
+            'p50': ms(percentile(values, 50)),
+            'p95': ms(percentile(values, 95)),
+            'p99': ms(percentile(values, 99)),
+            'max': ms(values[-1]) if values else None
+        }
+    }
+
+
+def parse_mix(mix: Optional[str], operations: List[Operation]) -> List[Operation]:
+    """Applique un mélange 'nom=poids,...' ; les opérations absentes sont exclues"""
+    if not mix:
+        return operations
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        weights[name.strip()] = float(weight or 1)
+    known = {operation.name for operation in operations}
+    unknown = set(weights) - known
+    if unknown:
+        raise ValueError(f"Opérations inconnues : {', '.join(sorted(unknown))} (disponibles : {', '.join(sorted(known))})")
+    return [Operation(op.name, weights[op.name], op.build) for op in operations if weights.get(op.name, 0) > 0]
+
+
+def _make_client(profile: AppProfile, base_url: Optional[str]):
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("httpx est requis pour le banc de charge : pip install httpx")
+
+    timeout = httpx.Timeout(120.0)
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout)
+
+    sys.path.insert(0, ROOT_DIR)
+    app = importlib.import_module(profile.module).app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://loadtest', timeout=timeout)
+
+
+async def run_load_test(app_name: str, concurrency: int = 8, requests: Optional[int] = 1000,
+                        duration: Optional[float] = None, mix: Optional[str] = None,
+                        seed_cvs: int = 200, seed_jobs: int = 5, base_url: Optional[str] = None,
+                        seed: int = 0) -> Dict:
+    """Amorce les données puis exécute la charge ; retourne le rapport"""
+    profile = PROFILES[app_name]
+    operations = parse_mix(mix, profile.operations)
+    total_weight = sum(operation.weight for operation in operations)
+    rng = random.Random(seed)
+    state = {}
+
+    async with _make_client(profile, base_url) as client:
+        seed_start = time.perf_counter()
+        await profile.seed(client, rng, state, seed_cvs, seed_jobs)
+        seed_seconds = time.perf_counter() - seed_start
+
+        latencies = {operation.name: [] for operation in operations}
+        errors = {operation.name: 0 for operation in operations}
+        statuses = {}
+        sent = 0
+        deadline = time.perf_counter() + duration if duration else None
+
+        def next_operation() -> Optional[Operation]:
+            nonlocal sent
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            if deadline is None and sent >= requests:
+                return None
+            sent += 1
+            pick = rng.uniform(0, total_weight)
+            for operation in operations:
+                pick -= operation.weight
+                if pick <= 0:
+                    return operation
+            return operations[-1]
+
+        async def worker():
+            while True:
+                operation = next_operation()
+                if operation is None:
+                    return
+                method, url, kwargs = operation.build(rng, state)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                    status = response.status_code
+                except Exception as e:
+                    status = type(e).__name__
+                latencies[operation.name].append(time.perf_counter() - start)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if not isinstance(status, int) or status >= 400:
+                    errors[operation.name] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        'app': app_name,
+        'target': base_url or f"in-process:{profile.module}",
+        'concurrency': concurrency,
+        'mix': {operation.name: operation.weight for operation in operations},
+        'seed': {'cvs': seed_cvs, 'jobs': seed_jobs, 'seconds': round(seed_seconds, 3)},
+        'elapsed_seconds': round(elapsed, 3),
+        'overall': summarize(all_latencies, sum(errors.values()), elapsed),
+        'operations': {name: summarize(values, errors[name], elapsed) for name, values in latencies.items()},
+        'status_codes': statuses
+    }
+
+
+def prepare_workdir(profile: AppProfile, directory: str):
+    """Copie dans `directory` les ressources en lecture seule dont l'application a besoin"""
+    for target, source in profile.resources.items():
+        destination = os.path.join(directory, target)
+        if os.path.isdir(source):
+            shutil.copytree(source, destination)
+        elif os.path.exists(source):
+            os.makedirs(os.path.dirname(destination) or directory, exist_ok=True)
+            shutil.copy2(source, destination)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Banc de charge des applications FastAPI de TalentScope")
+    parser.add_argument('--app', choices=sorted(PROFILES), default='talent_scope')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=1000, help="nombre total de requêtes")
+    parser.add_argument('--duration', type=float, help="durée en secondes (remplace --requests)")
+    parser.add_argument('--mix', help="poids des opérations, ex. rank=5,list=3,upload=1")
+    parser.add_argument('--seed-cvs', type=int, default=200, help="CVs synthétiques créés avant la charge")
+    parser.add_argument('--seed-jobs', type=int, default=5, help="offres synthétiques créées avant la charge")
+    parser.add_argument('--base-url', help="cible HTTP (ex. http://localhost:8000) au lieu de l'ASGI en processus")
+    parser.add_argument('--seed', type=int, default=0, help="graine du générateur aléatoire")
+    parser.add_argument('--output', help="fichier JSON du rapport (sinon sortie standard)")
+    args = parser.parse_args(argv)
+
+    profile = PROFILES[args.app]
+    previous_cwd = os.getcwd()
+    temporary = None
+    try:
+        if not args.base_url:
+            # En processus : répertoire jetable (modèle sauvegardé, fichiers écrits par l'application)
+            temporary = tempfile.TemporaryDirectory(prefix='talentscope_loadtest_')
+            prepare_workdir(profile, temporary.name)
+            os.environ.setdefault('TALENTSCOPE_WARMUP', '0')
+            os.chdir(temporary.name)
+
+        report = asyncio.run(run_load_test(
+            args.app, args.concurrency, args.requests, args.duration, args.mix,
+            args.seed_cvs, args.seed_jobs, args.base_url, args.seed
+        ))
+    finally:
+        os.chdir(previous_cwd)
+        if temporary is not None:
+            temporary.cleanup()
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Pipeline concurrent d'analyse des CVs
+Lecture des PDF sur des threads, extraction des caractéristiques sur des processus,
+puis scoring contre un unique TF-IDF ajusté sur le lot. Étapes bornées, progression
+et annulation.
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor,
+                                wait)
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int, str], None]
+
+# En dessous, un pool de processus coûte plus qu'il ne rapporte
+_MIN_CVS_FOR_PROCESSES = 8
+
+
+class MatchingCancelled(RuntimeError):
+    """Analyse interrompue par le jeton d'annulation"""
+
+
+class CancellationToken:
+    """Jeton partagé entre l'interface et le pipeline"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise MatchingCancelled("Analyse annulée")
+
+
+_worker_analyzer = None
+
+# Pool d'extraction conservé d'un lot à l'autre : chaque worker ne construit son analyseur qu'une fois
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool forkserver (ou spawn) : le pipeline tourne dans un processus qui a déjà des threads
+    (lecteurs, Streamlit), un fork pourrait y hériter d'un verrou pris"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            available = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in available else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Arrête le pool d'extraction (il est recréé au prochain lot)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_workers = None, 0
+
+
+def _extract_features_worker(text: str) -> Dict[str, Any]:
+    """Extraction des caractéristiques dans un processus (un analyseur par processus)"""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        from ml_cv_matcher import CVAnalyzer
+        _worker_analyzer = CVAnalyzer()
+    return _worker_analyzer.extract_features(text)
+
+
+class MatchingPipeline:
+    """Analyse d'un lot de CVs pour une offre, en trois étapes concurrentes
+
+    Chaque étape garde au plus `max_in_flight` tâches en cours : la mémoire reste bornée
+    quelle que soit la taille du lot.
+    """
+
+    def __init__(self, analyzer, io_workers: int = 4, cpu_workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None):
+        self.analyzer = analyzer
+        self.io_workers = max(1, io_workers)
+        self.cpu_workers = cpu_workers if cpu_workers is not None else max(1, (os.cpu_count() or 1) - 1)
+        self.max_in_flight = max_in_flight or 2 * max(self.io_workers, self.cpu_workers)
+
+    @staticmethod
+    def _filename(cv_file) -> str:
+        return getattr(cv_file, 'name', 'CV_inconnu.pdf')
+
+    def _read_and_extract(self, cvs_list: List, token: CancellationToken,
+                          progress: Callable[[str], None]) -> Tuple[List[str], List[Optional[Dict]]]:
+        """Étapes 1 et 2 : textes des PDF (threads) puis caractéristiques (processus)"""
+        n = len(cvs_list)
+        texts: List[str] = [""] * n
+        features: List[Optional[Dict]] = [None] * n
+        use_processes = self.cpu_workers > 1 and n >= _MIN_CVS_FOR_PROCESSES
+
+        readers = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='cv-reader')
+        extractors = _get_pool(self.cpu_workers) if use_processes else None
+        pending: Dict[Future, Tuple[str, int]] = {}
+        next_index = 0
+        try:
+            while next_index < n or pending:
+                token.raise_if_cancelled()
+                # Alimenter la lecture tant que la fenêtre n'est pas pleine
+                while next_index < n and len(pending) < self.max_in_flight:
+                    future = readers.submit(self.analyzer.extract_text_from_pdf, cvs_list[next_index])
+                    pending[future] = ('read', next_index)
+                    next_index += 1
+
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, index = pending.pop(future)
+                    try:
+                        if stage == 'read':
+                            texts[index] = future.result() or ""
+                            if texts[index] and extractors is not None:
+                                pending[extractors.submit(_extract_features_worker, texts[index])] = ('features', index)
+                                continue
+                            if texts[index]:
+                                features[index] = self.analyzer.extract_features(texts[index])
+                        else:
+                            features[index] = future.result()
+                    except Exception as e:
+                        # Même traitement que analyze_cv : le CV reçoit un score nul
+                        logger.error(f"Erreur lors de l'analyse du CV: {e}")
+                    progress(self._filename(cvs_list[index]))
+        finally:
+            cancelled = token.cancelled
+            # Le pool d'extraction est partagé : seules les tâches de ce lot sont annulées
+            for future in pending:
+                future.cancel()
+            readers.shutdown(wait=not cancelled, cancel_futures=cancelled)
+        return texts, features
+
+    def _similarities(self, job_description: str, texts: List[str]) -> np.ndarray:
+        """Étape 3 : similarité cosinus de chaque CV avec l'offre, un seul TF-IDF pour tout le lot"""
+        from sklearn.base import clone
+
+        similarities = np.zeros(len(texts))
+        job_processed = self.analyzer.preprocess_text(job_description)
+        processed = [self.analyzer.preprocess_text(text) for text in texts]
+        present = [i for i, text in enumerate(processed) if text]
+        if not job_processed or not present:
+            return similarities
+        try:
+            # Vectoriseur cloné : l'instance partagée n'est jamais réajustée
+            vectorizer = clone(self.analyzer.vectorizer)
+            matrix = vectorizer.fit_transform([job_processed] + [processed[i] for i in present])
+            scores = np.asarray((matrix[1:] @ matrix[0].T).todense()).ravel()
+            similarities[present] = scores
+        except ValueError as e:
+            logger.error(f"Erreur lors du calcul de similarité: {e}")
+        return similarities
+
+    def run(self, job_description: str, cvs_list: List,
+            progress_callback: Optional[ProgressCallback] = None,
+            cancel_token: Optional[CancellationToken] = None) -> List[Tuple[str, float, Dict]]:
+        """Liste triée de (filename, score, features), du plus pertinent au moins pertinent
+
+        `progress_callback(traités, total, fichier)` est appelé après chaque CV lu et analysé,
+        puis une dernière fois après le scoring. Lève MatchingCancelled si le jeton est annulé.
+        """
+        token = cancel_token or CancellationToken()
+        total = len(cvs_list)
+        done = [0]
+
+        def progress(message: str):
+            done[0] += 1
+            if progress_callback is not None:
+                progress_callback(done[0], total + 1, message)
+
+        weights = self.analyzer.scoring_weights()
+        texts, features = self._read_and_extract(cvs_list, token, progress)
+        token.raise_if_cancelled()
+
+        similarities = self._similarities(job_description, texts)
+        results = []
+        for cv_file, cv_features, similarity in zip(cvs_list, features, similarities):
+            if cv_features is None:
+                # Texte illisible : même résultat que analyze_cv
+                results.append((self._filename(cv_file), 0.0, {}))
+                continue
+            score = self.analyzer.calculate_comprehensive_score(
+                job_description, None, cv_features, weights, similarity_score=float(similarity))
+            results.append((self._filename(cv_file), score, cv_features))
+        progress("scoring")
+
+        # Trier par score décroissant (du plus pertinent au moins pertinent)
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results
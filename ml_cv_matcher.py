@@ -12,14 +12,65 @@ from sklearn.preprocessing import normalize
 import spacy
 from collections import Counter
 import logging
-from typing import List, Tuple, Dict, Any
-import PyPDF2
-import io
+from typing import List, Tuple, Dict, Any, Optional
+from config_service import get_config
+from pdf_extraction import PdfDocument, extract_pdf
+from matching_pipeline import CancellationToken, MatchingCancelled, MatchingPipeline, ProgressCallback
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class KeywordCounter:
+    """Comptes de mots-clés en un seul passage de tokenisation
+    
+    Même résultat que `texte.count(mot_clé)` : un mot-clé sans espace ne peut apparaître qu'à
+    l'intérieur d'un token (suite de caractères non blancs), et les occurrences contenues dans
+    chaque token distinct sont mémorisées d'un CV à l'autre. Un mot-clé de deux mots n'est
+    recompté sur le texte que si l'un des tokens se termine par son premier mot.
+    """
+    
+    _MAX_CACHED_TOKENS = 200000
+    
+    def __init__(self, keywords: List[str]):
+        self.keywords = list(dict.fromkeys(keywords))
+        self.ids = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self._unigrams = [(i, k) for i, k in enumerate(self.keywords) if not any(c.isspace() for c in k)]
+        self._phrases = [(i, k, k.split()[0]) for i, k in enumerate(self.keywords)
+                         if any(c.isspace() for c in k)]
+        self._token_hits = {}
+    
+    def _hits(self, token: str) -> Tuple:
+        """Occurrences des mots-clés dans un token et expressions qu'il peut commencer"""
+        hits = self._token_hits.get(token)
+        if hits is None:
+            if len(self._token_hits) >= self._MAX_CACHED_TOKENS:
+                self._token_hits.clear()
+            hits = (
+                tuple((i, token.count(k)) for i, k in self._unigrams if k in token),
+                tuple(j for j, (_, _, first) in enumerate(self._phrases) if token.endswith(first))
+            )
+            self._token_hits[token] = hits
+        return hits
+    
+    def count(self, text_lower: str, tokens: List[str] = None) -> np.ndarray:
+        """Nombre d'occurrences de chaque mot-clé (ordre de `keywords`) dans le texte en minuscules
+        
+        `tokens` évite de redécouper le texte s'il l'a déjà été par `text_lower.split()`.
+        """
+        counts = np.zeros(len(self.keywords), dtype=np.int64)
+        phrases = set()
+        for token, n in Counter(text_lower.split() if tokens is None else tokens).items():
+            unigram_hits, phrase_starts = self._hits(token)
+            for i, c in unigram_hits:
+                counts[i] += c * n
+            phrases.update(phrase_starts)
+        
+        for j in phrases:
+            i, keyword, _ = self._phrases[j]
+            counts[i] = text_lower.count(keyword)
+        return counts
+
 class CVAnalyzer:
     """Analyseur de CVs avec Machine Learning"""
     
@@ -57,28 +108,28 @@ class CVAnalyzer:
             'expérience', 'années', 'ans', 'senior', 'junior', 'développeur', 'développeuse',
             'ingénieur', 'ingénieure', 'analyste', 'consultant', 'consultante', 'manager'
         ]
+        
+        self.degree_keywords = ['master', 'licence', 'bachelor', 'phd']
+        
+        # Tous les mots-clés comptés en un seul passage sur le texte
+        self.keyword_counter = KeywordCounter(
+            [skill for skills in self.technical_skills.values() for skill in skills] +
+            self.soft_skills + self.education_keywords + self.experience_keywords +
+            self.degree_keywords + ['années', 'ans']
+        )
     
-    def extract_text_from_pdf(self, pdf_file) -> str:
-        """Extrait le texte d'un fichier PDF"""
+    def extract_pdf_document(self, pdf_file, max_pages: int = 0, max_chars: int = 0) -> Optional[PdfDocument]:
+        """Pages extraites d'un PDF (fichier uploadé ou chemin), toutes sauf budget demandé"""
         try:
-            if hasattr(pdf_file, 'read'):
-                # Fichier uploadé via Streamlit
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
-            else:
-                # Chemin de fichier
-                with open(pdf_file, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    text = ""
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                    return text
+            return extract_pdf(pdf_file, max_pages=max_pages, max_chars=max_chars)
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction PDF: {e}")
-            return ""
+            return None
+    
+    def extract_text_from_pdf(self, pdf_file) -> str:
+        """Extrait le texte d'un fichier PDF"""
+        document = self.extract_pdf_document(pdf_file)
+        return document.text if document is not None else ""
     
     def preprocess_text(self, text: str) -> str:
         """Préprocesse le texte pour l'analyse"""
@@ -111,47 +162,55 @@ class CVAnalyzer:
         if total_words == 0:
             return features
         
+        # Un seul passage sur le texte ; les scores sont dérivés des comptes par simple lecture
+        counts = self.keyword_counter.count(text_lower, words)
+        ids = self.keyword_counter.ids
+        
         # Score des compétences techniques (plus réaliste)
         tech_matches = 0
         tech_total = 0
         for category, skills in self.technical_skills.items():
             for skill in skills:
                 tech_total += 1
-                if skill in text_lower:
+                occurrences = counts[ids[skill]]
+                if occurrences:
                     tech_matches += 1
                     # Bonus pour les compétences mentionnées plusieurs fois
-                    tech_matches += text_lower.count(skill) * 0.1
+                    tech_matches += int(occurrences) * 0.1
         
         features['technical_score'] = min(tech_matches / (tech_total * 0.3), 1.0)
         
         # Score des soft skills (plus réaliste)
         soft_matches = 0
         for skill in self.soft_skills:
-            if skill in text_lower:
+            occurrences = counts[ids[skill]]
+            if occurrences:
                 soft_matches += 1
                 # Bonus pour les variations
-                soft_matches += text_lower.count(skill) * 0.2
+                soft_matches += int(occurrences) * 0.2
         
         features['soft_skills_score'] = min(soft_matches / (len(self.soft_skills) * 0.4), 1.0)
         
         # Score de l'éducation (plus réaliste)
+        has_degree = any(counts[ids[degree]] for degree in self.degree_keywords)
         edu_matches = 0
         for keyword in self.education_keywords:
-            if keyword in text_lower:
+            if counts[ids[keyword]]:
                 edu_matches += 1
                 # Bonus pour les diplômes spécifiques
-                if any(degree in text_lower for degree in ['master', 'licence', 'bachelor', 'phd']):
+                if has_degree:
                     edu_matches += 0.5
         
         features['education_score'] = min(edu_matches / (len(self.education_keywords) * 0.3), 1.0)
         
         # Score de l'expérience (plus réaliste)
+        mentions_years = bool(counts[ids['années']] or counts[ids['ans']])
         exp_matches = 0
         for keyword in self.experience_keywords:
-            if keyword in text_lower:
+            if counts[ids[keyword]]:
                 exp_matches += 1
                 # Bonus pour les années d'expérience
-                if 'années' in text_lower or 'ans' in text_lower:
+                if mentions_years:
                     exp_matches += 0.3
         
         # Recherche de patterns d'expérience (années, postes)
@@ -206,37 +265,34 @@ class CVAnalyzer:
             logger.error(f"Erreur lors du calcul de similarité: {e}")
             return 0.0
     
-    def calculate_comprehensive_score(self, job_text: str, cv_text: str, features: Dict[str, Any]) -> float:
-        """Calcule un score global basé sur plusieurs critères"""
+    def scoring_weights(self) -> Dict[str, float]:
+        """Poids des critères, lus dans l'instantané de configuration en cache (sans accès disque
+        tant que config.json n'a pas changé)"""
+        config = get_config()
+        return {
+            'similarity': 0.4,      # Similarité textuelle (fixe)
+            'technical': config.get('technical_weight', 0.25),
+            'experience': config.get('experience_weight', 0.15),
+            'education': config.get('education_weight', 0.10),
+            'soft_skills': 0.05,    # Soft skills (fixe)
+            'keyword_density': 0.05 # Densité des mots-clés (fixe)
+        }
+    
+    def calculate_comprehensive_score(self, job_text: str, cv_text: str, features: Dict[str, Any],
+                                      weights: Dict[str, float] = None,
+                                      similarity_score: float = None) -> float:
+        """Calcule un score global basé sur plusieurs critères
         
-        # Charger les poids depuis la configuration
-        try:
-            import json
-            with open("config.json", "r", encoding="utf-8") as f:
-                config = json.load(f)
-            
-            # Utiliser les poids de la configuration
-            weights = {
-                'similarity': 0.4,  # Similarité textuelle (fixe)
-                'technical': config.get('technical_weight', 0.25),
-                'experience': config.get('experience_weight', 0.15),
-                'education': config.get('education_weight', 0.10),
-                'soft_skills': 0.05,    # Soft skills (fixe)
-                'keyword_density': 0.05 # Densité des mots-clés (fixe)
-            }
-        except:
-            # Poids par défaut si pas de configuration
-            weights = {
-                'similarity': 0.4,      # Similarité textuelle
-                'technical': 0.25,      # Compétences techniques
-                'experience': 0.15,     # Expérience
-                'education': 0.10,      # Éducation
-                'soft_skills': 0.05,    # Soft skills
-                'keyword_density': 0.05 # Densité des mots-clés
-            }
+        `similarity_score` permet de fournir une similarité déjà calculée (pipeline par lot).
+        """
+        
+        # Poids de la configuration (fournis une fois pour tout un lot par match_cvs_with_job)
+        if weights is None:
+            weights = self.scoring_weights()
         
         # Similarité textuelle
-        similarity_score = self.calculate_similarity(job_text, cv_text)
+        if similarity_score is None:
+            similarity_score = self.calculate_similarity(job_text, cv_text)
         
         # Score global pondéré
         comprehensive_score = (
@@ -251,7 +307,7 @@ class CVAnalyzer:
         # Normaliser entre 0 et 1
         return min(max(comprehensive_score, 0.0), 1.0)
     
-    def analyze_cv(self, cv_file, job_description: str) -> Dict[str, Any]:
+    def analyze_cv(self, cv_file, job_description: str, weights: Dict[str, float] = None) -> Dict[str, Any]:
         """Analyse un CV individuel"""
         try:
             # Extraire le texte du CV
@@ -269,7 +325,7 @@ class CVAnalyzer:
             features = self.extract_features(cv_text)
             
             # Calculer le score global
-            score = self.calculate_comprehensive_score(job_description, cv_text, features)
+            score = self.calculate_comprehensive_score(job_description, cv_text, features, weights)
             
             return {
                 'filename': getattr(cv_file, 'name', 'CV_inconnu.pdf'),
@@ -288,31 +344,27 @@ class CVAnalyzer:
                 'error': str(e)
             }
     
-    def match_cvs_with_job(self, job_description: str, cvs_list: List) -> List[Tuple[str, float, Dict]]:
+    def match_cvs_with_job(self, job_description: str, cvs_list: List,
+                           progress_callback: Optional[ProgressCallback] = None,
+                           cancel_token: Optional[CancellationToken] = None) -> List[Tuple[str, float, Dict]]:
         """
         Fonction principale pour matcher les CVs avec l'offre d'emploi
         
+        Lecture des PDF sur des threads, extraction des caractéristiques sur des processus et
+        similarité calculée avec un seul TF-IDF ajusté sur tout le lot (voir MatchingPipeline).
+        
         Args:
             job_description: Description du poste
             cvs_list: Liste des fichiers CV
+            progress_callback: Appelé avec (traités, total, fichier) au fil de l'analyse
+            cancel_token: Jeton permettant d'interrompre l'analyse (lève MatchingCancelled)
             
         Returns:
             Liste triée de tuples (filename, score, features) du plus pertinent au moins pertinent
         """
         logger.info(f"Début de l'analyse de {len(cvs_list)} CVs")
         
-        results = []
-        
-        for cv_file in cvs_list:
-            analysis = self.analyze_cv(cv_file, job_description)
-            results.append((
-                analysis['filename'],
-                analysis['score'],
-                analysis.get('features', {})
-            ))
-        
-        # Trier par score décroissant (du plus pertinent au moins pertinent)
-        results.sort(key=lambda x: x[1], reverse=True)
+        results = MatchingPipeline(self).run(job_description, cvs_list, progress_callback, cancel_token)
         
         logger.info(f"Analyse terminée. Meilleur score: {results[0][1]:.3f}" if results else "Aucun résultat")
         
@@ -321,15 +373,19 @@ class CVAnalyzer:
 # Instance globale de l'analyseur
 cv_analyzer = CVAnalyzer()
 
-def match_cvs_with_job(job_description: str, cvs_list: List) -> List[Tuple[str, float, Dict]]:
+def match_cvs_with_job(job_description: str, cvs_list: List,
+                       progress_callback: Optional[ProgressCallback] = None,
+                       cancel_token: Optional[CancellationToken] = None) -> List[Tuple[str, float, Dict]]:
     """
     Fonction d'interface pour matcher les CVs avec l'offre d'emploi
     
     Args:
         job_description: Description du poste
         cvs_list: Liste des fichiers CV
+        progress_callback: Appelé avec (traités, total, fichier) au fil de l'analyse
+        cancel_token: Jeton permettant d'interrompre l'analyse (lève MatchingCancelled)
         
     Returns:
         Liste triée de tuples (filename, score, features) du plus pertinent au moins pertinent
     """
-    return cv_analyzer.match_cvs_with_job(job_description, cvs_list)
+    return cv_analyzer.match_cvs_with_job(job_description, cvs_list, progress_callback, cancel_token)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Artefacts du modèle en tableaux NumPy projetés en mémoire
+Les parties numériques (idf, normalisation, PCA) et le vocabulaire sont stockés en .npy
+et relus avec mmap_mode='r' : les workers partagent les pages via le cache du système.
+"""
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from sparse_features import scale_features
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_FORMAT_VERSION = 2
+
+# Paramètres du vectoriseur nécessaires pour reconstruire l'analyseur de texte
+_VECTORIZER_PARAMS = ('lowercase', 'token_pattern', 'ngram_range', 'analyzer', 'strip_accents')
+
+_write_lock = threading.Lock()
+
+
+class MappedVocabulary:
+    """Vocabulaire trié stocké en un tableau d'octets à largeur fixe (dtype 'S')
+
+    L'index d'un terme est sa position dans l'ordre trié, ce qui correspond aux colonnes
+    d'un TfidfVectorizer entraîné (scikit-learn trie ses features). L'ordre des octets UTF-8
+    est celui des points de code : np.searchsorted retrouve tous les termes d'un lot d'un coup.
+    """
+
+    def __init__(self, terms: np.ndarray):
+        self.terms = terms
+
+    @staticmethod
+    def encode(terms: Iterable[str]) -> np.ndarray:
+        """Tableau à largeur fixe à partir de termes déjà triés"""
+        encoded = [term.encode('utf-8') for term in terms]
+        return np.array(encoded, dtype=f"S{max(map(len, encoded), default=1)}")
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __getitem__(self, index: int) -> str:
+        return self.terms[index].decode('utf-8')
+
+    def lookup(self, tokens: List[str]) -> np.ndarray:
+        """Colonne de chaque terme (-1 pour les termes absents du vocabulaire)"""
+        encoded = [token.encode('utf-8') for token in tokens]
+        width = self.terms.dtype.itemsize
+        # Un terme plus long que la largeur serait tronqué, donc confondu avec un autre
+        fits = np.fromiter((len(token) <= width for token in encoded), dtype=bool, count=len(encoded))
+        columns = np.full(len(encoded), -1, dtype=np.int64)
+        if not len(self.terms) or not fits.any():
+            return columns
+        queries = np.array([token for token, ok in zip(encoded, fits) if ok], dtype=self.terms.dtype)
+        positions = np.searchsorted(self.terms, queries)
+        found = self.terms[np.minimum(positions, len(self.terms) - 1)] == queries
+        columns[np.flatnonzero(fits)[found]] = positions[found]
+        return columns
+
+    def get(self, term: str, default: Optional[int] = None) -> Optional[int]:
+        column = int(self.lookup([term])[0])
+        return column if column >= 0 else default
+
+    def __contains__(self, term: str) -> bool:
+        return self.get(term) is not None
+
+
+class MappedTfidfVectorizer:
+    """Équivalent en lecture seule de TfidfVectorizer.transform à partir des tableaux projetés"""
+
+    def __init__(self, vocabulary: MappedVocabulary, idf: np.ndarray, params: Dict):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.vocabulary_ = vocabulary
+        self.idf_ = idf
+        self.norm = params.get('norm', 'l2')
+        self.sublinear_tf = params.get('sublinear_tf', False)
+        self.binary = params.get('binary', False)
+        analyzer_params = {key: params[key] for key in _VECTORIZER_PARAMS if key in params}
+        if 'ngram_range' in analyzer_params:
+            analyzer_params['ngram_range'] = tuple(analyzer_params['ngram_range'])
+        # Vectoriseur non entraîné : seul son analyseur de texte est utilisé
+        self._analyze = TfidfVectorizer(**analyzer_params).build_analyzer()
+
+    def transform(self, texts: Iterable[str]):
+        """Matrice TF-IDF creuse (CSR), identique à celle du vectoriseur d'origine
+
+        Les termes de tous les documents sont recherchés dans le vocabulaire en un seul lot ;
+        les occurrences sont ensuite comptées par couple (document, colonne).
+        """
+        from scipy import sparse
+        from sklearn.preprocessing import normalize
+
+        tokens = []
+        lengths = []
+        for text in texts:
+            analyzed = self._analyze(text)
+            tokens.extend(analyzed)
+            lengths.append(len(analyzed))
+
+        n_columns = len(self.vocabulary_)
+        columns = self.vocabulary_.lookup(tokens)
+        rows = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        known = columns >= 0
+        keys, counts = np.unique(rows[known] * n_columns + columns[known], return_counts=True)
+
+        values = np.ones(len(keys)) if self.binary else counts.astype(np.float64)
+        if self.sublinear_tf and not self.binary:
+            values = np.log(values) + 1.0
+        values *= self.idf_[keys % n_columns]
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // n_columns, minlength=len(lengths)), out=indptr[1:])
+        matrix = sparse.csr_matrix((values, keys % n_columns, indptr), shape=(len(lengths), n_columns))
+        if self.norm:
+            matrix = normalize(matrix, norm=self.norm, copy=False)
+        return matrix.astype(np.float32)
+
+
+class MappedScaler:
+    """Équivalent en lecture seule de StandardScaler.transform (entrée dense ou CSR)"""
+
+    def __init__(self, mean: Optional[np.ndarray], scale: Optional[np.ndarray]):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, features):
+        return scale_features(features, self.mean_, self.scale_)
+
+
+class MappedPCA:
+    """Équivalent en lecture seule de PCA.transform ou TruncatedSVD.transform (sans moyenne)"""
+
+    def __init__(self, components: np.ndarray, mean: Optional[np.ndarray] = None,
+                 explained_variance: Optional[np.ndarray] = None):
+        self.components_ = components
+        self.mean_ = mean
+        self.explained_variance_ = explained_variance
+
+    def transform(self, features) -> np.ndarray:
+        from scipy import sparse
+
+        if self.mean_ is not None:
+            features = (features.toarray() if sparse.issparse(features) else np.asarray(features)) - self.mean_
+        reduced = np.asarray(features @ self.components_.T)
+        if self.explained_variance_ is not None:
+            reduced /= np.sqrt(self.explained_variance_)
+        return reduced
+
+
+@contextmanager
+def model_write_lock(path: str):
+    """Verrou exclusif autour de l'écriture d'un modèle, partagé entre processus (`{path}.lock`)
+
+    Sans fcntl (Windows), seuls les threads du processus courant sont sérialisés.
+    """
+    with _write_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def save_model_artifacts(directory: str, tfidf_vectorizer, scaler, pca) -> str:
+    """Écrit les artefacts dans une nouvelle version `{directory}.XXXX` et retourne son chemin
+
+    Chaque sauvegarde a son propre répertoire (tempfile.mkdtemp, à côté de `directory`) :
+    deux écrivains ne se marchent pas dessus et la version référencée par le pickle courant
+    reste intacte. meta.json est écrit en dernier ; une version sans lui est incomplète.
+    """
+    parent = os.path.dirname(directory) or os.curdir
+    version = tempfile.mkdtemp(prefix=f"{os.path.basename(directory)}.", dir=parent)
+    version = os.path.join(os.path.dirname(directory), os.path.basename(version))
+
+    def write(name: str, array: np.ndarray):
+        np.save(os.path.join(version, f"{name}.npy"), np.ascontiguousarray(array))
+
+    try:
+        vocabulary = tfidf_vectorizer.vocabulary_
+        terms = sorted(vocabulary, key=vocabulary.get)
+        if any(vocabulary[term] != index for index, term in enumerate(terms)) or terms != sorted(terms):
+            raise ValueError("Le vocabulaire doit être trié (colonnes dans l'ordre alphabétique)")
+        write('vocabulary_terms', MappedVocabulary.encode(terms))
+        write('idf', tfidf_vectorizer.idf_)
+
+        params = tfidf_vectorizer.get_params()
+        meta = {
+            'format_version': ARTIFACTS_FORMAT_VERSION,
+            'vectorizer': {key: params[key] for key in _VECTORIZER_PARAMS + ('norm', 'sublinear_tf', 'binary')
+                           if key in params and not callable(params[key])},
+            # StandardScaler(with_mean=False) calcule mean_ sans jamais la soustraire
+            'scaler': {'with_mean': getattr(scaler, 'with_mean', True) and getattr(scaler, 'mean_', None) is not None,
+                       'with_std': getattr(scaler, 'scale_', None) is not None},
+            'pca': {'fitted': hasattr(pca, 'components_'), 'whiten': bool(getattr(pca, 'whiten', False)),
+                    'centered': getattr(pca, 'mean_', None) is not None}
+        }
+        if meta['scaler']['with_mean']:
+            write('scaler_mean', scaler.mean_)
+        if meta['scaler']['with_std']:
+            write('scaler_scale', scaler.scale_)
+        if meta['pca']['fitted']:
+            write('pca_components', pca.components_)
+            if meta['pca']['centered']:
+                write('pca_mean', pca.mean_)
+            if meta['pca']['whiten']:
+                write('pca_explained_variance', pca.explained_variance_)
+
+        with open(os.path.join(version, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+    return version
+
+
+def prune_model_artifacts(directory: str, keep: Optional[str] = None) -> List[str]:
+    """Supprime les versions de `directory` autres que `keep` (à appeler une fois le pickle remplacé)
+
+    Les processus qui ont déjà projeté une ancienne version en mémoire la conservent :
+    les fichiers supprimés restent lisibles tant qu'ils sont ouverts.
+    """
+    parent = os.path.dirname(directory) or os.curdir
+    name = os.path.basename(directory)
+    keep_name = os.path.basename(keep) if keep else None
+    removed = []
+    for entry in os.scandir(parent):
+        if entry.is_dir() and entry.name != keep_name and (entry.name == name or entry.name.startswith(f"{name}.")):
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.path)
+    return removed
+
+
+def load_model_artifacts(directory: str):
+    """Relit les artefacts en mémoire projetée ; retourne (vectoriseur, normaliseur, pca) ou None"""
+    meta_path = os.path.join(directory, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != ARTIFACTS_FORMAT_VERSION:
+        logger.warning(f"Format d'artefacts non pris en charge: {meta.get('format_version')}")
+        return None
+
+    def read(name: str) -> np.ndarray:
+        return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+
+    vocabulary = MappedVocabulary(read('vocabulary_terms'))
+    vectorizer = MappedTfidfVectorizer(vocabulary, read('idf'), meta['vectorizer'])
+    scaler = MappedScaler(
+        read('scaler_mean') if meta['scaler']['with_mean'] else None,
+        read('scaler_scale') if meta['scaler']['with_std'] else None
+    )
+    pca = None
+    if meta['pca']['fitted']:
+        pca = MappedPCA(
+            read('pca_components'),
+            read('pca_mean') if meta['pca'].get('centered', True) else None,
+            read('pca_explained_variance') if meta['pca']['whiten'] else None
+        )
+    return vectorizer, scaler, pca
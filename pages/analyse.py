@@ -2,8 +2,10 @@
 Page d'analyse des CVs - TalentScope
 """
 import streamlit as st
+import pandas as pd
 import sys
 import os
+import time
 
 # Ajouter le répertoire racine au path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -165,45 +167,102 @@ def render_step_2():
             else:
                 st.error("Veuillez importer au moins un CV")
 
-def render_step_3():
-    """Étape 3: Vérification des données"""
-    st.markdown("### ✅ Vérification des données")
-    
-    # Simulation de la vérification
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+def _score_status(score: float) -> str:
+    """Statut affiché pour un score en pourcentage"""
+    if score >= 85:
+        return "Excellent"
+    elif score >= 70:
+        return "Très bon"
+    elif score >= 50:
+        return "Bon"
+    return "Moyen"
+
+def _matching_key(job_description: str, uploaded_files) -> tuple:
+    """Identifie un lot analysé : l'analyse n'est pas relancée à chaque réexécution de la page"""
+    return (job_description, tuple((f.name, f.size) for f in uploaded_files))
+
+def run_matching(job_description: str, uploaded_files, progress_bar, status_text):
+    """Analyse des CVs importés (ml_cv_matcher), avec progression et annulation
     
-    steps = [
-        "Analyse des fichiers...",
-        "Extraction du texte...",
-        "Identification des compétences...",
-        "Calcul des scores...",
-        "Génération des résultats..."
-    ]
+    Un clic sur « Annuler » relance le script Streamlit : la mise à jour suivante de la barre
+    de progression est interrompue et annule le jeton, ce qui arrête le pipeline.
+    """
+    from matching_pipeline import CancellationToken
+    from ml_cv_matcher import match_cvs_with_job
     
-    for i, step in enumerate(steps):
-        status_text.text(step)
-        progress_bar.progress((i + 1) / len(steps))
-        import time
-        time.sleep(0.5)
+    token = CancellationToken()
+    st.session_state.matching_token = token
     
-    st.success("✅ Vérification terminée!")
+    def on_progress(done: int, total: int, message: str):
+        try:
+            progress_bar.progress(done / total)
+            status_text.text(f"{message} ({done}/{total})")
+        except BaseException:
+            token.cancel()
+            raise
     
-    # Résumé de la vérification
-    col1, col2, col3 = st.columns(3)
+    try:
+        return match_cvs_with_job(job_description, uploaded_files, on_progress, token)
+    finally:
+        st.session_state.matching_token = None
+
+def render_step_3():
+    """Étape 3: Analyse des CVs importés"""
+    st.markdown("### ✅ Vérification des données")
     
-    with col1:
-        st.metric("CVs traités", len(st.session_state.get('uploaded_files', [])))
-    with col2:
-        st.metric("Compétences identifiées", 45)
-    with col3:
-        st.metric("Temps de traitement", "2.3s")
+    uploaded_files = st.session_state.get('uploaded_files') or []
+    job_description = st.session_state.get('job_description', '')
+    key = _matching_key(job_description, uploaded_files)
     
-    # Aperçu des données extraites
-    st.markdown("#### 📋 Aperçu des données extraites")
-    sample_data = get_sample_cv_data()
-    preview_df = pd.DataFrame(sample_data[:3])
-    st.dataframe(preview_df[['name', 'score', 'status', 'position']], use_container_width=True)
+    if st.session_state.get('matching_key') != key:
+        if st.button("⏹ Annuler l'analyse"):
+            token = st.session_state.get('matching_token')
+            if token is not None:
+                token.cancel()
+            st.session_state.matching_cancelled = key
+        
+        if st.session_state.get('matching_cancelled') == key:
+            st.warning("Analyse annulée")
+            if st.button("🔄 Relancer l'analyse", type="primary"):
+                st.session_state.matching_cancelled = None
+                st.rerun()
+        else:
+            from matching_pipeline import MatchingCancelled
+            
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            start = time.perf_counter()
+            try:
+                results = run_matching(job_description, uploaded_files, progress_bar, status_text)
+            except MatchingCancelled:
+                st.session_state.matching_cancelled = key
+                st.rerun()
+            st.session_state.matching_results = [
+                {'name': name, 'score': round(score * 100, 1), 'features': features}
+                for name, score, features in results
+            ]
+            st.session_state.matching_seconds = time.perf_counter() - start
+            st.session_state.matching_key = key
+            st.rerun()
+    else:
+        results = st.session_state.matching_results
+        st.success("✅ Vérification terminée!")
+        
+        # Résumé de l'analyse
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("CVs traités", len(results))
+        with col2:
+            st.metric("CVs lisibles", sum(bool(result['features']) for result in results))
+        with col3:
+            st.metric("Temps de traitement", f"{st.session_state.matching_seconds:.1f}s")
+        
+        # Aperçu des données extraites
+        st.markdown("#### 📋 Aperçu des données extraites")
+        preview_df = pd.DataFrame([{'name': result['name'], 'score': result['score'],
+                                    'status': _score_status(result['score'])} for result in results[:3]])
+        st.dataframe(preview_df, use_container_width=True)
     
     # Boutons de navigation
     col1, col2, col3 = st.columns([1, 1, 1])
@@ -230,8 +289,13 @@ def render_step_4():
     with col3:
         status_filter = st.multiselect("Statut", ["Excellent", "Très bon", "Bon", "Moyen"])
     
-    # Résultats
-    cv_data = get_sample_cv_data()
+    # Résultats de l'analyse (données d'exemple si aucun lot n'a été analysé)
+    if st.session_state.get('matching_results'):
+        cv_data = [{'name': result['name'], 'score': result['score'], 'status': _score_status(result['score']),
+                    'position': '', 'skills': [], 'date': None}
+                   for result in st.session_state.matching_results]
+    else:
+        cv_data = get_sample_cv_data()
     
     # Filtrage
     filtered_data = [cv for cv in cv_data if cv['score'] >= min_score]
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Classement multi-processus
+Dans un processus sans autre thread, les workers sont forkés : ils héritent des modèles du parent
+en copie sur écriture (gc.freeze évite que le ramasse-miettes ne salisse leurs pages). Si des
+threads tournent (serveur, préchauffage), un fork pourrait hériter d'un verrou pris : les workers
+sont alors lancés par forkserver (ou spawn), dans un pool conservé d'un appel à l'autre, et
+reçoivent l'état du matcher picklé une seule fois dans le parent (les modèles ne sont pas
+rechargés depuis le disque). Un matcher non picklable est reconstruit dans chaque worker.
+"""
+
+import gc
+import os
+import sys
+import time
+import pickle
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+START_METHODS = ('fork', 'forkserver', 'spawn')
+
+# Contexte partagé avec les workers par héritage du fork (rien n'est sérialisé à l'aller)
+_shared: Optional[Dict[str, Any]] = None
+_thread_limits = None
+
+# Matcher reconstruit dans un worker forkserver/spawn, et pool de ces workers côté parent
+_worker_matcher = None
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+_MIN_SHARD_SIZE = 16
+
+
+def fork_available() -> bool:
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def default_worker_count() -> int:
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def choose_start_method() -> str:
+    """'fork' tant que le processus n'a qu'un thread, sinon forkserver (ou spawn à défaut)
+
+    TALENTSCOPE_RANKING_START_METHOD force une méthode.
+    """
+    available = multiprocessing.get_all_start_methods()
+    forced = os.environ.get('TALENTSCOPE_RANKING_START_METHOD')
+    if forced:
+        if forced not in available:
+            raise ValueError(f"Méthode de démarrage indisponible : {forced} (disponibles : {', '.join(available)})")
+        return forced
+    if 'fork' in available and threading.active_count() == 1:
+        return 'fork'
+    return 'forkserver' if 'forkserver' in available else 'spawn'
+
+
+def _limit_threads(n_threads: int):
+    """Limite les pools de threads BLAS/OpenMP et torch du worker"""
+    global _thread_limits
+    for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[variable] = str(n_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        _thread_limits = threadpool_limits(limits=n_threads)
+    except ImportError:
+        pass
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(n_threads)
+
+
+def _init_worker(n_threads: int):
+    _limit_threads(n_threads)
+    # Un verrou tenu par un thread du parent au moment du fork resterait pris dans l'enfant
+    _shared['matcher'].embedding_cache.reset_locks()
+
+
+def _init_spawned_worker(n_threads: int, payload: Tuple[str, Any]):
+    """Worker forkserver/spawn : rien n'est hérité, le matcher est dépicklé (ou reconstruit) une fois"""
+    global _worker_matcher
+    kind, data = payload
+    if kind == 'pickle':
+        _worker_matcher = pickle.loads(data)
+    else:
+        matcher_class, args = data
+        _worker_matcher = matcher_class(*args)
+    # Après le chargement : torch n'est importé qu'en dépicklant le modèle
+    _limit_threads(n_threads)
+
+
+def _matcher_spec(matcher) -> Tuple:
+    """Classe et arguments pour reconstruire le matcher (modèle choisi par l'environnement hérité)"""
+    return type(matcher), (matcher.language, matcher.sentence_model.backend, matcher.use_ner)
+
+
+def _matcher_payload(matcher) -> Tuple[str, Any]:
+    """État du matcher envoyé aux workers : picklé une fois, sinon de quoi le reconstruire"""
+    try:
+        return 'pickle', pickle.dumps(matcher, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        logger.warning(f"Matcher non picklable, reconstruit dans chaque worker : {e}")
+        return 'spec', _matcher_spec(matcher)
+
+
+def _score(matcher, context: Dict[str, Any], cv_texts: List[str], keyword_scores: np.ndarray) -> List:
+    return matcher.match_cvs_to_job(
+        cv_texts,
+        context['job_description'],
+        context['required_experience'],
+        context['required_education'],
+        context['sector_hint'],
+        context['batch_size'],
+        keyword_scores=keyword_scores
+    )
+
+
+def _score_shard(bounds: Tuple[int, int]) -> List:
+    start, end = bounds
+    context = _shared
+    return _score(context['matcher'], context, context['cv_texts'][start:end],
+                  context['keyword_scores'][start:end])
+
+
+def _score_task(task: Tuple[Dict[str, Any], List[str], np.ndarray]) -> List:
+    context, cv_texts, keyword_scores = task
+    return _score(_worker_matcher, context, cv_texts, keyword_scores)
+
+
+def _shards(n_items: int, n_workers: int) -> List[Tuple[int, int]]:
+    n_shards = max(1, min(n_workers, n_items // _MIN_SHARD_SIZE))
+    edges = np.linspace(0, n_items, n_shards + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def _get_spawned_pool(method: str, matcher, n_workers: int, n_threads: int) -> ProcessPoolExecutor:
+    """Pool forkserver/spawn réutilisé tant que le matcher (même instance) et la taille ne changent pas
+
+    Les workers reçoivent l'état du matcher tel qu'il était à la création du pool.
+    """
+    global _pool, _pool_key
+    # Le matcher est comparé par identité (et gardé en vie par la clé)
+    key = (method, matcher, n_workers, n_threads)
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context(method),
+                                        initializer=_init_spawned_worker,
+                                        initargs=(n_threads, _matcher_payload(matcher)))
+            _pool_key = key
+        return _pool
+
+
+def shutdown_pool():
+    """Arrête le pool forkserver/spawn (il est recréé au prochain classement)"""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_key = None, None
+
+
+def rank_candidates_parallel(matcher, candidates: List[Dict[str, Any]], job_description: str,
+                             required_experience: int = 0, required_education: int = 0,
+                             sector_hint: Optional[str] = None, n_workers: Optional[int] = None,
+                             batch_size: int = 32, threads_per_worker: Optional[int] = None,
+                             start_method: Optional[str] = None) -> List[Tuple[Dict, Any]]:
+    """Classement des candidats réparti entre des processus workers
+
+    Le score de mots-clés est calculé dans le parent sur tout le lot (un seul TF-IDF), de sorte
+    que le résultat est identique au classement mono-processus. Pour un petit lot, le classement
+    se fait dans le processus courant. `start_method` vaut par défaut choose_start_method().
+    """
+    global _shared
+    n_workers = n_workers or default_worker_count()
+    cv_texts = [candidate['cv_text'] for candidate in candidates]
+    shards = _shards(len(cv_texts), n_workers)
+
+    if len(shards) <= 1:
+        return matcher.rank_candidates(candidates, job_description, required_experience,
+                                       required_education, sector_hint, batch_size)
+
+    start_method = start_method or choose_start_method()
+    job = matcher.compile_job(job_description, required_experience, required_education, sector_hint)
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // len(shards))
+    context = {
+        'job_description': job_description,
+        'required_experience': required_experience,
+        'required_education': required_education,
+        'sector_hint': sector_hint,
+        'batch_size': batch_size
+    }
+    keyword_scores = matcher.calculate_keyword_scores(cv_texts, job)
+
+    if start_method == 'fork':
+        _shared = dict(context, matcher=matcher, cv_texts=cv_texts, keyword_scores=keyword_scores)
+        # Objets existants déplacés dans la génération permanente : le GC des workers ne les touche plus
+        gc.collect()
+        gc.freeze()
+        try:
+            with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context('fork'),
+                                     initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+                shard_results = list(pool.map(_score_shard, shards))
+        finally:
+            gc.unfreeze()
+            _shared = None
+    else:
+        pool = _get_spawned_pool(start_method, matcher, len(shards), threads_per_worker)
+        shard_results = list(pool.map(_score_task, [(context, cv_texts[start:end], keyword_scores[start:end])
+                                                    for start, end in shards]))
+
+    scores = [score for shard_scores in shard_results for score in shard_scores]
+    results = list(zip(candidates, scores))
+    results.sort(key=lambda x: x[1].overall_score, reverse=True)
+    return results
+
+
+def benchmark_start_methods(matcher, candidates: List[Dict[str, Any]], job_description: str,
+                            n_workers: Optional[int] = None, repeats: int = 3,
+                            methods: Optional[List[str]] = None) -> Dict:
+    """Temps de classement en processus courant et pour chaque méthode de démarrage
+
+    Le premier appel forkserver/spawn inclut l'envoi de l'état du matcher aux workers
+    (`first_seconds`) ; les suivants réutilisent le pool (`seconds`, médiane des répétitions).
+    """
+    n_workers = n_workers or max(2, default_worker_count())
+    methods = [m for m in (methods or START_METHODS) if m in multiprocessing.get_all_start_methods()]
+    report = {'candidates': len(candidates), 'workers': n_workers, 'cpus': os.cpu_count(), 'methods': {}}
+
+    def timed(method: Optional[str]) -> float:
+        start = time.perf_counter()
+        if method is None:
+            matcher.rank_candidates(candidates, job_description)
+        else:
+            rank_candidates_parallel(matcher, candidates, job_description, n_workers=n_workers,
+                                     start_method=method)
+        return time.perf_counter() - start
+
+    for method in [None] + methods:
+        first = timed(method)
+        seconds = [timed(method) for _ in range(repeats)]
+        report['methods'][method or 'serial'] = {'first_seconds': round(first, 3),
+                                                 'seconds': round(float(np.median(seconds)), 3)}
+        shutdown_pool()
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    import random
+    import argparse
+    import load_test
+    from cv_matching_algorithm import get_matcher
+
+    parser = argparse.ArgumentParser(description="Classement multi-processus : fork, forkserver et spawn")
+    parser.add_argument('--cvs', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    sample = [{'cv_text': load_test.synthetic_cv(rng, i)['content']} for i in range(args.cvs)]
+    description = load_test.synthetic_job(rng, 0)['description']
+    print(json.dumps(benchmark_start_methods(get_matcher(), sample, description, args.workers, args.repeats),
+                     indent=2))
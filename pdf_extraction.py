@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Extraction du texte des PDF
+Backends interchangeables (PyPDF2, pypdfium2 s'il est installé), budgets de pages et de
+caractères optionnels, pages extraites en parallèle pour les longs documents, temps mesuré par page.
+"""
+
+import io
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PDF_BACKENDS = ('auto', 'pypdf2', 'pdfium')
+# Budgets des imports de CV par l'API ; extract_pdf n'en applique aucun par défaut
+UPLOAD_MAX_PAGES = int(os.environ.get('TALENTSCOPE_PDF_MAX_PAGES', '20'))
+UPLOAD_MAX_CHARS = int(os.environ.get('TALENTSCOPE_PDF_MAX_CHARS', '60000'))
+# En dessous, répartir les pages entre processus coûte plus qu'il ne rapporte
+PARALLEL_MIN_PAGES = int(os.environ.get('TALENTSCOPE_PDF_PARALLEL_PAGES', '8'))
+_PAGES_PER_TASK = 4
+
+
+@dataclass
+class PdfPage:
+    """Texte d'une page (numérotée à partir de 1) et temps passé à l'extraire"""
+    number: int
+    text: str
+    seconds: float
+
+    @property
+    def lines(self) -> List[str]:
+        return self.text.splitlines()
+
+
+@dataclass
+class PdfDocument:
+    """Pages extraites d'un PDF, dans l'ordre
+
+    `truncated` indique qu'un budget a arrêté l'extraction avant la dernière page du fichier.
+    """
+    pages: List[PdfPage] = field(default_factory=list)
+    page_count: int = 0
+    backend: str = ''
+    seconds: float = 0.0
+    truncated: bool = False
+
+    @property
+    def text(self) -> str:
+        return "\n".join(page.text for page in self.pages)
+
+    @property
+    def chars(self) -> int:
+        return sum(len(page.text) for page in self.pages)
+
+
+class PyPDF2Backend:
+    """Lecteur pur Python (dépendance historique, toujours disponible)"""
+
+    name = 'pypdf2'
+
+    def open(self, data: bytes):
+        import PyPDF2
+        return PyPDF2.PdfReader(io.BytesIO(data))
+
+    def page_count(self, document) -> int:
+        return len(document.pages)
+
+    def page_text(self, document, index: int) -> str:
+        return document.pages[index].extract_text() or ""
+
+    def close(self, document):
+        pass
+
+
+# pdfium n'est pas thread-safe : un seul thread du processus l'appelle à la fois
+_pdfium_lock = threading.RLock()
+
+
+class PdfiumBackend:
+    """Couche texte lue par pdfium (pypdfium2) : bien plus rapide que PyPDF2 sur les longs PDF
+
+    Chaque appel prend _pdfium_lock, les lecteurs de plusieurs threads sont donc sérialisés ;
+    les workers du pool d'extraction ont chacun leur propre processus.
+    """
+
+    name = 'pdfium'
+
+    def open(self, data: bytes):
+        import pypdfium2
+        with _pdfium_lock:
+            return pypdfium2.PdfDocument(data)
+
+    def page_count(self, document) -> int:
+        with _pdfium_lock:
+            return len(document)
+
+    def page_text(self, document, index: int) -> str:
+        with _pdfium_lock:
+            page = document[index]
+            try:
+                text_page = page.get_textpage()
+                try:
+                    return text_page.get_text_range() or ""
+                finally:
+                    text_page.close()
+            finally:
+                page.close()
+
+    def close(self, document):
+        with _pdfium_lock:
+            document.close()
+
+
+def pdfium_available() -> bool:
+    try:
+        import pypdfium2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_pdf_backend(name: Optional[str] = None):
+    """Backend demandé (ou TALENTSCOPE_PDF_BACKEND) ; 'auto' prend pdfium s'il est installé"""
+    name = (name or os.environ.get('TALENTSCOPE_PDF_BACKEND') or 'auto').lower()
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"Backend PDF inconnu : {name} (attendu : {', '.join(PDF_BACKENDS)})")
+    if name == 'pdfium' or (name == 'auto' and pdfium_available()):
+        return PdfiumBackend()
+    return PyPDF2Backend()
+
+
+def _read_bytes(source) -> bytes:
+    """Contenu d'un PDF donné en octets, en fichier ouvert (upload Streamlit/FastAPI) ou en chemin"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, 'read'):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return source.read()
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def _extract_pages(backend, document, indexes: range) -> List[Tuple[int, str, float]]:
+    pages = []
+    for index in indexes:
+        start = time.perf_counter()
+        text = backend.page_text(document, index)
+        pages.append((index + 1, text, time.perf_counter() - start))
+    return pages
+
+
+def _extract_page_range_worker(backend_name: str, data: bytes, start: int, end: int) -> List[Tuple[int, str, float]]:
+    """Extraction d'une plage de pages dans un processus (chaque tâche rouvre le document)"""
+    backend = get_pdf_backend(backend_name)
+    document = backend.open(data)
+    try:
+        return _extract_pages(backend, document, range(start, end))
+    finally:
+        backend.close(document)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def default_worker_count() -> int:
+    if os.environ.get('TALENTSCOPE_PDF_WORKERS'):
+        return max(1, int(os.environ['TALENTSCOPE_PDF_WORKERS']))
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def _pool_context():
+    """forkserver (ou spawn) : le pool peut être créé depuis un thread d'un processus multi-thread"""
+    available = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in available else 'spawn')
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool partagé par tous les documents (créé au premier long PDF)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+            _pool_workers = workers
+        return _pool
+
+
+class _Budget:
+    """Accumulation des pages jusqu'à épuisement du budget de pages ou de caractères"""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.pages: List[PdfPage] = []
+        self.chars = 0
+
+    def add(self, number: int, text: str, seconds: float) -> bool:
+        """Ajoute une page ; False quand assez de texte a été collecté"""
+        self.pages.append(PdfPage(number, text, seconds))
+        self.chars += len(text)
+        return not (self.max_chars and self.chars >= self.max_chars)
+
+
+def extract_pdf(source, max_pages: int = 0, max_chars: int = 0,
+                backend: Optional[str] = None, workers: Optional[int] = None) -> PdfDocument:
+    """Pages d'un PDF, dans la limite de `max_pages` pages et d'environ `max_chars` caractères
+
+    Sans budget (0, par défaut), toutes les pages sont extraites. Le budget de caractères est
+    vérifié page par page : la page qui le dépasse est conservée entière. Les documents d'au
+    moins PARALLEL_MIN_PAGES pages sont répartis par plages de pages entre processus. Lève
+    l'exception du lecteur si le PDF est illisible.
+    """
+    workers = workers or default_worker_count()
+    reader = get_pdf_backend(backend)
+
+    started = time.perf_counter()
+    data = _read_bytes(source)
+    document = reader.open(data)
+    try:
+        page_count = reader.page_count(document)
+        n_pages = min(page_count, max_pages) if max_pages else page_count
+        budget = _Budget(max_chars)
+
+        if workers > 1 and n_pages >= PARALLEL_MIN_PAGES:
+            _extract_parallel(reader.name, data, n_pages, workers, budget)
+        else:
+            for number, text, seconds in _extract_pages(reader, document, range(n_pages)):
+                if not budget.add(number, text, seconds):
+                    break
+    finally:
+        reader.close(document)
+
+    result = PdfDocument(budget.pages, page_count, reader.name, time.perf_counter() - started,
+                         truncated=len(budget.pages) < page_count)
+    if result.truncated:
+        logger.info(f"PDF tronqué : {len(result.pages)}/{page_count} pages, {result.chars} caractères")
+    return result
+
+
+def _extract_parallel(backend_name: str, data: bytes, n_pages: int, workers: int, budget: _Budget):
+    """Plages de pages soumises par vagues de `workers` tâches, consommées dans l'ordre
+
+    Une vague n'est lancée que si le budget de caractères n'est pas encore atteint.
+    """
+    pool = _get_pool(workers)
+    ranges = [(start, min(start + _PAGES_PER_TASK, n_pages)) for start in range(0, n_pages, _PAGES_PER_TASK)]
+    for wave_start in range(0, len(ranges), workers):
+        futures = [pool.submit(_extract_page_range_worker, backend_name, data, start, end)
+                   for start, end in ranges[wave_start:wave_start + workers]]
+        for position, future in enumerate(futures):
+            for number, text, seconds in future.result():
+                if not budget.add(number, text, seconds):
+                    for pending in futures[position + 1:]:
+                        pending.cancel()
+                    return
+
+
+def extract_pdf_text(source, **options) -> str:
+    """Texte d'un PDF, pages jointes par des retours à la ligne (mêmes options que extract_pdf)"""
+    return extract_pdf(source, **options).text
+
+
+def page_timings(document: PdfDocument) -> Dict:
+    """Résumé des temps d'extraction d'un document (pages les plus lentes en premier)"""
+    slowest = sorted(document.pages, key=lambda page: page.seconds, reverse=True)
+    return {
+        'backend': document.backend,
+        'pages_extracted': len(document.pages),
+        'page_count': document.page_count,
+        'truncated': document.truncated,
+        'chars': document.chars,
+        'total_ms': round(document.seconds * 1000, 2),
+        'slowest_pages': [{'page': page.number, 'ms': round(page.seconds * 1000, 2)} for page in slowest[:5]]
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extraction du texte d'un PDF avec temps par page")
+    parser.add_argument('pdf')
+    parser.add_argument('--backend', default=None, choices=PDF_BACKENDS)
+    parser.add_argument('--max-pages', type=int, default=0)
+    parser.add_argument('--max-chars', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    extracted = extract_pdf(args.pdf, args.max_pages, args.max_chars, args.backend, args.workers)
+    print(json.dumps(page_timings(extracted), indent=2))
@@ -201,6 +201,33 @@ def configure_streamlit_performance():
     </style>
     """, unsafe_allow_html=True)
 
+# Préchauffage du moteur de matching
+def start_matcher_warmup():
+    """Lance le chargement des modèles de matching en arrière-plan (une seule fois par processus)"""
+    try:
+        from cv_matching_algorithm import start_warmup
+        start_warmup()
+    except ImportError:
+        pass
+
+def render_matcher_status():
+    """Affiche l'état de disponibilité du moteur de matching"""
+    try:
+        from cv_matching_algorithm import matcher_status
+    except ImportError:
+        return
+    
+    status = matcher_status()
+    if status['ready']:
+        st.markdown("**Moteur de matching:** 🟢 Prêt")
+    elif status['loading']:
+        st.markdown("**Moteur de matching:** 🟡 Chargement...")
+    elif status['error']:
+        retry = f" (nouvel essai dans {status['retry_in']:.0f}s)" if status['retry_in'] else ""
+        st.markdown(f"**Moteur de matching:** 🔴 Indisponible{retry}")
+    else:
+        st.markdown("**Moteur de matching:** ⚪ Non chargé")
+
 # Gestionnaire de mémoire
 class MemoryManager:
     """Gestionnaire de mémoire pour optimiser l'utilisation"""
@@ -1,4 +1,3 @@
-import PyPDF2
 import spacy
 import string
 import re
@@ -8,6 +7,7 @@ from sklearn.metrics.pairwise import cosine_similarity
 from textblob import TextBlob
 from collections import Counter
 import logging
+from pdf_extraction import extract_pdf
 # Configuration intégrée
 NLP_CONFIG = {
     "model": "fr_core_news_sm",
@@ -89,13 +89,8 @@ def correct_spelling(text):
 def extract_text_from_pdf(file):
     """Extraction du texte depuis un fichier PDF"""
     try:
-        reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + " "
-        return text.strip()
+        document = extract_pdf(file)
+        return " ".join(page.text for page in document.pages if page.text).strip()
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction PDF: {e}")
         return ""
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Backends d'inférence CPU de l'encodeur de phrases
+PyTorch float32 (référence), PyTorch quantifié int8 dynamiquement, ONNX Runtime.
+Tous exposent `encode(textes, batch_size)`, `max_seq_length` et `name`.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'distiluse-base-multilingual-cased'
+ENCODER_BACKENDS = ('torch', 'torch-int8', 'onnx')
+
+
+def _set_torch_threads(num_threads: Optional[int]):
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+
+
+class TorchSentenceEncoder:
+    """SentenceTransformer en float32 (comportement historique)"""
+
+    backend = 'torch'
+
+    def __init__(self, model_name_or_path: str = DEFAULT_MODEL, num_threads: Optional[int] = None):
+        from sentence_transformers import SentenceTransformer
+
+        _set_torch_threads(num_threads)
+        self.model_name = model_name_or_path
+        self.num_threads = num_threads
+        self.model = SentenceTransformer(model_name_or_path, device='cpu')
+
+    @property
+    def name(self) -> str:
+        """Identifie modèle et backend (les embeddings mis en cache en dépendent)"""
+        return f"{self.model_name}@{self.backend}"
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.model.max_seq_length
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts), batch_size=batch_size, show_progress_bar=False),
+                          dtype=np.float32)
+
+
+class QuantizedTorchSentenceEncoder(TorchSentenceEncoder):
+    """SentenceTransformer dont les couches linéaires sont quantifiées en int8 dynamiquement"""
+
+    backend = 'torch-int8'
+
+    def __init__(self, model_name_or_path: str = DEFAULT_MODEL, num_threads: Optional[int] = None):
+        import torch
+
+        super().__init__(model_name_or_path, num_threads)
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxSentenceEncoder:
+    """Modèle exporté en ONNX, exécuté par ONNX Runtime sur CPU
+
+    `model_dir` contient `model.onnx` et les fichiers du tokenizer. Si le graphe produit
+    `sentence_embedding`, il est utilisé tel quel ; sinon la sortie par token est moyennée
+    selon le masque d'attention.
+    """
+
+    backend = 'onnx'
+
+    def __init__(self, model_dir: str, num_threads: Optional[int] = None,
+                 model_file: str = 'model.onnx'):
+        from transformers import AutoTokenizer
+
+        self.model_dir = model_dir
+        self.model_file = model_file
+        self.model_name = os.path.basename(os.path.normpath(model_dir))
+        self.num_threads = num_threads
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._open_session()
+        self._max_seq_length = self._read_max_seq_length(model_dir)
+
+    def _open_session(self):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(os.path.join(self.model_dir, self.model_file), options,
+                                                    providers=['CPUExecutionProvider'])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._output_names = [o.name for o in self.session.get_outputs()]
+
+    def __getstate__(self):
+        """La session ONNX Runtime n'est pas picklable : elle est rouverte depuis le fichier du modèle"""
+        state = self.__dict__.copy()
+        state['session'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open_session()
+
+    def _read_max_seq_length(self, model_dir: str) -> int:
+        config_path = os.path.join(model_dir, 'sentence_bert_config.json')
+        if os.path.exists(config_path):
+            with open(config_path, 'r', encoding='utf-8') as f:
+                return int(json.load(f).get('max_seq_length', 128))
+        return min(int(getattr(self.tokenizer, 'model_max_length', 128)), 512)
+
+    @property
+    def name(self) -> str:
+        return f"{self.model_name}@{self.backend}"
+
+    @property
+    def max_seq_length(self) -> int:
+        return self._max_seq_length
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        texts = list(texts)
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=self._max_seq_length, return_tensors='np')
+            feeds = {name: np.asarray(tokens[name], dtype=np.int64)
+                     for name in tokens if name in self._input_names}
+            outputs = dict(zip(self._output_names, self.session.run(None, feeds)))
+            if 'sentence_embedding' in outputs:
+                embeddings.append(outputs['sentence_embedding'])
+                continue
+            token_embeddings = outputs.get('last_hidden_state', next(iter(outputs.values())))
+            mask = np.asarray(tokens['attention_mask'], dtype=np.float32)[:, :, None]
+            embeddings.append((token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9))
+        if not embeddings:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(embeddings).astype(np.float32, copy=False)
+
+
+def create_encoder(backend: Optional[str] = None, model: Optional[str] = None,
+                   num_threads: Optional[int] = None):
+    """Encodeur selon le backend demandé (ou TALENTSCOPE_ENCODER_BACKEND, 'torch' par défaut)
+
+    Le modèle (nom ou répertoire local, obligatoire pour ONNX) et le nombre de threads
+    viennent de TALENTSCOPE_ENCODER_MODEL et TALENTSCOPE_ENCODER_THREADS s'ils ne sont pas fournis.
+    """
+    backend = (backend or os.environ.get('TALENTSCOPE_ENCODER_BACKEND') or 'torch').lower()
+    model = model or os.environ.get('TALENTSCOPE_ENCODER_MODEL') or DEFAULT_MODEL
+    if num_threads is None and os.environ.get('TALENTSCOPE_ENCODER_THREADS'):
+        num_threads = int(os.environ['TALENTSCOPE_ENCODER_THREADS'])
+
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Backend d'encodage inconnu : {backend} (attendu : {', '.join(ENCODER_BACKENDS)})")
+    if backend == 'onnx':
+        if not os.path.isdir(model):
+            raise ValueError(f"Le backend ONNX attend un répertoire de modèle local : {model}")
+        return OnnxSentenceEncoder(model, num_threads)
+    if backend == 'torch-int8':
+        return QuantizedTorchSentenceEncoder(model, num_threads)
+    return TorchSentenceEncoder(model, num_threads)
+
+
+def benchmark_backends(texts: Sequence[str], backends: Sequence[str] = ENCODER_BACKENDS,
+                       models: Optional[Dict[str, str]] = None, num_threads: Optional[int] = None,
+                       batch_size: int = 32, latency_samples: int = 20) -> Dict:
+    """Latence (un texte) et débit (par lots) de chaque backend, et accord avec la référence
+
+    `models` associe un backend à son modèle (répertoire local pour ONNX). L'accord est la
+    similarité cosinus moyenne avec les embeddings du premier backend.
+    """
+    texts = list(texts)
+    models = models or {}
+    report = {'texts': len(texts), 'batch_size': batch_size, 'num_threads': num_threads, 'backends': {}}
+    reference = None
+
+    for backend in backends:
+        try:
+            encoder = create_encoder(backend, models.get(backend), num_threads)
+        except Exception as e:
+            report['backends'][backend] = {'error': str(e)}
+            continue
+
+        encoder.encode(texts[:1], batch_size=1)  # Préchauffage
+        latencies = []
+        for text in texts[:latency_samples]:
+            start = time.perf_counter()
+            encoder.encode([text], batch_size=1)
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        embeddings = encoder.encode(texts, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+
+        normalized = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        if reference is None:
+            reference = normalized
+        entry = {
+            'latency_ms_p50': round(float(np.percentile(latencies, 50)) * 1000, 2) if latencies else None,
+            'latency_ms_p95': round(float(np.percentile(latencies, 95)) * 1000, 2) if latencies else None,
+            'texts_per_second': round(len(texts) / seconds, 1) if seconds else None,
+            'cosine_with_reference': (round(float(np.sum(reference * normalized, axis=1).mean()), 4)
+                                      if reference.shape == normalized.shape else None)
+        }
+        report['backends'][backend] = entry
+
+    base = next((v for v in report['backends'].values() if v.get('texts_per_second')), None)
+    for entry in report['backends'].values():
+        if base and entry.get('texts_per_second'):
+            entry['speedup'] = round(entry['texts_per_second'] / base['texts_per_second'], 2)
+    return report
+
+
+if __name__ == "__main__":
+    import random
+    import argparse
+    import load_test
+
+    parser = argparse.ArgumentParser(description="Benchmark des backends de l'encodeur de phrases")
+    parser.add_argument('--backends', default=','.join(ENCODER_BACKENDS))
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--onnx-dir', default=None, help="Répertoire du modèle exporté en ONNX")
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--texts', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(0)
+    sample = [load_test.synthetic_cv(rng, i)['content'] for i in range(args.texts)]
+    model_paths = {'torch': args.model, 'torch-int8': args.model}
+    if args.onnx_dir:
+        model_paths['onnx'] = args.onnx_dir
+    backend_names: List[str] = [b.strip() for b in args.backends.split(',') if b.strip()]
+    print(json.dumps(benchmark_backends(sample, backend_names, model_paths, args.threads, args.batch_size),
+                     indent=2))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TalentScope - Matrices de features creuses
+Bloc TF-IDF creux + petit bloc numérique, en float32 ; normalisation qui préserve la parcimonie.
+La mémoire d'entraînement dépend du nombre de valeurs non nulles, pas de la taille du vocabulaire.
+"""
+
+from typing import Iterable, Sequence
+
+import numpy as np
+
+FEATURE_DTYPE = np.float32
+
+# Au-delà, le bloc centré n'est plus un petit bloc numérique : la matrice est densifiée
+_MAX_CENTERED_COLUMNS = 64
+
+
+def feature_matrix(text_features, numeric_features: Sequence[Sequence[float]]):
+    """Concatène le bloc textuel (creux ou dense) et le bloc numérique dense, en float32
+
+    Le résultat est une matrice CSR si le bloc textuel est creux, un tableau dense sinon.
+    """
+    from scipy import sparse
+
+    numeric = np.asarray(numeric_features, dtype=FEATURE_DTYPE).reshape(len(numeric_features), -1)
+    if sparse.issparse(text_features):
+        return sparse.hstack([text_features.astype(FEATURE_DTYPE), sparse.csr_matrix(numeric)],
+                             format='csr', dtype=FEATURE_DTYPE)
+    return np.hstack([np.asarray(text_features, dtype=FEATURE_DTYPE), numeric])
+
+
+def stack_features(matrices: Iterable):
+    """Empile des matrices de features (creuses ou denses) ligne à ligne"""
+    from scipy import sparse
+
+    matrices = list(matrices)
+    if any(sparse.issparse(matrix) for matrix in matrices):
+        return sparse.vstack(matrices, format='csr', dtype=FEATURE_DTYPE)
+    return np.vstack(matrices).astype(FEATURE_DTYPE, copy=False)
+
+
+def scale_features(features, mean, scale):
+    """Calcule (x - mean) / scale
+
+    Sur une matrice creuse, seules les colonnes finales de moyenne non nulle (bloc numérique)
+    sont centrées et densifiées ; sinon la matrice entière est densifiée (anciens modèles).
+    """
+    from scipy import sparse
+
+    if not sparse.issparse(features):
+        features = np.asarray(features, dtype=FEATURE_DTYPE)
+        if mean is not None:
+            features = features - mean
+        if scale is not None:
+            features = features / scale
+        return features.astype(FEATURE_DTYPE, copy=False)
+
+    centered = np.flatnonzero(mean) if mean is not None else np.empty(0, dtype=int)
+    start = centered[0] if centered.size else features.shape[1]
+    if features.shape[1] - start > _MAX_CENTERED_COLUMNS:
+        return scale_features(features.toarray(), mean, scale)
+
+    features = features.tocsr().astype(FEATURE_DTYPE)
+    if scale is not None:
+        features = features.multiply(np.asarray(1.0 / scale, dtype=FEATURE_DTYPE).reshape(1, -1)).tocsr()
+    if not centered.size:
+        return features
+
+    shift = np.asarray(mean[start:], dtype=FEATURE_DTYPE)
+    if scale is not None:
+        shift = shift / np.asarray(scale[start:], dtype=FEATURE_DTYPE)
+    numeric = features[:, start:].toarray() - shift
+    return sparse.hstack([features[:, :start], sparse.csr_matrix(numeric)], format='csr', dtype=FEATURE_DTYPE)
+
+
+class SparseFeatureScaler:
+    """StandardScaler compatible CSR
+
+    Toutes les colonnes sont réduites par leur écart-type ; seules les `n_numeric` dernières
+    (bloc numérique dense) sont centrées, ce qui préserve la parcimonie du bloc TF-IDF.
+    `mean_` vaut donc zéro sur les colonnes textuelles.
+    """
+
+    def __init__(self, n_numeric: int = 5):
+        self.n_numeric = n_numeric
+
+    def fit(self, features) -> 'SparseFeatureScaler':
+        from scipy import sparse
+        from sklearn.utils.sparsefuncs import mean_variance_axis
+
+        if sparse.issparse(features):
+            means, variances = mean_variance_axis(features.tocsr(), axis=0)
+        else:
+            features = np.asarray(features, dtype=FEATURE_DTYPE)
+            means, variances = features.mean(axis=0), features.var(axis=0)
+
+        scale = np.sqrt(np.asarray(variances, dtype=np.float64))
+        scale[scale == 0] = 1.0
+        mean = np.zeros(features.shape[1], dtype=np.float64)
+        if self.n_numeric:
+            mean[-self.n_numeric:] = means[-self.n_numeric:]
+        self.mean_ = mean.astype(FEATURE_DTYPE)
+        self.scale_ = scale.astype(FEATURE_DTYPE)
+        return self
+
+    def transform(self, features):
+        return scale_features(features, self.mean_, self.scale_)
+
+    def fit_transform(self, features):
+        return self.fit(features).transform(features)
+
@@ -5,41 +5,178 @@ TalentScope - API ML Complète
 API REST pour l'analyse de CVs avec machine learning
 """
 
-import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
 import re
 import json
-from typing import List, Dict, Tuple, Optional
+import hashlib
+from typing import Any, List, Dict, Tuple, Optional, Iterator
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field, replace
 from datetime import datetime
 import pickle
 import os
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+import tempfile
+import time
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from ann_index import IVFIndex, recall_at_k
+from model_artifacts import save_model_artifacts, load_model_artifacts, prune_model_artifacts, model_write_lock
+from hashing_features import HashingFeatureEngine
+from sparse_features import SparseFeatureScaler, feature_matrix, stack_features
+from prometheus_metrics import registry as metrics_registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 import uvicorn
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Téléchargement des ressources NLTK (à faire une seule fois)
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    nltk.download('wordnet', quiet=True)
-    nltk.download('omw-1.4', quiet=True)
-except:
-    logger.warning("Impossible de télécharger les ressources NLTK")
+# Ressources NLTK : lues depuis un répertoire local, jamais téléchargées au démarrage
+NLTK_DATA_DIR = os.environ.get(
+    'TALENTSCOPE_NLTK_DATA',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data')
+)
+NLTK_RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'omw-1.4': 'corpora/omw-1.4'
+}
+
+def configure_nltk_data() -> Dict:
+    """Déclare le répertoire NLTK local et vérifie la présence des corpus (sans réseau)
+    
+    Le téléchargement n'est tenté que si TALENTSCOPE_NLTK_DOWNLOAD=1.
+    """
+    import nltk
+    
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    
+    download = os.environ.get('TALENTSCOPE_NLTK_DOWNLOAD') == '1'
+    missing = []
+    for package, resource in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            if download and nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True):
+                continue
+            missing.append(package)
+    
+    if missing:
+        logger.warning(f"Ressources NLTK absentes de {NLTK_DATA_DIR}: {', '.join(missing)} (mode simplifié)")
+    return {'data_dir': NLTK_DATA_DIR, 'missing': missing}
+
+class ResourceManager:
+    """Chargement paresseux des composants lourds, avec préchauffage en arrière-plan"""
+    
+    def __init__(self):
+        self._loaders = {}
+        self._values = {}
+        self._status = {}
+        self._lock = threading.RLock()
+        self._warm_up_thread = None
+    
+    def register(self, name: str, loader):
+        """Déclare un composant et sa fonction de chargement"""
+        self._loaders[name] = loader
+        self._status[name] = {'state': 'pending', 'load_seconds': None, 'error': None}
+    
+    def get(self, name: str):
+        """Retourne le composant, en le chargeant au premier accès"""
+        if name in self._values:
+            return self._values[name]
+        
+        with self._lock:
+            if name in self._values:
+                return self._values[name]
+            
+            status = self._status[name]
+            status['state'] = 'loading'
+            start = time.perf_counter()
+            try:
+                value = self._loaders[name]()
+            except Exception as e:
+                status.update(state='failed', error=str(e), load_seconds=round(time.perf_counter() - start, 4))
+                raise
+            
+            status.update(state='ready', error=None, load_seconds=round(time.perf_counter() - start, 4))
+            self._values[name] = value
+            logger.info(f"Composant {name} chargé en {status['load_seconds']:.3f}s")
+            return value
+    
+    def is_loaded(self, name: str) -> bool:
+        """Indique si le composant est déjà chargé"""
+        return name in self._values
+    
+    def is_loading(self, name: str) -> bool:
+        """Vrai tant que le composant est en cours de chargement (ou attendu par le préchauffage)"""
+        if name in self._values:
+            return False
+        warm_up = self._warm_up_thread
+        return self._status[name]['state'] == 'loading' or (warm_up is not None and warm_up.is_alive())
+    
+    def is_ready(self) -> bool:
+        """Vrai lorsque tous les composants déclarés sont chargés"""
+        return all(name in self._values for name in self._loaders)
+    
+    def warm_up(self, names: Optional[List[str]] = None) -> threading.Thread:
+        """Charge les composants dans un thread d'arrière-plan"""
+        def run():
+            for name in names or list(self._loaders):
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logger.error(f"Échec du chargement de {name}: {e}")
+        
+        with self._lock:
+            if self._warm_up_thread is None or not self._warm_up_thread.is_alive():
+                self._warm_up_thread = threading.Thread(target=run, name="talentscope-warmup", daemon=True)
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+    
+    def status(self) -> Dict:
+        """État et durée de chargement de chaque composant"""
+        return {name: dict(status) for name, status in self._status.items()}
+
+class LazyResource:
+    """Mandataire qui délègue les accès d'attributs à un composant chargé à la demande"""
+    
+    def __init__(self, manager: ResourceManager, name: str):
+        object.__setattr__(self, '_manager', manager)
+        object.__setattr__(self, '_name', name)
+    
+    def __getattr__(self, attribute):
+        return getattr(self._manager.get(self._name), attribute)
+    
+    def __setattr__(self, attribute, value):
+        setattr(self._manager.get(self._name), attribute, value)
+
+resources = ResourceManager()
+
+# Métriques exposées sur /metrics
+REQUEST_SECONDS = metrics_registry.histogram(
+    'talentscope_http_request_duration_seconds', 'Durée des requêtes HTTP par route',
+    ('method', 'route', 'status'))
+INFLIGHT_REQUESTS = metrics_registry.gauge(
+    'talentscope_http_requests_in_flight', 'Requêtes HTTP en cours de traitement')
+STAGE_SECONDS = metrics_registry.histogram(
+    'talentscope_stage_duration_seconds',
+    'Durée des étapes du pipeline (preprocess, transform, scale, pca, score, sort)', ('stage',))
+FIT_SECONDS = metrics_registry.histogram(
+    'talentscope_fit_duration_seconds', "Durée d'entraînement du modèle",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0))
+MODEL_SIZE_BYTES = metrics_registry.gauge(
+    'talentscope_model_size_bytes', 'Taille du modèle sauvegardé sur disque')
+INGEST_QUEUE_DEPTH = metrics_registry.gauge(
+    'talentscope_ingest_queue_depth', "Enregistrements en attente d'insertion (import en masse)")
+INGEST_QUEUE_DEPTH.set(0)
 
 @dataclass
 class CVData:
@@ -83,108 +220,406 @@ class AnalysisResult:
     rank: int
     analysis_date: str
 
+class _NormalizationTable(dict):
+    """Table de traduction construite à la demande : ponctuation et chiffres → espace"""
+    
+    def __missing__(self, codepoint: int):
+        char = chr(codepoint)
+        if char.isdecimal() or not (char.isalnum() or char == '_' or char.isspace()):
+            value = ' '
+        else:
+            value = char
+        self[codepoint] = value
+        return value
+
 class TextPreprocessor:
     """Classe pour le prétraitement de texte"""
     
-    def __init__(self):
+    # Partagée par toutes les instances : un seul calcul par caractère rencontré
+    normalization_table = _NormalizationTable()
+    
+    def __init__(self, lemma_cache_size: int = 50000):
         try:
+            from nltk.corpus import stopwords
+            from nltk.stem import WordNetLemmatizer
+            
             self.stop_words = set(stopwords.words('french') + stopwords.words('english'))
             self.lemmatizer = WordNetLemmatizer()
-        except:
+            # Vérifie une seule fois que WordNet est disponible (chargement paresseux de NLTK)
+            self.lemmatizer.lemmatize('tests')
+        except Exception:
             self.stop_words = set()
             self.lemmatizer = None
             logger.warning("NLTK non disponible, utilisation du mode simplifié")
+        
+        # Table de mémoïsation bornée des lemmes
+        self._lemmatize = lru_cache(maxsize=lemma_cache_size)(self.lemmatizer.lemmatize) if self.lemmatizer else None
     
     def clean_text(self, text: str) -> str:
         """Nettoie et normalise le texte"""
         if not text:
             return ""
         
-        # Conversion en minuscules
-        text = text.lower()
-        
-        # Suppression des caractères spéciaux et des chiffres
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\d+', ' ', text)
-        
-        # Suppression des espaces multiples
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        # Minuscules, ponctuation et chiffres remplacés en une seule passe
+        return ' '.join(text.lower().translate(self.normalization_table).split())
     
     def tokenize_and_lemmatize(self, text: str) -> List[str]:
         """Tokenise et lemmatise le texte"""
-        try:
-            if self.lemmatizer:
-                tokens = word_tokenize(text)
-                tokens = [self.lemmatizer.lemmatize(token) 
-                         for token in tokens 
-                         if token not in self.stop_words and len(token) > 2]
-                return tokens
-            else:
-                # Fallback simple
-                words = text.split()
-                return [word for word in words if len(word) > 2]
-        except:
-            # Fallback simple si NLTK ne fonctionne pas
-            words = text.split()
+        # Le texte nettoyé ne contient que des mots séparés par des espaces
+        words = text.split()
+        if self._lemmatize is None:
             return [word for word in words if len(word) > 2]
+        
+        stop_words = self.stop_words
+        lemmatize = self._lemmatize
+        return [lemmatize(word) for word in words if len(word) > 2 and word not in stop_words]
     
     def preprocess(self, text: str) -> str:
         """Préprocess complet du texte"""
         cleaned = self.clean_text(text)
         tokens = self.tokenize_and_lemmatize(cleaned)
         return ' '.join(tokens)
+    
+    def preprocess_many(self, texts: List[str], max_workers: Optional[int] = None,
+                        chunk_size: int = 64, min_parallel_batch: int = 32) -> List[str]:
+        """Préprocess un lot de textes, réparti par blocs sur plusieurs processus
+        
+        Un petit lot reste dans le processus courant ; les autres passent par un pool conservé
+        d'un import à l'autre.
+        """
+        texts = list(texts)
+        max_workers = max_workers or os.cpu_count() or 1
+        if len(texts) < min_parallel_batch or max_workers == 1:
+            return [self.preprocess(text) for text in texts]
+        
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        try:
+            executor = _get_preprocess_pool(max_workers)
+            return [processed for chunk in executor.map(_preprocess_chunk_in_worker, chunks)
+                    for processed in chunk]
+        except Exception as e:
+            logger.warning(f"Préprocessing parallèle indisponible, passage en séquentiel: {e}")
+            return [self.preprocess(text) for text in texts]
+    
+    def cache_info(self) -> Dict:
+        """Statistiques de la table de mémoïsation des lemmes"""
+        if self._lemmatize is None:
+            return {'enabled': False}
+        info = self._lemmatize.cache_info()
+        return {'enabled': True, 'hits': info.hits, 'misses': info.misses,
+                'size': info.currsize, 'max_size': info.maxsize}
+
+# Préprocesseur propre à chaque processus de travail (préprocessing en masse)
+_worker_preprocessor = None
+
+_preprocess_pool: Optional[ProcessPoolExecutor] = None
+_preprocess_pool_workers = 0
+_preprocess_pool_lock = threading.Lock()
+
+def _get_preprocess_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool de préprocessing forkserver (ou spawn), créé au premier import en masse
+    
+    Le serveur a déjà des threads (threadpool FastAPI, préchauffage) : un fork pourrait hériter
+    d'un verrou pris.
+    """
+    global _preprocess_pool, _preprocess_pool_workers
+    with _preprocess_pool_lock:
+        if _preprocess_pool is None or _preprocess_pool_workers != workers:
+            if _preprocess_pool is not None:
+                _preprocess_pool.shutdown(wait=False)
+            available = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in available else 'spawn')
+            _preprocess_pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _preprocess_pool_workers = workers
+        return _preprocess_pool
+
+def shutdown_preprocess_pool():
+    """Arrête le pool de préprocessing (il est recréé au prochain import en masse)"""
+    global _preprocess_pool, _preprocess_pool_workers
+    with _preprocess_pool_lock:
+        if _preprocess_pool is not None:
+            _preprocess_pool.shutdown()
+        _preprocess_pool, _preprocess_pool_workers = None, 0
+
+def _preprocess_chunk_in_worker(texts: List[str]) -> List[str]:
+    """Préprocess un bloc de textes dans un processus de travail"""
+    global _worker_preprocessor
+    if _worker_preprocessor is None:
+        _worker_preprocessor = TextPreprocessor()
+    return [_worker_preprocessor.preprocess(text) for text in texts]
+
+class StaleRankingCursor(ValueError):
+    """Curseur de pagination émis pour un autre état du modèle ou du corpus que l'instantané classé"""
+
+class RankingCache:
+    """Cache LRU des classements, indexé par (offre, sélection, version modèle, version corpus)"""
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(job_id: str, cv_ids: Optional[List[str]], model_version: int, corpus_version: int,
+                 mode: Tuple = ('exact',)) -> Tuple:
+        """Construit la clé de cache (la sélection de CVs est un ensemble, l'ordre n'importe pas)"""
+        selection = tuple(sorted(set(cv_ids))) if cv_ids else None
+        return (job_id, selection, model_version, corpus_version, mode)
+    
+    def get(self, key: Tuple) -> Optional[List[Dict]]:
+        """Retourne le classement en cache ou None"""
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return results
+    
+    def put(self, key: Tuple, results: List[Dict]):
+        """Stocke un classement en évinçant l'entrée la moins récemment utilisée"""
+        with self._lock:
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self):
+        """Vide le cache (corpus modifié ou modèle réentraîné)"""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+            self.invalidations += 1
+    
+    def stats(self) -> Dict:
+        """Statistiques d'utilisation du cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+class JobFeatureMatrix:
+    """Matrice des features des offres (vecteurs réduits normalisés et critères numériques)
+    
+    Construite d'un bloc pour un instantané : toute écriture sur les offres est suivie d'un
+    réentraînement, qui publie un nouvel instantané sans matrice.
+    """
+    
+    def __init__(self, jobs: Tuple[JobOffer, ...], vectors: np.ndarray, education_levels: List[float]):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.job_ids = [job.id for job in jobs]
+        self.vectors = np.divide(vectors, norms, out=np.array(vectors), where=norms > 0)
+        self.min_experience = np.array([float(job.min_experience) for job in jobs])
+        self.education_levels = np.array(education_levels, dtype=float)
+        self.required_skills = [{skill.lower() for skill in job.required_skills} for job in jobs]
+        self.preferred_skills = [{skill.lower() for skill in job.preferred_skills} for job in jobs]
+        self.languages = [{lang.lower() for lang in job.languages} for job in jobs]
+    
+    def __len__(self):
+        return len(self.job_ids)
+
+# Moteurs de features disponibles (choisis par déploiement via TALENTSCOPE_FEATURE_ENGINE)
+FEATURE_ENGINES = ('tfidf', 'hashing')
+
+# Features numériques ajoutées au bloc textuel, dimension des vecteurs réduits
+NUMERIC_FEATURES = 5
+REDUCED_DIMENSIONS = 100
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """État publié du modèle et du corpus (estimateurs, CVs, offres, index ANN)
+    
+    Un instantané n'est jamais modifié après publication : les écritures en construisent
+    un nouveau et le substituent d'un bloc. Seul `derived` (matrice des offres) est
+    complété à la demande par les lectures.
+    """
+    version: int = 0
+    model_version: int = 0
+    corpus_version: int = 0
+    is_fitted: bool = False
+    tfidf_vectorizer: Any = None
+    scaler: Any = None
+    pca: Any = None
+    cvs: Tuple[CVData, ...] = ()
+    jobs: Tuple[JobOffer, ...] = ()
+    cv_positions: Dict[str, int] = field(default_factory=dict)
+    job_positions: Dict[str, int] = field(default_factory=dict)
+    ann_index: Optional[IVFIndex] = None
+    document_frequencies: Any = None
+    derived: Dict[str, Any] = field(default_factory=dict)
 
 class CVAnalyzer:
-    """Analyseur principal de CV utilisant le machine learning"""
+    """Analyseur principal de CV utilisant le machine learning
     
-    def __init__(self):
+    Les lectures (classements, scores) prennent l'instantané courant une fois et s'y tiennent ;
+    les écritures sont sérialisées entre elles et publient un nouvel instantané sans bloquer les lectures.
+    """
+    
+    def __init__(self, feature_engine: Optional[str] = None):
         self.preprocessor = TextPreprocessor()
-        self.tfidf_vectorizer = TfidfVectorizer(
-            max_features=5000,
-            ngram_range=(1, 2),
-            min_df=2,
-            max_df=0.95
+        
+        # Moteur de features : TF-IDF entraîné ('tfidf') ou hachage sans vocabulaire appris ('hashing')
+        self.feature_engine = feature_engine or os.environ.get('TALENTSCOPE_FEATURE_ENGINE', 'tfidf')
+        if self.feature_engine not in FEATURE_ENGINES:
+            raise ValueError(f"Moteur de features inconnu: {self.feature_engine} (attendu: {', '.join(FEATURE_ENGINES)})")
+        self.hashing_engine = HashingFeatureEngine() if self.feature_engine == 'hashing' else None
+        
+        # Instantané courant, remplacé atomiquement par les écritures
+        self._write_lock = threading.RLock()
+        # Un seul entraînement à la fois ; il ne tient le verrou d'écriture que pour la publication
+        self._fit_lock = threading.RLock()
+        self._snapshot = ModelSnapshot(
+            **self._new_estimators(),
+            document_frequencies=self.hashing_engine.empty_frequencies() if self.hashing_engine else None
         )
-        self.scaler = StandardScaler()
-        self.pca = PCA(n_components=100)
-        self.is_fitted = False
+        self.ranking_cache = RankingCache()
+        
+        # Derniers numéros d'identifiants attribués par préfixe (jamais réutilisés après suppression)
+        self._id_lock = threading.Lock()
+        self._last_ids = {}
+        
+        # Index ANN sur les vecteurs réduits des CVs (présélection avant le score exact)
+        self.ann_min_corpus = 5000
+        self.ann_shortlist_size = 200
+        self.ann_n_probe = 8
         
         # Mappings pour les niveaux d'éducation
         self.education_mapping = {
-            'bac': 1, 'bachelor': 2, 'licence': 2, 'master': 3, 'mba': 3, 
+            'bac': 1, 'bachelor': 2, 'licence': 2, 'master': 3, 'mba': 3,
             'doctorat': 4, 'phd': 4, 'ingénieur': 3, 'bts': 1.5, 'dut': 1.5
         }
         
         # Stockage des données
-        self.cvs_data = []
-        self.jobs_data = []
         self.model_file = "talent_scope_model.pkl"
+        self.artifacts_dir = "talent_scope_model_artifacts"
         
         # Charger le modèle s'il existe
         self.load_model()
     
-    def save_model(self):
-        """Sauvegarde le modèle entraîné"""
-        try:
-            model_data = {
-                'tfidf_vectorizer': self.tfidf_vectorizer,
-                'scaler': self.scaler,
-                'pca': self.pca,
-                'is_fitted': self.is_fitted,
-                'cvs_data': self.cvs_data,
-                'jobs_data': self.jobs_data,
-                'timestamp': datetime.now().isoformat()
-            }
+    # Accès en lecture à l'instantané courant
+    snapshot = property(lambda self: self._snapshot)
+    snapshot_version = property(lambda self: self._snapshot.version)
+    model_version = property(lambda self: self._snapshot.model_version)
+    corpus_version = property(lambda self: self._snapshot.corpus_version)
+    is_fitted = property(lambda self: self._snapshot.is_fitted)
+    tfidf_vectorizer = property(lambda self: self._snapshot.tfidf_vectorizer)
+    scaler = property(lambda self: self._snapshot.scaler)
+    pca = property(lambda self: self._snapshot.pca)
+    cvs_data = property(lambda self: self._snapshot.cvs)
+    jobs_data = property(lambda self: self._snapshot.jobs)
+    ann_index = property(lambda self: self._snapshot.ann_index)
+    
+    def _new_estimators(self) -> Dict:
+        """Crée des estimateurs vierges (avant un entraînement)"""
+        if self.hashing_engine is not None:
+            return self.hashing_engine.estimators(self.hashing_engine.empty_frequencies())
+        
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.decomposition import TruncatedSVD
+        
+        return {
+            'tfidf_vectorizer': TfidfVectorizer(
+                max_features=5000,
+                ngram_range=(1, 2),
+                min_df=2,
+                max_df=0.95,
+                dtype=np.float32
+            ),
+            # Pipeline creux : normalisation sans centrage du bloc TF-IDF, SVD tronquée sur la CSR
+            'scaler': SparseFeatureScaler(n_numeric=NUMERIC_FEATURES),
+            'pca': TruncatedSVD(n_components=REDUCED_DIMENSIONS, random_state=0)
+        }
+    
+    def _publish(self, model_changed: bool = False, corpus_changed: bool = False, **changes) -> ModelSnapshot:
+        """Construit un instantané à partir du courant et le substitue (sous le verrou d'écriture)
+        
+        Les caches dérivés ne sont pas repris, sauf s'ils sont fournis dans `derived`.
+        """
+        with self._write_lock:
+            current = self._snapshot
+            if 'cvs' in changes:
+                changes['cvs'] = tuple(changes['cvs'])
+                changes['cv_positions'] = {cv.id: i for i, cv in enumerate(changes['cvs'])}
+            if 'jobs' in changes:
+                changes['jobs'] = tuple(changes['jobs'])
+                changes['job_positions'] = {job.id: i for i, job in enumerate(changes['jobs'])}
+            changes.setdefault('derived', {})
             
-            with open(self.model_file, 'wb') as f:
-                pickle.dump(model_data, f)
+            snapshot = replace(
+                current,
+                version=current.version + 1,
+                model_version=current.model_version + int(model_changed),
+                corpus_version=current.corpus_version + int(corpus_changed),
+                **changes
+            )
+            self._snapshot = snapshot
+            if model_changed or corpus_changed:
+                self.ranking_cache.invalidate()
+            return snapshot
+    
+    def save_model(self, snapshot: Optional[ModelSnapshot] = None):
+        """Sauvegarde le modèle entraîné
+        
+        Les parties numériques sont écrites en .npy (relues en mémoire projetée) dans une
+        nouvelle version du répertoire d'artefacts ; le pickle, qui ne contient plus que les
+        données, l'état et le chemin de cette version, est remplacé atomiquement ensuite.
+        """
+        snapshot = snapshot or self._snapshot
+        # Le moteur par hachage n'a aucun état appris à écrire
+        with_artifacts = snapshot.is_fitted and self.hashing_engine is None
+        try:
+            with model_write_lock(self.model_file):
+                self._write_model(snapshot, with_artifacts)
             
             logger.info("Modèle sauvegardé avec succès")
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde du modèle: {e}")
     
+    def _write_model(self, snapshot: ModelSnapshot, with_artifacts: bool):
+        """Artefacts puis pickle (verrou d'écriture du modèle tenu), anciennes versions supprimées"""
+        artifacts_path = None
+        if with_artifacts:
+            artifacts_path = save_model_artifacts(
+                self.artifacts_dir, snapshot.tfidf_vectorizer, snapshot.scaler, snapshot.pca)
+        
+        model_data = {
+            'artifacts_dir': artifacts_path,
+            'feature_engine': self.feature_engine,
+            'last_ids': dict(self._last_ids),
+            'is_fitted': snapshot.is_fitted,
+            'cvs_data': list(snapshot.cvs),
+            'jobs_data': list(snapshot.jobs),
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(self.model_file)}.", suffix='.tmp',
+                                         dir=os.path.dirname(os.path.abspath(self.model_file)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(model_data, f)
+            os.replace(temp_path, self.model_file)
+        except BaseException:
+            # La version d'artefacts orpheline sera supprimée par la prochaine sauvegarde
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        prune_model_artifacts(self.artifacts_dir, keep=artifacts_path)
+        
+        model_size = os.path.getsize(self.model_file)
+        if artifacts_path:
+            model_size += sum(entry.stat().st_size for entry in os.scandir(artifacts_path))
+        MODEL_SIZE_BYTES.set(model_size)
+    
     def load_model(self):
         """Charge le modèle sauvegardé"""
         try:
@@ -192,176 +627,534 @@ class CVAnalyzer:
                 with open(self.model_file, 'rb') as f:
                     model_data = pickle.load(f)
                 
-                self.tfidf_vectorizer = model_data.get('tfidf_vectorizer', self.tfidf_vectorizer)
-                self.scaler = model_data.get('scaler', self.scaler)
-                self.pca = model_data.get('pca', self.pca)
-                self.is_fitted = model_data.get('is_fitted', False)
-                self.cvs_data = model_data.get('cvs_data', [])
-                self.jobs_data = model_data.get('jobs_data', [])
+                cvs = model_data.get('cvs_data', [])
+                jobs = model_data.get('jobs_data', [])
+                self._last_ids.update(model_data.get('last_ids', {}))
+                state = self._new_estimators()
+                artifacts = None
+                if model_data.get('artifacts_dir') and self.hashing_engine is None:
+                    artifacts = load_model_artifacts(model_data['artifacts_dir'])
+                
+                if self.hashing_engine is not None:
+                    # Aucun état sauvegardé : compteurs IDF et échelle numérique recalculés à partir du corpus
+                    frequencies = self.hashing_engine.update_frequencies(
+                        self.hashing_engine.empty_frequencies(), [item.processed_text for item in cvs + jobs])
+                    state = self.hashing_engine.estimators(frequencies, self._cv_numeric_features(cvs))
+                    state['document_frequencies'] = frequencies
+                    state['is_fitted'] = bool(cvs or jobs)
+                elif artifacts is not None:
+                    # Estimateurs en lecture seule adossés aux tableaux projetés en mémoire
+                    state['tfidf_vectorizer'], state['scaler'], mapped_pca = artifacts
+                    if mapped_pca is not None:
+                        state['pca'] = mapped_pca
+                    state['is_fitted'] = model_data.get('is_fitted', False)
+                else:
+                    # Ancien format : estimateurs scikit-learn picklés
+                    for name in ('tfidf_vectorizer', 'scaler', 'pca'):
+                        state[name] = model_data.get(name, state[name])
+                    state['is_fitted'] = model_data.get('is_fitted', False) and 'tfidf_vectorizer' in model_data
+                
+                with self._write_lock:
+                    snapshot = self._publish(
+                        model_changed=True, corpus_changed=True, cvs=cvs, jobs=jobs, **state
+                    )
+                    if snapshot.is_fitted:
+                        self.rebuild_ann_index()
                 
                 logger.info("Modèle chargé avec succès")
         except Exception as e:
             logger.warning(f"Impossible de charger le modèle: {e}")
     
+    def allocate_id(self, prefix: str, reserved: Optional[set] = None) -> str:
+        """Nouvel identifiant `{prefix}_NNN` ('cv' ou 'job'), absent du corpus et jamais attribué auparavant
+        
+        Le compteur part du plus grand numéro présent et ne redescend pas après une suppression :
+        un identifiant supprimé n'est pas réattribué à un autre document. `reserved` contient les
+        identifiants d'un lot pas encore inséré, eux aussi évités.
+        """
+        reserved = reserved or set()
+        with self._id_lock:
+            snapshot = self._snapshot
+            existing = snapshot.cv_positions if prefix == 'cv' else snapshot.job_positions
+            last = self._last_ids.get(prefix)
+            if last is None:
+                pattern = re.compile(rf"{re.escape(prefix)}_(\d+)$")
+                numbers = [int(match.group(1)) for match in map(pattern.match, existing) if match]
+                last = max(numbers, default=0)
+            last += 1
+            while f"{prefix}_{last:03d}" in existing or f"{prefix}_{last:03d}" in reserved:
+                last += 1
+            self._last_ids[prefix] = last
+            return f"{prefix}_{last:03d}"
+    
+    def _document_frequencies(self, snapshot: ModelSnapshot, added: List[str] = (), removed: List[str] = ()):
+        """Compteurs IDF de l'instantané suivant (tenus à jour par le seul moteur par hachage)"""
+        if self.hashing_engine is None:
+            return snapshot.document_frequencies
+        return self.hashing_engine.update_frequencies(snapshot.document_frequencies, added, removed)
+    
+    @staticmethod
+    def _cv_source_text(cv_data: CVData) -> str:
+        """Texte brut d'un CV soumis au préprocessing"""
+        return f"{cv_data.raw_text} {' '.join(cv_data.skills)} {cv_data.education_level} {' '.join(cv_data.languages)}"
+    
     def add_cv(self, cv_data: CVData):
         """Ajoute un CV à la base de données"""
         cv_data.upload_date = datetime.now().isoformat()
-        cv_data.processed_text = self.preprocessor.preprocess(
-            f"{cv_data.raw_text} {' '.join(cv_data.skills)} {cv_data.education_level} {' '.join(cv_data.languages)}"
-        )
-        
-        # Vérifier si le CV existe déjà
-        existing_cv = next((cv for cv in self.cvs_data if cv.id == cv_data.id), None)
-        if existing_cv:
-            # Mettre à jour le CV existant
-            index = self.cvs_data.index(existing_cv)
-            self.cvs_data[index] = cv_data
-        else:
-            # Ajouter un nouveau CV
-            self.cvs_data.append(cv_data)
+        with STAGE_SECONDS.time(stage='preprocess'):
+            cv_data.processed_text = self.preprocessor.preprocess(self._cv_source_text(cv_data))
         
+        with self._write_lock:
+            current = self._snapshot
+            cvs = list(current.cvs)
+            
+            # Mettre à jour le CV existant ou ajouter un nouveau CV
+            index = current.cv_positions.get(cv_data.id)
+            replaced = []
+            if index is not None:
+                replaced.append(cvs[index].processed_text)
+                cvs[index] = cv_data
+            else:
+                cvs.append(cv_data)
+            
+            self._publish(corpus_changed=True, cvs=cvs, ann_index=self._index_cvs(current, [cv_data]),
+                          document_frequencies=self._document_frequencies(current, [cv_data.processed_text], replaced))
         logger.info(f"CV {cv_data.id} ajouté/mis à jour")
     
+    def add_cvs_bulk(self, cvs: List[CVData], max_workers: Optional[int] = None,
+                     min_parallel_batch: int = 32) -> List[Dict]:
+        """Ajoute un lot de CVs en une seule opération (préprocessing parallèle)
+        
+        Retourne la liste des erreurs par enregistrement ; les CVs valides sont
+        insérés ensemble, avec une seule incrémentation de la version du corpus.
+        """
+        if not cvs:
+            return []
+        
+        texts = [self._cv_source_text(cv) for cv in cvs]
+        errors = []
+        try:
+            with STAGE_SECONDS.time(stage='preprocess'):
+                processed = self.preprocessor.preprocess_many(texts, max_workers=max_workers,
+                                                              min_parallel_batch=min_parallel_batch)
+        except Exception as e:
+            logger.warning(f"Préprocessing en lot impossible, traitement unitaire: {e}")
+            processed = [None] * len(cvs)
+        
+        upload_date = datetime.now().isoformat()
+        ready = []
+        for index, (cv_data, text) in enumerate(zip(cvs, texts)):
+            try:
+                if processed[index] is None:
+                    processed[index] = self.preprocessor.preprocess(text)
+                cv_data.processed_text = processed[index]
+                cv_data.upload_date = upload_date
+                ready.append(cv_data)
+            except Exception as e:
+                errors.append({'index': index, 'cv_id': cv_data.id, 'filename': cv_data.filename, 'error': str(e)})
+        
+        if ready:
+            with self._write_lock:
+                # Insertion groupée : les CVs existants sont remplacés, les autres ajoutés
+                current = self._snapshot
+                corpus = list(current.cvs)
+                positions = dict(current.cv_positions)
+                replaced = []
+                for cv_data in ready:
+                    if cv_data.id in positions:
+                        replaced.append(corpus[positions[cv_data.id]].processed_text)
+                        corpus[positions[cv_data.id]] = cv_data
+                    else:
+                        positions[cv_data.id] = len(corpus)
+                        corpus.append(cv_data)
+                
+                frequencies = self._document_frequencies(current, [cv.processed_text for cv in ready], replaced)
+                self._publish(corpus_changed=True, cvs=corpus, ann_index=self._index_cvs(current, ready),
+                              document_frequencies=frequencies)
+        logger.info(f"{len(ready)} CVs ajoutés/mis à jour en masse, {len(errors)} erreurs")
+        return errors
+    
+    def remove_cv(self, cv_id: str) -> bool:
+        """Supprime un CV de la base de données"""
+        with self._write_lock:
+            current = self._snapshot
+            index = current.cv_positions.get(cv_id)
+            if index is None:
+                return False
+            
+            ann_index = current.ann_index
+            if ann_index is not None:
+                ann_index = ann_index.copy()
+                ann_index.remove([cv_id])
+            self._publish(corpus_changed=True, cvs=current.cvs[:index] + current.cvs[index + 1:], ann_index=ann_index,
+                          document_frequencies=self._document_frequencies(current, removed=[current.cvs[index].processed_text]))
+        logger.info(f"CV {cv_id} supprimé")
+        return True
+    
     def add_job(self, job_data: JobOffer):
         """Ajoute une offre d'emploi à la base de données"""
         job_data.created_date = datetime.now().isoformat()
-        job_data.processed_text = self.preprocessor.preprocess(
-            f"{job_data.title} {job_data.description} {' '.join(job_data.required_skills)} {' '.join(job_data.preferred_skills)} {job_data.required_education}"
-        )
-        
-        # Vérifier si l'offre existe déjà
-        existing_job = next((job for job in self.jobs_data if job.id == job_data.id), None)
-        if existing_job:
-            # Mettre à jour l'offre existante
-            index = self.jobs_data.index(existing_job)
-            self.jobs_data[index] = job_data
-        else:
-            # Ajouter une nouvelle offre
-            self.jobs_data.append(job_data)
+        with STAGE_SECONDS.time(stage='preprocess'):
+            job_data.processed_text = self.preprocessor.preprocess(
+                f"{job_data.title} {job_data.description} {' '.join(job_data.required_skills)} {' '.join(job_data.preferred_skills)} {job_data.required_education}"
+            )
         
+        with self._write_lock:
+            current = self._snapshot
+            jobs = list(current.jobs)
+            
+            # Mettre à jour l'offre existante ou ajouter une nouvelle offre
+            index = current.job_positions.get(job_data.id)
+            replaced = []
+            if index is not None:
+                replaced.append(jobs[index].processed_text)
+                jobs[index] = job_data
+            else:
+                jobs.append(job_data)
+            
+            self._publish(corpus_changed=True, jobs=jobs,
+                          document_frequencies=self._document_frequencies(current, [job_data.processed_text], replaced))
         logger.info(f"Offre {job_data.id} ajoutée/mise à jour")
     
+    def remove_job(self, job_id: str) -> bool:
+        """Supprime une offre d'emploi de la base de données"""
+        with self._write_lock:
+            current = self._snapshot
+            index = current.job_positions.get(job_id)
+            if index is None:
+                return False
+            
+            self._publish(corpus_changed=True, jobs=current.jobs[:index] + current.jobs[index + 1:],
+                          document_frequencies=self._document_frequencies(current, removed=[current.jobs[index].processed_text]))
+        logger.info(f"Offre {job_id} supprimée")
+        return True
+    
     def fit(self):
-        """Entraîne le modèle sur les données disponibles"""
-        if not self.cvs_data and not self.jobs_data:
-            logger.warning("Aucune donnée disponible pour l'entraînement")
-            return
-        
-        logger.info(f"Entraînement du modèle sur {len(self.cvs_data)} CVs et {len(self.jobs_data)} offres")
-        
-        # Préprocessing des textes
-        all_texts = []
-        for cv in self.cvs_data:
-            all_texts.append(cv.processed_text)
-        
-        for job in self.jobs_data:
-            all_texts.append(job.processed_text)
-        
-        if all_texts:
-            # Entraînement du vectoriseur TF-IDF
-            self.tfidf_vectorizer.fit(all_texts)
+        """Entraîne le modèle sur les données disponibles
+        
+        Les nouveaux estimateurs sont entraînés hors du verrou d'écriture, sur l'instantané
+        courant : lectures et ajouts continuent pendant l'entraînement. Seule la publication
+        prend le verrou ; les CVs ajoutés ou supprimés entre-temps sont reportés dans l'index ANN.
+        """
+        with self._fit_lock:
+            current = self._snapshot
+            if not current.cvs and not current.jobs:
+                logger.warning("Aucune donnée disponible pour l'entraînement")
+                return
             
-            # Extraction des features pour les CVs
-            if self.cvs_data:
-                cv_features = []
-                for cv in self.cvs_data:
-                    features = self.extract_features_from_cv(cv)
-                    cv_features.append(features)
-                
-                cv_features = np.array(cv_features)
+            logger.info(f"Entraînement du modèle sur {len(current.cvs)} CVs et {len(current.jobs)} offres")
+            fit_start = time.perf_counter()
+            
+            # Préprocessing des textes
+            all_texts = []
+            for cv in current.cvs:
+                all_texts.append(cv.processed_text)
+            
+            for job in current.jobs:
+                all_texts.append(job.processed_text)
+            
+            if self.hashing_engine is not None:
+                # Pas de vocabulaire à apprendre : l'IDF est figé à partir des compteurs courants,
+                # l'échelle des features numériques à partir des CVs
+                estimators = self.hashing_engine.estimators(current.document_frequencies,
+                                                            self._cv_numeric_features(current.cvs))
+            else:
+                # Entraînement du vectoriseur TF-IDF (sur des estimateurs neufs)
+                estimators = self._new_estimators()
+                estimators['tfidf_vectorizer'].fit(all_texts)
+            candidate = replace(current, is_fitted=True, ann_index=None, derived={}, **estimators)
+            
+            # Extraction des features pour les CVs (avec le moteur par hachage, seulement pour l'index ANN)
+            if current.cvs and (self.hashing_engine is None or len(current.cvs) >= self.ann_min_corpus):
+                # Matrice CSR float32 : la mémoire suit le nombre de valeurs non nulles
+                cv_features = self.extract_features_from_cvs(current.cvs, candidate)
                 
                 # Normalisation et réduction de dimensionnalité
-                self.scaler.fit(cv_features)
-                scaled_features = self.scaler.transform(cv_features)
+                if self.hashing_engine is None:
+                    scaled_features = estimators['scaler'].fit_transform(cv_features)
+                    
+                    # Corpus trop petit pour REDUCED_DIMENSIONS composantes : pas de réduction,
+                    # les scores sont calculés sur les features normalisées complètes
+                    if min(scaled_features.shape) > REDUCED_DIMENSIONS:
+                        estimators['pca'].fit(scaled_features)
                 
-                if scaled_features.shape[1] > 100:
-                    self.pca.fit(scaled_features)
+                candidate = replace(candidate, ann_index=self._build_ann_index(
+                    current.cvs, self._reduce(cv_features, candidate)))
             
-            self.is_fitted = True
-            logger.info("Modèle entraîné avec succès")
+            with self._write_lock:
+                ann_index = self._catch_up_ann_index(candidate, self._snapshot)
+                snapshot = self._publish(model_changed=True, is_fitted=True, ann_index=ann_index, **estimators)
+            FIT_SECONDS.observe(time.perf_counter() - fit_start)
+            logger.info(f"Modèle entraîné avec succès (instantané {snapshot.version})")
             
             # Sauvegarder le modèle
-            self.save_model()
+            self.save_model(snapshot)
+    
+    def _catch_up_ann_index(self, candidate: ModelSnapshot, latest: ModelSnapshot) -> Optional[IVFIndex]:
+        """Index ANN entraîné sur `candidate`, mis à jour des CVs modifiés depuis (verrou d'écriture tenu)"""
+        ann_index = candidate.ann_index
+        if ann_index is None or latest.corpus_version == candidate.corpus_version:
+            return ann_index
+        
+        trained = {cv.id: cv for cv in candidate.cvs}
+        changed = [cv for cv in latest.cvs if trained.get(cv.id) is not cv]
+        ann_index.remove([cv_id for cv_id in trained if cv_id not in latest.cv_positions])
+        if changed:
+            ann_index.add([cv.id for cv in changed],
+                          self._reduce(self.extract_features_from_cvs(changed, candidate), candidate))
+        return ann_index
     
-    def extract_features_from_cv(self, cv: CVData) -> np.ndarray:
-        """Extrait les features d'un CV"""
-        # Features textuelles (TF-IDF)
-        text_features = self.tfidf_vectorizer.transform([cv.processed_text]).toarray()[0]
+    def extract_features_from_cvs(self, cvs: List[CVData], snapshot: Optional[ModelSnapshot] = None):
+        """Extrait les features d'une liste de CVs (matrice CSR float32, une ligne par CV)"""
+        snapshot = snapshot or self._snapshot
+        # Features textuelles (TF-IDF, en une seule transformation)
+        text_features = snapshot.tfidf_vectorizer.transform([cv.processed_text for cv in cvs])
         
         # Features numériques
-        numerical_features = [
-            cv.experience_years,
-            self.education_mapping.get(cv.education_level.lower(), 0),
-            len(cv.skills),
-            len(cv.languages),
-            len(cv.certifications)
-        ]
+        numerical_features = self._cv_numeric_features(cvs)
         
-        # Combinaison des features
-        combined_features = np.concatenate([text_features, numerical_features])
-        return combined_features
+        # Combinaison des features (petit bloc dense ajouté au bloc creux)
+        return feature_matrix(text_features, numerical_features)
     
-    def extract_features_from_job(self, job: JobOffer) -> np.ndarray:
-        """Extrait les features d'une offre d'emploi"""
-        # Features textuelles (TF-IDF)
-        text_features = self.tfidf_vectorizer.transform([job.processed_text]).toarray()[0]
+    def _cv_numeric_features(self, cvs: List[CVData]) -> List[List[float]]:
+        """Features numériques des CVs (expérience, éducation, nb compétences, langues, certifications)"""
+        return [
+            [
+                cv.experience_years,
+                self.education_mapping.get(cv.education_level.lower(), 0),
+                len(cv.skills),
+                len(cv.languages),
+                len(cv.certifications)
+            ]
+            for cv in cvs
+        ]
+    
+    def extract_features_from_jobs(self, jobs: List[JobOffer], snapshot: Optional[ModelSnapshot] = None):
+        """Extrait les features d'une liste d'offres d'emploi (matrice CSR float32)"""
+        snapshot = snapshot or self._snapshot
+        # Features textuelles (TF-IDF, en une seule transformation)
+        text_features = snapshot.tfidf_vectorizer.transform([job.processed_text for job in jobs])
         
         # Features numériques
         numerical_features = [
-            job.min_experience,
-            self.education_mapping.get(job.required_education.lower(), 0),
-            len(job.required_skills + job.preferred_skills),
-            len(job.languages),
-            0  # placeholder pour les certifications
+            [
+                job.min_experience,
+                self.education_mapping.get(job.required_education.lower(), 0),
+                len(job.required_skills + job.preferred_skills),
+                len(job.languages),
+                0  # placeholder pour les certifications
+            ]
+            for job in jobs
         ]
         
-        # Combinaison des features
-        combined_features = np.concatenate([text_features, numerical_features])
-        return combined_features
+        # Combinaison des features (petit bloc dense ajouté au bloc creux)
+        return feature_matrix(text_features, numerical_features)
     
-    def calculate_similarity_score(self, cv: CVData, job: JobOffer) -> Dict:
-        """Calcule le score de similarité entre un CV et une offre d'emploi"""
-        if not self.is_fitted:
-            # Entraîner le modèle si ce n'est pas fait
-            self.fit()
-        
-        if not self.is_fitted:
+    def extract_features_from_cv(self, cv: CVData, snapshot: Optional[ModelSnapshot] = None):
+        """Extrait les features d'un CV (matrice d'une ligne)"""
+        return self.extract_features_from_cvs([cv], snapshot)
+    
+    def extract_features_from_job(self, job: JobOffer, snapshot: Optional[ModelSnapshot] = None):
+        """Extrait les features d'une offre d'emploi (matrice d'une ligne)"""
+        return self.extract_features_from_jobs([job], snapshot)
+    
+    def _reduce(self, features, snapshot: Optional[ModelSnapshot] = None, dense: bool = True):
+        """Normalisation puis réduction de dimensionnalité (si la SVD est entraînée) ; sortie float32,
+        dense sauf si `dense=False` et que le résultat est resté creux (pas de SVD)"""
+        from scipy import sparse
+        
+        snapshot = snapshot or self._snapshot
+        if sparse.issparse(features) and getattr(snapshot.scaler, 'with_mean', False):
+            # Ancien modèle picklé (StandardScaler centré, PCA) : entrée dense attendue
+            features = features.toarray()
+        with STAGE_SECONDS.time(stage='scale'):
+            scaled = snapshot.scaler.transform(features if sparse.issparse(features) else np.atleast_2d(features))
+        if hasattr(snapshot.pca, 'components_'):
+            with STAGE_SECONDS.time(stage='pca'):
+                scaled = snapshot.pca.transform(scaled)
+        if sparse.issparse(scaled):
+            return scaled.toarray() if dense else scaled.astype(np.float32)
+        return np.asarray(scaled, dtype=np.float32)
+    
+    def _build_ann_index(self, cvs: Tuple[CVData, ...], cv_vectors: np.ndarray) -> Optional[IVFIndex]:
+        """Construit l'index ANN lorsque le corpus est assez grand pour qu'il soit utile"""
+        if len(cvs) < self.ann_min_corpus:
+            return None
+        
+        start = time.perf_counter()
+        ann_index = IVFIndex.build([cv.id for cv in cvs], cv_vectors, n_probe=self.ann_n_probe)
+        logger.info(f"Index ANN construit sur {len(ann_index)} CVs en {time.perf_counter() - start:.2f}s")
+        return ann_index
+    
+    def rebuild_ann_index(self):
+        """Reconstruit l'index ANN à partir des CVs et du modèle entraîné"""
+        with self._write_lock:
+            current = self._snapshot
+            ann_index = None
+            if current.is_fitted and len(current.cvs) >= self.ann_min_corpus:
+                features = self.extract_features_from_cvs(current.cvs, current)
+                ann_index = self._build_ann_index(current.cvs, self._reduce(features, current))
+            self._publish(ann_index=ann_index, derived=current.derived)
+    
+    def _index_cvs(self, snapshot: ModelSnapshot, cvs: List[CVData]) -> Optional[IVFIndex]:
+        """Copie de l'index ANN de l'instantané, complétée par des CVs ajoutés ou mis à jour"""
+        if snapshot.ann_index is None or not cvs:
+            return snapshot.ann_index
+        vectors = self._reduce(self.extract_features_from_cvs(cvs, snapshot), snapshot)
+        ann_index = snapshot.ann_index.copy()
+        ann_index.add([cv.id for cv in cvs], vectors)
+        return ann_index
+    
+    def _ann_shortlist_size(self, snapshot: ModelSnapshot, top_n: int, cv_ids: List[str] = None) -> Optional[int]:
+        """Taille de présélection ANN, ou None si le classement doit être exhaustif"""
+        if snapshot.ann_index is None or cv_ids:
+            return None
+        shortlist = max(self.ann_shortlist_size, top_n)
+        return shortlist if shortlist < len(snapshot.cvs) else None
+    
+    def _get_job_matrix(self, snapshot: ModelSnapshot) -> JobFeatureMatrix:
+        """Matrice des offres de l'instantané (construite d'un bloc au premier classement inverse)"""
+        matrix = snapshot.derived.get('job_matrix')
+        if matrix is None:
+            jobs = snapshot.jobs
+            if jobs:
+                vectors = self._reduce(self.extract_features_from_jobs(jobs, snapshot), snapshot)
+            else:
+                vectors = np.empty((0, 0))
+            education_levels = [self.education_mapping.get(job.required_education.lower(), 0) for job in jobs]
+            matrix = snapshot.derived['job_matrix'] = JobFeatureMatrix(jobs, vectors, education_levels)
+        return matrix
+    
+    def _fitted_snapshot(self) -> ModelSnapshot:
+        """Instantané courant, après entraînement si le modèle ne l'est pas encore"""
+        snapshot = self._snapshot
+        if not snapshot.is_fitted:
+            # Entraîner le modèle si ce n'est pas fait (une seule fois si plusieurs requêtes attendent)
+            with self._fit_lock:
+                if not self._snapshot.is_fitted:
+                    self.fit()
+            snapshot = self._snapshot
+        return snapshot
+    
+    def rank_jobs_for_cv(self, cv_id: str, top_n: Optional[int] = None) -> List[Dict]:
+        """Classe toutes les offres pour un CV en un seul passage vectorisé"""
+        snapshot = self._snapshot
+        position = snapshot.cv_positions.get(cv_id)
+        if position is None:
+            raise ValueError(f"CV {cv_id} non trouvé")
+        
+        snapshot = self._fitted_snapshot()
+        if not snapshot.is_fitted:
             raise ValueError("Le modèle ne peut pas être entraîné")
+        position = snapshot.cv_positions.get(cv_id)
+        if position is None:
+            raise ValueError(f"CV {cv_id} non trouvé")
+        cv = snapshot.cvs[position]
+        
+        matrix = self._get_job_matrix(snapshot)
+        if not len(matrix):
+            return []
+        
+        # Similarité cosinus avec toutes les offres (vecteurs déjà normalisés)
+        cv_vector = self._reduce(self.extract_features_from_cv(cv, snapshot), snapshot)[0]
+        cv_norm = np.linalg.norm(cv_vector)
+        similarities = matrix.vectors @ (cv_vector / cv_norm) if cv_norm > 0 else np.zeros(len(matrix))
+        
+        # Expérience (mêmes paliers que calculate_experience_match)
+        required = matrix.min_experience
+        experience = cv.experience_years
+        with np.errstate(divide='ignore', invalid='ignore'):
+            experience_match = np.select(
+                [experience >= required, experience >= required * 0.8, experience >= required * 0.6, required > 0],
+                [1.0, 0.8, 0.6, experience / required],
+                default=0.5
+            )
         
-        # Extraction des features
-        cv_features = self.extract_features_from_cv(cv).reshape(1, -1)
-        job_features = self.extract_features_from_job(job).reshape(1, -1)
-        
-        # Normalisation
-        cv_scaled = self.scaler.transform(cv_features)
-        job_scaled = self.scaler.transform(job_features)
-        
-        # Réduction de dimensionnalité si nécessaire
-        if hasattr(self.pca, 'components_'):
-            cv_reduced = self.pca.transform(cv_scaled)
-            job_reduced = self.pca.transform(job_scaled)
-        else:
-            cv_reduced = cv_scaled
-            job_reduced = job_scaled
-        
-        # Calcul de la similarité cosinus
-        overall_similarity = cosine_similarity(cv_reduced, job_reduced)[0][0]
-        
-        # Calculs de similarités spécifiques
-        skills_match = self.calculate_skills_match(cv.skills, job.required_skills, job.preferred_skills)
-        experience_match = self.calculate_experience_match(cv.experience_years, job.min_experience)
-        education_match = self.calculate_education_match(cv.education_level, job.required_education)
-        language_match = self.calculate_language_match(cv.languages, job.languages)
-        
-        # Score pondéré final
-        weighted_score = (
-            overall_similarity * 0.4 +
+        # Éducation (mêmes règles que calculate_education_match)
+        cv_level = self.education_mapping.get(cv.education_level.lower(), 0)
+        levels = matrix.education_levels
+        with np.errstate(divide='ignore', invalid='ignore'):
+            education_match = np.where(cv_level >= levels, 1.0, np.where(levels > 0, cv_level / levels, 0.5))
+        
+        # Compétences et langues : intersections d'ensembles précalculés par offre
+        cv_skills = {skill.lower() for skill in cv.skills}
+        cv_languages = {lang.lower() for lang in cv.languages}
+        skills_match = np.array([
+            len(cv_skills & req) / max(len(req), 1) * 0.7 + len(cv_skills & pref) / max(len(pref), 1) * 0.3
+            for req, pref in zip(matrix.required_skills, matrix.preferred_skills)
+        ])
+        language_match = np.array([
+            len(cv_languages & langs) / len(langs) if langs else 1.0 for langs in matrix.languages
+        ])
+        
+        overall_scores = (
+            similarities * 0.4 +
             skills_match * 0.3 +
             experience_match * 0.15 +
             education_match * 0.10 +
             language_match * 0.05
         )
         
+        count = len(matrix) if top_n is None else min(top_n, len(matrix))
+        order = self._top_indices({'scores': overall_scores, 'order': None, 'top': None}, count)
+        jobs_by_id = {job.id: job for job in snapshot.jobs}
+        analysis_date = datetime.now().isoformat()
+        
+        results = []
+        for rank, index in enumerate(order, start=1):
+            job_id = matrix.job_ids[index]
+            results.append({
+                'overall_score': float(overall_scores[index]),
+                'overall_similarity': float(similarities[index]),
+                'skills_match': float(skills_match[index]),
+                'experience_match': float(experience_match[index]),
+                'education_match': float(education_match[index]),
+                'language_match': float(language_match[index]),
+                'cv_id': cv.id,
+                'job_id': job_id,
+                'job_title': jobs_by_id[job_id].title,
+                'rank': rank,
+                'snapshot_version': snapshot.version,
+                'analysis_date': analysis_date
+            })
+        return results
+    
+    def calculate_similarity_score(self, cv: CVData, job: JobOffer, snapshot: Optional[ModelSnapshot] = None) -> Dict:
+        """Calcule le score de similarité entre un CV et une offre d'emploi"""
+        if snapshot is None or not snapshot.is_fitted:
+            snapshot = self._fitted_snapshot()
+        
+        if not snapshot.is_fitted:
+            raise ValueError("Le modèle ne peut pas être entraîné")
+        
+        # Extraction des features
+        with STAGE_SECONDS.time(stage='transform'):
+            features = stack_features([self.extract_features_from_cv(cv, snapshot),
+                                       self.extract_features_from_job(job, snapshot)])
+        
+        # Normalisation et réduction de dimensionnalité si nécessaire
+        cv_reduced, job_reduced = self._reduce(features, snapshot)
+        
+        with STAGE_SECONDS.time(stage='score'):
+            # Calcul de la similarité cosinus
+            from sklearn.metrics.pairwise import cosine_similarity
+            overall_similarity = cosine_similarity(cv_reduced.reshape(1, -1), job_reduced.reshape(1, -1))[0][0]
+            
+            # Calculs de similarités spécifiques
+            skills_match = self.calculate_skills_match(cv.skills, job.required_skills, job.preferred_skills)
+            experience_match = self.calculate_experience_match(cv.experience_years, job.min_experience)
+            education_match = self.calculate_education_match(cv.education_level, job.required_education)
+            language_match = self.calculate_language_match(cv.languages, job.languages)
+            
+            # Score pondéré final
+            weighted_score = (
+                overall_similarity * 0.4 +
+                skills_match * 0.3 +
+                experience_match * 0.15 +
+                education_match * 0.10 +
+                language_match * 0.05
+            )
+        
         return {
             'overall_score': float(weighted_score),
             'overall_similarity': float(overall_similarity),
@@ -370,7 +1163,8 @@ class CVAnalyzer:
             'education_match': float(education_match),
             'language_match': float(language_match),
             'cv_id': cv.id,
-            'job_id': job.id
+            'job_id': job.id,
+            'snapshot_version': snapshot.version
         }
     
     def calculate_skills_match(self, cv_skills: List[str], required_skills: List[str], preferred_skills: List[str]) -> float:
@@ -420,53 +1214,290 @@ class CVAnalyzer:
         matches = len(set(cv_langs_lower) & set(required_langs_lower))
         return matches / len(required_langs_lower)
     
-    def rank_candidates(self, job_id: str, cv_ids: List[str] = None) -> List[Dict]:
-        """Classe les candidats par ordre de pertinence pour un poste"""
+    def _get_ranking_entry(self, job_id: str, cv_ids: List[str] = None, shortlist: Optional[int] = None,
+                           snapshot: Optional[ModelSnapshot] = None) -> Dict:
+        """Retourne les scores (non triés) d'une offre depuis le cache, en les calculant si besoin
+        
+        Avec `shortlist`, seuls les CVs présélectionnés par l'index ANN sont évalués.
+        Le calcul se fait entièrement sur un même instantané, dont l'entrée garde la version.
+        """
+        snapshot = snapshot if snapshot is not None and snapshot.is_fitted else self._fitted_snapshot()
+        
+        mode = ('ann', shortlist, self.ann_n_probe) if shortlist else ('exact',)
+        cache_key = RankingCache.make_key(job_id, cv_ids, snapshot.model_version, snapshot.corpus_version, mode)
+        entry = self.ranking_cache.get(cache_key)
+        if entry is not None:
+            return entry
+        
+        results = self._compute_scores(snapshot, job_id, cv_ids, shortlist)
+        entry = {
+            'results': results,
+            'total': len(results) if not shortlist else len(snapshot.cvs),
+            'approximate': bool(shortlist),
+            'scores': np.fromiter((r['overall_score'] for r in results), dtype=float, count=len(results)),
+            'order': None,
+            'top': None,
+            'snapshot': snapshot
+        }
+        self.ranking_cache.put(cache_key, entry)
+        return entry
+    
+    def _compute_scores(self, snapshot: ModelSnapshot, job_id: str, cv_ids: List[str] = None,
+                        shortlist: Optional[int] = None) -> List[Dict]:
+        """Calcule les scores de tous les candidats (ou de la présélection ANN) sans passer par le cache"""
         # Trouver l'offre d'emploi
-        job = next((j for j in self.jobs_data if j.id == job_id), None)
-        if not job:
+        position = snapshot.job_positions.get(job_id)
+        if position is None:
             raise ValueError(f"Offre d'emploi {job_id} non trouvée")
+        job = snapshot.jobs[position]
         
         # Sélectionner les CVs à analyser
-        if cv_ids:
-            cvs = [cv for cv in self.cvs_data if cv.id in cv_ids]
+        if shortlist:
+            job_vector = self._reduce(self.extract_features_from_job(job, snapshot), snapshot)[0]
+            shortlisted_ids, _ = snapshot.ann_index.search(job_vector, shortlist, n_probe=self.ann_n_probe)
+            cvs = [snapshot.cvs[snapshot.cv_positions[cv_id]] for cv_id in shortlisted_ids
+                   if cv_id in snapshot.cv_positions]
+        elif cv_ids:
+            selected_ids = set(cv_ids)
+            cvs = [cv for cv in snapshot.cvs if cv.id in selected_ids]
         else:
-            cvs = self.cvs_data
+            cvs = snapshot.cvs
         
         if not cvs:
             raise ValueError("Aucun CV trouvé pour l'analyse")
         
         logger.info(f"Classement de {len(cvs)} candidats pour le poste {job.title}")
         
-        results = []
-        for cv in cvs:
-            score_data = self.calculate_similarity_score(cv, job)
-            results.append(score_data)
+        # Une seule transformation pour tous les candidats, puis un produit matrice-vecteur
+        with STAGE_SECONDS.time(stage='transform'):
+            cv_features = self.extract_features_from_cvs(cvs, snapshot)
+            job_features = self.extract_features_from_job(job, snapshot)
+        cv_rows = self._reduce(cv_features, snapshot, dense=False)
+        job_row = self._reduce(job_features, snapshot, dense=False)
         
-        # Tri par score décroissant
-        results.sort(key=lambda x: x['overall_score'], reverse=True)
+        with STAGE_SECONDS.time(stage='score'):
+            from sklearn.preprocessing import normalize
+            
+            # Similarité cosinus : lignes normalisées, produit creux (ou dense après SVD)
+            similarities = normalize(cv_rows) @ normalize(job_row).T
+            similarities = np.asarray(similarities.todense() if hasattr(similarities, 'todense') else similarities,
+                                      dtype=np.float64).ravel()
+            skills_match, experience_match, education_match, language_match = self._criteria_matches(cvs, job)
+            
+            # Score pondéré final (mêmes poids que calculate_similarity_score)
+            overall_scores = (
+                similarities * 0.4 +
+                skills_match * 0.3 +
+                experience_match * 0.15 +
+                education_match * 0.10 +
+                language_match * 0.05
+            )
         
-        # Ajout du rang et des informations du CV
-        for i, result in enumerate(results):
-            result['rank'] = i + 1
-            result['cv_filename'] = next((cv.filename for cv in cvs if cv.id == result['cv_id']), '')
-            result['analysis_date'] = datetime.now().isoformat()
+        analysis_date = datetime.now().isoformat()
+        return [
+            {
+                'overall_score': float(overall_scores[i]),
+                'overall_similarity': float(similarities[i]),
+                'skills_match': float(skills_match[i]),
+                'experience_match': float(experience_match[i]),
+                'education_match': float(education_match[i]),
+                'language_match': float(language_match[i]),
+                'cv_id': cv.id,
+                'job_id': job.id,
+                'snapshot_version': snapshot.version,
+                'cv_filename': cv.filename,
+                'analysis_date': analysis_date
+            }
+            for i, cv in enumerate(cvs)
+        ]
+    
+    def _criteria_matches(self, cvs: List[CVData], job: JobOffer) -> Tuple[np.ndarray, ...]:
+        """Compétences, expérience, éducation et langues de chaque CV pour une offre
+        (mêmes règles que les méthodes calculate_*_match)"""
+        required_skills = {skill.lower() for skill in job.required_skills}
+        preferred_skills = {skill.lower() for skill in job.preferred_skills}
+        required_languages = {lang.lower() for lang in job.languages}
+        
+        skills_match = np.empty(len(cvs))
+        language_match = np.empty(len(cvs))
+        for i, cv in enumerate(cvs):
+            cv_skills = {skill.lower() for skill in cv.skills}
+            skills_match[i] = (len(cv_skills & required_skills) / max(len(job.required_skills), 1) * 0.7 +
+                               len(cv_skills & preferred_skills) / max(len(job.preferred_skills), 1) * 0.3)
+            language_match[i] = (len({lang.lower() for lang in cv.languages} & required_languages) / len(job.languages)
+                                 if job.languages else 1.0)
+        
+        required = float(job.min_experience)
+        experience = np.array([cv.experience_years for cv in cvs], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            experience_match = np.select(
+                [experience >= required, experience >= required * 0.8, experience >= required * 0.6],
+                [1.0, 0.8, 0.6],
+                default=experience / required if required > 0 else 0.5
+            )
         
-        return results
+        required_level = self.education_mapping.get(job.required_education.lower(), 0)
+        cv_levels = np.array([self.education_mapping.get(cv.education_level.lower(), 0) for cv in cvs], dtype=np.float64)
+        education_match = np.where(cv_levels >= required_level, 1.0,
+                                   cv_levels / required_level if required_level > 0 else 0.5)
+        return skills_match, experience_match, education_match, language_match
+    
+    @staticmethod
+    def _top_indices(entry: Dict, k: int) -> np.ndarray:
+        """Indices des k meilleurs scores, triés (sélection partielle en O(n + k log k))"""
+        with STAGE_SECONDS.time(stage='sort'):
+            return CVAnalyzer._select_top(entry, k)
+    
+    @staticmethod
+    def _select_top(entry: Dict, k: int) -> np.ndarray:
+        """Sélection mémorisée dans l'entrée : un accès suivant pour k plus petit n'est qu'une tranche"""
+        scores = entry['scores']
+        n = len(scores)
+        if entry['order'] is not None or k >= n:
+            if entry['order'] is None:
+                # Tri complet stable : score décroissant puis ordre d'insertion
+                entry['order'] = np.lexsort((np.arange(n), -scores))
+            return entry['order'][:k]
+        if k <= 0:
+            return np.empty(0, dtype=int)
+        top = entry.get('top')
+        if top is not None and len(top) >= k:
+            return top[:k]
+        
+        # Ex aequo à la frontière départagés par l'ordre d'insertion, comme le tri complet :
+        # la sélection pour k est toujours un préfixe de celle pour un k plus grand
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        threshold = scores[candidates].min()
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+        top = candidates[np.lexsort((candidates, -scores[candidates]))]
+        if entry.get('top') is None or len(entry['top']) < len(top):
+            entry['top'] = top
+        return top
+    
+    @staticmethod
+    def _ranked_results(entry: Dict, indices: np.ndarray, offset: int = 0) -> List[Dict]:
+        """Copies des résultats sélectionnés avec leur rang (les résultats en cache ne sont jamais modifiés)"""
+        results = entry['results']
+        return [{**results[index], 'rank': position} for position, index in enumerate(indices, start=offset + 1)]
+    
+    def rank_candidates(self, job_id: str, cv_ids: List[str] = None) -> List[Dict]:
+        """Classe les candidats par ordre de pertinence pour un poste (ordre mis en cache)"""
+        entry = self._get_ranking_entry(job_id, cv_ids)
+        return self._ranked_results(entry, self._top_indices(entry, len(entry['results'])))
     
-    def get_top_candidates(self, job_id: str, top_n: int = 4, cv_ids: List[str] = None) -> List[Dict]:
-        """Retourne les N meilleurs candidats"""
-        ranked_results = self.rank_candidates(job_id, cv_ids)
-        return ranked_results[:top_n]
+    def get_top_candidates(self, job_id: str, top_n: int = 4, cv_ids: List[str] = None,
+                           offset: int = 0, exact: bool = False) -> List[Dict]:
+        """Retourne les N meilleurs candidats (à partir du rang offset + 1)"""
+        return self.get_ranking_page(job_id, top_n, cv_ids, offset, exact=exact)[2]
+    
+    @staticmethod
+    def _check_cursor_versions(snapshot: ModelSnapshot, versions: Optional[Tuple[int, int]]):
+        """Lève StaleRankingCursor si l'instantané classé n'est pas celui du curseur"""
+        if versions is not None and tuple(versions) != (snapshot.model_version, snapshot.corpus_version):
+            raise StaleRankingCursor("Curseur expiré : le classement a changé")
+    
+    def get_ranking_page(self, job_id: str, top_n: int = 4, cv_ids: List[str] = None, offset: int = 0,
+                         limit: Optional[int] = None, exact: bool = False,
+                         versions: Optional[Tuple[int, int]] = None) -> Tuple[ModelSnapshot, int, List[Dict]]:
+        """Retourne l'instantané utilisé, le nombre de candidats classés et la page [offset, offset + limit)
+        des N meilleurs
+        
+        Sur un grand corpus, les candidats sont présélectionnés par l'index ANN sauf si `exact`.
+        `versions` (modèle, corpus) est celui d'un curseur : il doit être celui de l'instantané classé.
+        """
+        snapshot = self._fitted_snapshot()
+        self._check_cursor_versions(snapshot, versions)
+        shortlist = None if exact else self._ann_shortlist_size(snapshot, top_n, cv_ids)
+        entry = self._get_ranking_entry(job_id, cv_ids, shortlist, snapshot)
+        total = entry['total']
+        end = min(top_n, len(entry['results']))
+        if limit is not None:
+            end = min(end, offset + limit)
+        if offset >= end:
+            return entry['snapshot'], total, []
+        
+        indices = self._top_indices(entry, end)[offset:]
+        return entry['snapshot'], total, self._ranked_results(entry, indices, offset)
+    
+    def iter_top_candidates(self, job_id: str, top_n: int = 4, cv_ids: List[str] = None, offset: int = 0,
+                            limit: Optional[int] = None, exact: bool = False,
+                            versions: Optional[Tuple[int, int]] = None) -> Tuple[ModelSnapshot, int, int, Iterator[Dict]]:
+        """Retourne l'instantané utilisé, le nombre de candidats classés, le nombre de résultats de la page
+        et un itérateur sur la page [offset, offset + limit) des N meilleurs (copies produites à la demande)"""
+        snapshot = self._fitted_snapshot()
+        self._check_cursor_versions(snapshot, versions)
+        shortlist = None if exact else self._ann_shortlist_size(snapshot, top_n, cv_ids)
+        entry = self._get_ranking_entry(job_id, cv_ids, shortlist, snapshot)
+        total = entry['total']
+        end = min(top_n, len(entry['results']))
+        if limit is not None:
+            end = min(end, offset + limit)
+        indices = self._top_indices(entry, end)[offset:] if offset < end else np.empty(0, dtype=int)
+        results = entry['results']
+        
+        def iterate():
+            for position, index in enumerate(indices, start=offset + 1):
+                yield {**results[index], 'rank': position}
+        
+        return entry['snapshot'], total, len(indices), iterate()
+    
+    def evaluate_ann_recall(self, job_id: str, k: int = 10) -> Dict:
+        """Compare le top-k obtenu avec présélection ANN au classement exhaustif"""
+        start = time.perf_counter()
+        exact = [r['cv_id'] for r in self.get_top_candidates(job_id, k, exact=True)]
+        exact_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        approx = [r['cv_id'] for r in self.get_top_candidates(job_id, k)]
+        approx_seconds = time.perf_counter() - start
+        
+        return {
+            'job_id': job_id,
+            'k': k,
+            'recall_at_k': recall_at_k(exact, approx, k),
+            'ann_enabled': self.ann_index is not None,
+            'exact_seconds': round(exact_seconds, 4),
+            'approximate_seconds': round(approx_seconds, 4)
+        }
+    
+    def get_cv_position(self, cv_id: str) -> Optional[int]:
+        """Position d'un CV dans l'instantané courant"""
+        return self._snapshot.cv_positions.get(cv_id)
+    
+    def get_job_position(self, job_id: str) -> Optional[int]:
+        """Position d'une offre dans l'instantané courant"""
+        return self._snapshot.job_positions.get(job_id)
 
-# Instance globale de l'analyseur
-analyzer = CVAnalyzer()
+def _load_analyzer() -> CVAnalyzer:
+    """Construit l'analyseur (dépend des ressources NLTK)"""
+    resources.get('nltk')
+    return CVAnalyzer()
+
+resources.register('nltk', configure_nltk_data)
+resources.register('analyzer', _load_analyzer)
+
+# Instance globale de l'analyseur (chargée au premier accès ou par le préchauffage)
+analyzer = LazyResource(resources, 'analyzer')
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Lance le chargement des composants en arrière-plan sans bloquer le démarrage ;
+    libère le pool de préprocessing à l'arrêt"""
+    if os.environ.get('TALENTSCOPE_WARMUP', '1') != '0':
+        resources.warm_up()
+    try:
+        yield
+    finally:
+        shutdown_preprocess_pool()
 
 # Initialisation de l'API FastAPI
 app = FastAPI(
     title="TalentScope ML API",
     description="API d'analyse de CVs avec machine learning",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Configuration CORS
@@ -492,21 +1523,128 @@ async def root():
         }
     }
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Mesure la durée des requêtes par route (gabarit de chemin, pas l'URL brute)"""
+    INFLIGHT_REQUESTS.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        INFLIGHT_REQUESTS.dec()
+        route = request.scope.get('route')
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, 'path', 'unmatched'),
+            status=str(status)
+        )
+
+# Routes qui utilisent l'analyseur : son chargement ne doit jamais bloquer la boucle d'événements
+ANALYZER_ROUTE_PREFIXES = ('/api/cvs', '/api/jobs', '/api/analysis', '/api/demo')
+
+@app.middleware("http")
+async def require_analyzer(request: Request, call_next):
+    """503 tant que l'analyseur se charge ; sans préchauffage, il est chargé dans le pool de threads"""
+    if request.url.path.startswith(ANALYZER_ROUTE_PREFIXES) and not resources.is_loaded('analyzer'):
+        if resources.is_loading('analyzer'):
+            return JSONResponse(status_code=503, headers={"Retry-After": "5"}, content={
+                "detail": "Analyseur en cours de chargement", "components": resources.status()})
+        try:
+            await run_in_threadpool(resources.get, 'analyzer')
+        except Exception as e:
+            return JSONResponse(status_code=503, content={
+                "detail": f"Analyseur indisponible: {e}", "components": resources.status()})
+    return await call_next(request)
+
+def _corpus_sizes() -> Dict[Tuple[str, ...], float]:
+    """Tailles du corpus (uniquement si l'analyseur est déjà chargé)"""
+    if not resources.is_loaded('analyzer'):
+        return {}
+    snapshot = analyzer.snapshot
+    sizes = {('cvs',): len(snapshot.cvs), ('jobs',): len(snapshot.jobs)}
+    if snapshot.ann_index is not None:
+        sizes[('ann_index',)] = len(snapshot.ann_index)
+    return sizes
+
+def _cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    """Taux de succès des caches (classement et lemmes)"""
+    if not resources.is_loaded('analyzer'):
+        return {}
+    ratios = {('ranking',): analyzer.ranking_cache.stats()['hit_rate']}
+    lemma_stats = analyzer.preprocessor.cache_info()
+    if lemma_stats.get('enabled'):
+        lookups = lemma_stats['hits'] + lemma_stats['misses']
+        ratios[('lemma',)] = lemma_stats['hits'] / lookups if lookups else 0.0
+    return ratios
+
+def _model_info() -> Dict[Tuple[str, ...], float]:
+    """Versions du modèle et du corpus, taille du vocabulaire"""
+    if not resources.is_loaded('analyzer'):
+        return {}
+    snapshot = analyzer.snapshot
+    info = {('model_version',): snapshot.model_version, ('corpus_version',): snapshot.corpus_version,
+            ('snapshot_version',): snapshot.version}
+    vocabulary = getattr(snapshot.tfidf_vectorizer, 'vocabulary_', None)
+    if vocabulary is not None:
+        info[('vocabulary_size',)] = len(vocabulary)
+    return info
+
+metrics_registry.gauge('talentscope_corpus_size', 'Nombre de CVs et d\'offres en mémoire', ('kind',),
+                       callback=_corpus_sizes)
+metrics_registry.gauge('talentscope_cache_hit_ratio', 'Taux de succès des caches', ('cache',),
+                       callback=_cache_hit_ratios)
+metrics_registry.gauge('talentscope_model_info', 'Versions et taille du vocabulaire du modèle', ('field',),
+                       callback=_model_info)
+metrics_registry.gauge('talentscope_component_load_seconds', 'Durée de chargement des composants', ('component',),
+                       callback=lambda: {(name,): status['load_seconds'] for name, status in resources.status().items()
+                                         if status['load_seconds'] is not None})
+
+@app.get("/metrics")
+async def metrics():
+    """Métriques au format d'exposition Prometheus"""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/api/health")
 async def health_check():
-    """Vérification de santé de l'API"""
-    return {
+    """Vérification de santé de l'API (vivacité : ne déclenche aucun chargement)"""
+    health = {
         "status": "healthy",
+        "ready": resources.is_ready(),
         "timestamp": datetime.now().isoformat(),
-        "model_fitted": analyzer.is_fitted,
-        "cvs_count": len(analyzer.cvs_data),
-        "jobs_count": len(analyzer.jobs_data)
+        "components": resources.status()
     }
+    if resources.is_loaded('analyzer'):
+        health.update({
+            "model_fitted": analyzer.is_fitted,
+            "feature_engine": analyzer.feature_engine,
+            "cvs_count": len(analyzer.cvs_data),
+            "jobs_count": len(analyzer.jobs_data),
+            "model_version": analyzer.model_version,
+            "corpus_version": analyzer.corpus_version,
+            "snapshot_version": analyzer.snapshot_version,
+            "ranking_cache": analyzer.ranking_cache.stats()
+        })
+    return health
+
+@app.get("/api/ready")
+async def readiness_check():
+    """Disponibilité de l'API : 503 tant que les composants ne sont pas chargés"""
+    ready = resources.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "components": resources.status()}
+    )
 
 # === GESTION DES CVs ===
+# Les routes qui prétraitent, entraînent ou classent sont synchrones (def) : FastAPI les exécute
+# dans son pool de threads, sans jamais bloquer la boucle d'événements.
 
 @app.post("/api/cvs/upload")
-async def upload_cv(
+def upload_cv(
     filename: str = Form(...),
     content: str = Form(...),
     skills: str = Form(""),
@@ -517,8 +1655,8 @@ async def upload_cv(
 ):
     """Télécharge et traite un CV"""
     try:
-        # Créer l'ID du CV
-        cv_id = f"cv_{len(analyzer.cvs_data) + 1:03d}"
+        # Créer l'ID du CV (jamais celui d'un CV existant ou supprimé)
+        cv_id = analyzer.allocate_id('cv')
         
         # Parser les listes
         skills_list = [s.strip() for s in skills.split(',') if s.strip()] if skills else []
@@ -554,9 +1692,193 @@ async def upload_cv(
         logger.error(f"Erreur lors du téléchargement du CV: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _parse_list_field(value) -> List[str]:
+    """Accepte une liste ou une chaîne séparée par des virgules"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(item).strip() for item in value if str(item).strip()]
+
+def _cv_from_record(record: Dict, cv_id: str) -> CVData:
+    """Construit un CVData à partir d'un enregistrement d'import"""
+    if not isinstance(record, dict):
+        raise ValueError("Enregistrement JSON attendu (objet)")
+    content = record.get('content') or record.get('raw_text')
+    if not content:
+        raise ValueError("Champ 'content' manquant ou vide")
+    
+    return CVData(
+        id=str(record.get('id') or cv_id),
+        filename=str(record.get('filename') or f"{cv_id}.txt"),
+        raw_text=str(content),
+        skills=_parse_list_field(record.get('skills')),
+        experience_years=float(record.get('experience_years') or 0.0),
+        education_level=str(record.get('education_level') or ""),
+        languages=_parse_list_field(record.get('languages')),
+        certifications=_parse_list_field(record.get('certifications'))
+    )
+
+def _extract_upload_text(filename: str, data: bytes) -> str:
+    """Extrait le texte d'un fichier importé (texte brut ou PDF)"""
+    if filename.lower().endswith('.pdf'):
+        from pdf_extraction import UPLOAD_MAX_CHARS, UPLOAD_MAX_PAGES, extract_pdf_text
+        return extract_pdf_text(data, max_pages=UPLOAD_MAX_PAGES, max_chars=UPLOAD_MAX_CHARS)
+    return data.decode('utf-8', errors='replace')
+
+async def _iter_ndjson_lines(request: Request):
+    """Lit un corps NDJSON en flux, ligne par ligne"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+def _ingest_records(pending: List[Tuple[Any, Dict]], refit: bool) -> Dict:
+    """Construit les CVs, les insère en un lot puis réentraîne une seule fois (hors boucle d'événements)"""
+    errors = []
+    cvs = []
+    # Identifiants fournis par le lot, réservés avant toute attribution
+    explicit_ids = [record.get('id') if isinstance(record, dict) else None for record, _ in pending]
+    reserved = {str(record_id) for record_id in explicit_ids if record_id}
+    for (record, source), record_id in zip(pending, explicit_ids):
+        try:
+            # Identifiant fourni par l'enregistrement, sinon attribué par l'analyseur
+            cvs.append(_cv_from_record(record, str(record_id) if record_id else analyzer.allocate_id('cv', reserved)))
+        except Exception as e:
+            errors.append({**source, 'error': str(e)})
+    
+    # Insertion groupée puis réentraînement unique
+    insert_errors = analyzer.add_cvs_bulk(cvs)
+    errors.extend(insert_errors)
+    failed_ids = {error.get('cv_id') for error in insert_errors}
+    inserted_ids = [cv.id for cv in cvs if cv.id not in failed_ids]
+    
+    if refit and inserted_ids:
+        analyzer.fit()
+    
+    return {
+        "success": not errors,
+        "inserted": len(inserted_ids),
+        "cv_ids": inserted_ids,
+        "errors": errors,
+        "refitted": bool(refit and inserted_ids),
+        "total_cvs": len(analyzer.cvs_data)
+    }
+
+@app.post("/api/cvs/bulk")
+async def bulk_upload_cvs(request: Request, refit: bool = True):
+    """Importe un lot de CVs (NDJSON ou multipart multi-fichiers) avec un seul réentraînement
+    
+    - NDJSON : un objet JSON par ligne (filename, content, skills, experience_years,
+      education_level, languages, certifications, id optionnel)
+    - multipart : champ `files` répété ; les fichiers .ndjson/.jsonl sont lus comme
+      des enregistrements, les autres (.txt, .pdf) comme le contenu d'un CV
+    
+    Seule la lecture du corps se fait sur la boucle d'événements : extraction des PDF,
+    préprocessing et réentraînement passent par le pool de threads.
+    """
+    pending = []
+    errors = []
+    try:
+        def parse_ndjson_line(line: bytes, source: Dict):
+            line = line.strip()
+            if not line:
+                return
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                errors.append({**source, 'error': f"JSON invalide: {e}"})
+                return
+            pending.append((record, source))
+            INGEST_QUEUE_DEPTH.inc()
+        
+        content_type = request.headers.get('content-type', '')
+        if content_type.startswith('multipart/form-data'):
+            form = await request.form()
+            for upload in form.getlist('files'):
+                filename = getattr(upload, 'filename', None) or 'fichier'
+                data = await upload.read()
+                if filename.lower().endswith(('.ndjson', '.jsonl')):
+                    for line_number, line in enumerate(data.split(b"\n"), start=1):
+                        parse_ndjson_line(line, {'file': filename, 'line': line_number})
+                else:
+                    try:
+                        text = await run_in_threadpool(_extract_upload_text, filename, data)
+                    except Exception as e:
+                        errors.append({'file': filename, 'error': f"Lecture impossible: {e}"})
+                        continue
+                    pending.append(({'filename': filename, 'content': text}, {'file': filename}))
+                    INGEST_QUEUE_DEPTH.inc()
+        else:
+            line_number = 0
+            async for line in _iter_ndjson_lines(request):
+                line_number += 1
+                parse_ndjson_line(line, {'line': line_number})
+        
+        result = await run_in_threadpool(_ingest_records, pending, refit)
+        result['errors'] = errors + result['errors']
+        result['success'] = not result['errors']
+        return result
+        
+    except Exception as e:
+        logger.error(f"Erreur lors de l'import en masse des CVs: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        INGEST_QUEUE_DEPTH.dec(len(pending))
+
+def _list_page(items: List, after: Optional[str], limit: Optional[int], position_of) -> Tuple[List, Optional[str]]:
+    """Découpe une liste selon un curseur (identifiant du dernier élément reçu)"""
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit doit être positif")
+    
+    start = 0
+    if after:
+        position = position_of(after)
+        if position is None:
+            raise HTTPException(status_code=400, detail=f"Curseur invalide: {after}")
+        start = position + 1
+    
+    end = len(items) if limit is None else min(start + limit, len(items))
+    page = items[start:end]
+    next_cursor = page[-1].id if page and end < len(items) else None
+    return page, next_cursor
+
+def _ranking_query_digest(job_id: str, top_n: int, cv_ids: Optional[List[str]], exact: bool) -> str:
+    """Empreinte de la requête de classement (offre, top_n, sélection de CVs, mode) liée au curseur"""
+    selection = sorted(set(cv_ids)) if cv_ids else None
+    query = json.dumps([job_id, top_n, selection, bool(exact)], ensure_ascii=False)
+    return hashlib.sha1(query.encode('utf-8')).hexdigest()[:12]
+
+def _encode_ranking_cursor(snapshot, rank: int, query: str) -> str:
+    """Curseur de classement : versions du modèle/corpus de l'instantané, dernier rang reçu, requête"""
+    return f"{snapshot.model_version}.{snapshot.corpus_version}.{rank}.{query}"
+
+def _decode_ranking_cursor(after: Optional[str], query: str) -> Tuple[Optional[Tuple[int, int]], int]:
+    """Retourne les versions (modèle, corpus) attendues et le rang de départ encodés dans le curseur
+    
+    Un curseur émis pour une autre requête est refusé (400) ; les versions sont vérifiées
+    sur l'instantané effectivement classé (StaleRankingCursor, 409).
+    """
+    if not after:
+        return None, 0
+    try:
+        model_version, corpus_version, rank, cursor_query = after.split('.')
+        versions, rank = (int(model_version), int(corpus_version)), int(rank)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Curseur invalide: {after}")
+    if cursor_query != query:
+        raise HTTPException(status_code=400, detail="Curseur émis pour une autre requête de classement")
+    return versions, max(rank, 0)
+
 @app.get("/api/cvs/list")
-async def list_cvs():
-    """Liste tous les CVs"""
+async def list_cvs(limit: Optional[int] = None, after: Optional[str] = None):
+    """Liste les CVs (pagination par curseur avec `limit` et `after`)"""
+    snapshot = analyzer.snapshot
+    page, next_cursor = _list_page(snapshot.cvs, after, limit, snapshot.cv_positions.get)
     return {
         "success": True,
         "cvs": [
@@ -570,20 +1892,20 @@ async def list_cvs():
                 "certifications": cv.certifications,
                 "upload_date": cv.upload_date
             }
-            for cv in analyzer.cvs_data
+            for cv in page
         ],
-        "total": len(analyzer.cvs_data)
+        "total": len(snapshot.cvs),
+        "next_cursor": next_cursor,
+        "snapshot_version": snapshot.version
     }
 
 @app.delete("/api/cvs/{cv_id}")
-async def delete_cv(cv_id: str):
+def delete_cv(cv_id: str):
     """Supprime un CV"""
     try:
-        cv_to_remove = next((cv for cv in analyzer.cvs_data if cv.id == cv_id), None)
-        if not cv_to_remove:
+        if not analyzer.remove_cv(cv_id):
             raise HTTPException(status_code=404, detail="CV non trouvé")
         
-        analyzer.cvs_data.remove(cv_to_remove)
         analyzer.fit()  # Réentraîner le modèle
         
         return {
@@ -601,7 +1923,7 @@ async def delete_cv(cv_id: str):
 # === GESTION DES OFFRES D'EMPLOI ===
 
 @app.post("/api/jobs/create")
-async def create_job(
+def create_job(
     title: str = Form(...),
     description: str = Form(...),
     required_skills: str = Form(""),
@@ -612,8 +1934,8 @@ async def create_job(
 ):
     """Crée une nouvelle offre d'emploi"""
     try:
-        # Créer l'ID de l'offre
-        job_id = f"job_{len(analyzer.jobs_data) + 1:03d}"
+        # Créer l'ID de l'offre (jamais celui d'une offre existante ou supprimée)
+        job_id = analyzer.allocate_id('job')
         
         # Parser les listes
         required_skills_list = [s.strip() for s in required_skills.split(',') if s.strip()] if required_skills else []
@@ -650,8 +1972,10 @@ async def create_job(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/jobs/list")
-async def list_jobs():
-    """Liste toutes les offres d'emploi"""
+async def list_jobs(limit: Optional[int] = None, after: Optional[str] = None):
+    """Liste les offres d'emploi (pagination par curseur avec `limit` et `after`)"""
+    snapshot = analyzer.snapshot
+    page, next_cursor = _list_page(snapshot.jobs, after, limit, snapshot.job_positions.get)
     return {
         "success": True,
         "jobs": [
@@ -666,57 +1990,129 @@ async def list_jobs():
                 "languages": job.languages,
                 "created_date": job.created_date
             }
-            for job in analyzer.jobs_data
+            for job in page
         ],
-        "total": len(analyzer.jobs_data)
+        "total": len(snapshot.jobs),
+        "next_cursor": next_cursor,
+        "snapshot_version": snapshot.version
     }
 
+@app.delete("/api/jobs/{job_id}")
+def delete_job(job_id: str):
+    """Supprime une offre d'emploi"""
+    try:
+        if not analyzer.remove_job(job_id):
+            raise HTTPException(status_code=404, detail="Offre d'emploi non trouvée")
+        
+        analyzer.fit()  # Réentraîner le modèle
+        
+        return {
+            "success": True,
+            "message": f"Offre {job_id} supprimée avec succès",
+            "total_jobs": len(analyzer.jobs_data)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erreur lors de la suppression de l'offre: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # === ANALYSE ET COMPARAISON ===
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _stream_ranking_ndjson(header: Dict, results: Iterator[Dict]) -> Iterator[str]:
+    """Sérialise un classement en NDJSON : une ligne d'en-tête puis un résultat par ligne"""
+    yield json.dumps({"type": "header", **header}, ensure_ascii=False) + "\n"
+    for result in results:
+        yield json.dumps({"type": "result", **result}, ensure_ascii=False) + "\n"
+
 @app.post("/api/analysis/rank")
-async def rank_candidates(
+def rank_candidates(
+    request: Request,
     job_id: str = Form(...),
     cv_ids: str = Form(""),
-    top_n: int = Form(4)
+    top_n: int = Form(4),
+    stream: bool = Form(False),
+    limit: Optional[int] = Form(None),
+    after: Optional[str] = Form(None),
+    exact: bool = Form(False)
 ):
-    """Classe les candidats par ordre de pertinence"""
+    """Classe les candidats par ordre de pertinence
+    
+    Avec `stream=true` (ou `Accept: application/x-ndjson`), la réponse est émise en
+    NDJSON dans l'ordre du classement, précédée d'une ligne d'en-tête.
+    `limit` et `after` paginent les `top_n` premiers résultats. Sur un grand corpus, les
+    candidats sont présélectionnés par l'index ANN, sauf avec `exact=true`.
+    """
     try:
         # Parser les IDs des CVs
         cv_ids_list = [cv_id.strip() for cv_id in cv_ids.split(',') if cv_id.strip()] if cv_ids else None
+        query = _ranking_query_digest(job_id, top_n, cv_ids_list, exact)
+        versions, offset = _decode_ranking_cursor(after, query)
+        
+        if stream or NDJSON_MEDIA_TYPE in request.headers.get('accept', ''):
+            snapshot, total_ranked, count, results_iter = analyzer.iter_top_candidates(
+                job_id, top_n, cv_ids_list, offset, limit, exact, versions)
+            last_rank = offset + count
+            header = {
+                "job_id": job_id,
+                "total_ranked": total_ranked,
+                "total_results": count,
+                "model_version": snapshot.model_version,
+                "corpus_version": snapshot.corpus_version,
+                "snapshot_version": snapshot.version,
+                "next_cursor": _encode_ranking_cursor(snapshot, last_rank, query) if count and last_rank < min(top_n, total_ranked) else None,
+                "analysis_date": datetime.now().isoformat()
+            }
+            return StreamingResponse(_stream_ranking_ndjson(header, results_iter), media_type=NDJSON_MEDIA_TYPE)
         
         # Effectuer le classement
-        results = analyzer.get_top_candidates(job_id, top_n, cv_ids_list)
+        snapshot, total_ranked, results = analyzer.get_ranking_page(job_id, top_n, cv_ids_list, offset, limit, exact,
+                                                                    versions)
+        last_rank = offset + len(results)
         
         return {
             "success": True,
             "job_id": job_id,
             "results": results,
             "total_analyzed": len(results),
+            "total_ranked": total_ranked,
+            "snapshot_version": snapshot.version,
+            "next_cursor": _encode_ranking_cursor(snapshot, last_rank, query) if results and last_rank < min(top_n, total_ranked) else None,
             "analysis_date": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
+    except StaleRankingCursor as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Erreur lors du classement: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/analysis/analyze")
-async def analyze_cv_job_match(
+def analyze_cv_job_match(
     job_id: str = Form(...),
     cv_id: str = Form(...)
 ):
     """Analyse la correspondance entre un CV et une offre d'emploi"""
     try:
-        # Trouver le CV et l'offre
-        cv = next((c for c in analyzer.cvs_data if c.id == cv_id), None)
-        job = next((j for j in analyzer.jobs_data if j.id == job_id), None)
+        # Trouver le CV et l'offre dans un même instantané
+        snapshot = analyzer.snapshot
+        cv_position = snapshot.cv_positions.get(cv_id)
+        job_position = snapshot.job_positions.get(job_id)
         
-        if not cv:
+        if cv_position is None:
             raise HTTPException(status_code=404, detail="CV non trouvé")
-        if not job:
+        if job_position is None:
             raise HTTPException(status_code=404, detail="Offre d'emploi non trouvée")
+        cv = snapshot.cvs[cv_position]
+        job = snapshot.jobs[job_position]
         
         # Calculer le score
-        result = analyzer.calculate_similarity_score(cv, job)
+        result = analyzer.calculate_similarity_score(cv, job, snapshot)
         
         return {
             "success": True,
@@ -735,27 +2131,87 @@ async def analyze_cv_job_match(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/analysis/results/{job_id}")
-async def get_analysis_results(job_id: str, top_n: int = 4):
-    """Récupère les résultats d'analyse pour une offre d'emploi"""
+def get_analysis_results(job_id: str, top_n: int = 4, limit: Optional[int] = None,
+                               after: Optional[str] = None, exact: bool = False):
+    """Récupère les résultats d'analyse pour une offre d'emploi (pagination avec `limit` et `after`)"""
     try:
-        results = analyzer.get_top_candidates(job_id, top_n)
+        query = _ranking_query_digest(job_id, top_n, None, exact)
+        versions, offset = _decode_ranking_cursor(after, query)
+        snapshot, total_ranked, results = analyzer.get_ranking_page(job_id, top_n, None, offset, limit, exact,
+                                                                    versions)
+        last_rank = offset + len(results)
         
         return {
             "success": True,
             "job_id": job_id,
             "results": results,
             "total_candidates": len(results),
+            "total_ranked": total_ranked,
+            "snapshot_version": snapshot.version,
+            "next_cursor": _encode_ranking_cursor(snapshot, last_rank, query) if results and last_rank < min(top_n, total_ranked) else None,
             "analysis_date": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
+    except StaleRankingCursor as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des résultats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/analysis/jobs-for-cv/{cv_id}")
+def rank_jobs_for_cv(cv_id: str, top_n: Optional[int] = None):
+    """Classe toutes les offres d'emploi pour un CV (correspondance inverse)"""
+    try:
+        if analyzer.get_cv_position(cv_id) is None:
+            raise HTTPException(status_code=404, detail="CV non trouvé")
+        
+        results = analyzer.rank_jobs_for_cv(cv_id, top_n)
+        
+        return {
+            "success": True,
+            "cv_id": cv_id,
+            "results": results,
+            "total_jobs": len(analyzer.jobs_data),
+            "analysis_date": datetime.now().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erreur lors du classement des offres: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analysis/ann/recall/{job_id}")
+def get_ann_recall(job_id: str, k: int = 10):
+    """Rappel@k de la présélection ANN par rapport au classement exhaustif"""
+    try:
+        ann_index = analyzer.ann_index
+        return {
+            "success": True,
+            "ann_index": ann_index.stats() if ann_index is not None else None,
+            **analyzer.evaluate_ann_recall(job_id, k)
+        }
+    except Exception as e:
+        logger.error(f"Erreur lors de l'évaluation de l'index ANN: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analysis/cache/stats")
+async def get_ranking_cache_stats():
+    """Statistiques du cache de classement"""
+    return {
+        "success": True,
+        "model_version": analyzer.model_version,
+        "corpus_version": analyzer.corpus_version,
+        "snapshot_version": analyzer.snapshot_version,
+        "cache": analyzer.ranking_cache.stats()
+    }
+
 # === ENDPOINTS DE DÉMONSTRATION ===
 
 @app.post("/api/demo/setup")
-async def setup_demo_data():
+def setup_demo_data():
     """Configure des données de démonstration"""
     try:
         # CVs de démonstration
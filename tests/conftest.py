@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Configuration commune des tests : les modules de l'application sont à la racine du dépôt"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Module de l'API avec un analyseur neuf, dont le modèle est sauvegardé dans tmp_path"""
+    pytest.importorskip('sklearn')
+    pytest.importorskip('fastapi')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TALENTSCOPE_WARMUP', '0')
+    import talent_scope_ml_api as api
+
+    monkeypatch.setitem(api.resources._values, 'analyzer', api.CVAnalyzer())
+    return api
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Index IVF : rappel face à la recherche exhaustive, ajouts et suppressions, présélection de l'analyseur"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+import load_test
+
+from ann_index import IVFIndex, _normalize, _top_k, recall_at_k
+
+K = 10
+
+
+def _clustered(n: int, dim: int = 32, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    vectors = centers[rng.integers(len(centers), size=n)] + 0.5 * rng.normal(size=(n, dim))
+    queries = centers[rng.integers(len(centers), size=25)] + 0.5 * rng.normal(size=(25, dim))
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+def _exact(vectors, ids, query, k=K):
+    return [ids[i] for i in _top_k(_normalize(vectors) @ _normalize(query), k)]
+
+
+def _mean_recall(index, vectors, ids, queries, n_probe):
+    return float(np.mean([recall_at_k(_exact(vectors, ids, q), index.search(q, K, n_probe=n_probe)[0], K)
+                          for q in queries]))
+
+
+def test_recall_grows_with_probes_and_is_exact_when_all_lists_probed():
+    vectors, queries = _clustered(4000)
+    ids = [f"cv_{i}" for i in range(len(vectors))]
+    index = IVFIndex.build(ids, vectors, seed=0)
+
+    recalls = [_mean_recall(index, vectors, ids, queries, n_probe) for n_probe in (1, 8, index.n_lists)]
+    assert recalls[0] <= recalls[1] <= recalls[2]
+    assert recalls[1] >= 0.9
+    assert recalls[2] == 1.0
+
+
+def test_search_scores_are_cosine_similarities():
+    vectors, queries = _clustered(500)
+    index = IVFIndex.build(list(range(len(vectors))), vectors, seed=1)
+    found, scores = index.search(queries[0], K, n_probe=index.n_lists)
+    expected = _normalize(vectors[found]) @ _normalize(queries[0])
+    np.testing.assert_allclose(scores, expected, rtol=1e-5)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_add_remove_and_copy_keep_recall():
+    vectors, queries = _clustered(3000, seed=2)
+    ids = list(range(len(vectors)))
+    index = IVFIndex.build(ids[:2000], vectors[:2000], seed=2)
+
+    updated = index.copy()
+    updated.add(ids[2000:], vectors[2000:])
+    assert updated.remove(ids[:500]) == 500 and updated.remove(ids[:500]) == 0
+    assert len(updated) == 2500 and len(index) == 2000
+    assert 0 not in updated and 2999 in updated
+
+    remaining = ids[500:]
+    assert _mean_recall(updated, vectors[500:], remaining, queries, updated.n_lists) == 1.0
+    assert _mean_recall(updated, vectors[500:], remaining, queries, 8) >= 0.85
+    # L'original n'est pas modifié par les écritures sur la copie
+    assert _mean_recall(index, vectors[:2000], ids[:2000], queries, index.n_lists) == 1.0
+
+
+def test_recall_at_k():
+    assert recall_at_k(['a', 'b', 'c'], ['c', 'x', 'a'], 3) == 2 / 3
+    assert recall_at_k([], ['a'], 3) == 1.0
+
+
+def test_analyzer_shortlist_recall(api):
+    pytest.importorskip('httpx')
+    from fastapi.testclient import TestClient
+
+    analyzer = api.resources.get('analyzer')
+    analyzer.ann_min_corpus, analyzer.ann_shortlist_size = 100, 60
+    client = TestClient(api.app)
+    rng = random.Random(7)
+    body = "\n".join(json.dumps(load_test.synthetic_cv(rng, i)) for i in range(400))
+    assert client.post('/api/cvs/bulk', content=body,
+                       headers={'content-type': 'application/x-ndjson'}).status_code == 200
+    for i in range(8):
+        assert client.post('/api/jobs/create', data=load_test.synthetic_job(rng, i)).status_code == 200
+    analyzer.fit()
+    assert analyzer.ann_index is not None
+
+    def recalls():
+        analyzer.ranking_cache.invalidate()
+        return [client.get(f"/api/analysis/ann/recall/{job.id}").json()['recall_at_k'] for job in analyzer.jobs_data]
+
+    # Le score final mêle similarité et critères : même sans approximation, la présélection
+    # par similarité seule ne garantit pas un rappel de 1
+    mean_recalls = []
+    for n_probe in (1, 4, analyzer.ann_index.n_lists):
+        analyzer.ann_n_probe = n_probe
+        mean_recalls.append(np.mean(recalls()))
+    assert mean_recalls[0] <= mean_recalls[1] <= mean_recalls[2]
+    assert mean_recalls[2] >= 0.8
+
+    # Toutes les listes sondées : la présélection est le top exact en similarité cosinus
+    snapshot = analyzer.snapshot
+    ids = [cv.id for cv in snapshot.cvs]
+    cv_vectors = analyzer._reduce(analyzer.extract_features_from_cvs(snapshot.cvs, snapshot), snapshot)
+    for job in snapshot.jobs:
+        job_vector = analyzer._reduce(analyzer.extract_features_from_job(job, snapshot), snapshot)[0]
+        shortlisted, _ = snapshot.ann_index.search(job_vector, K, n_probe=snapshot.ann_index.n_lists)
+        assert recall_at_k(_exact(cv_vectors, ids, job_vector), shortlisted, K) == 1.0
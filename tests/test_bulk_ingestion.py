@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Import en masse : mêmes CVs et mêmes vecteurs qu'une suite d'imports unitaires"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sklearn')
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+
+import load_test
+
+N_CVS = 12
+FIELDS = ('id', 'filename', 'raw_text', 'skills', 'experience_years', 'education_level',
+          'languages', 'certifications', 'processed_text')
+
+
+def _records(n: int = N_CVS):
+    rng = random.Random(7)
+    return [load_test.synthetic_cv(rng, i) for i in range(n)]
+
+
+def _cv_fields(analyzer):
+    return [tuple(getattr(cv, name) for name in FIELDS) for cv in analyzer.cvs_data]
+
+
+def _vectors(analyzer):
+    return analyzer._reduce(analyzer.extract_features_from_cvs(analyzer.cvs_data))
+
+
+def test_preprocess_many_matches_preprocess(api):
+    rng = random.Random(3)
+    words = ['Développeur', 'python3', 'C++', 'données', "l'équipe", 'SQL;', 'ÉCOLE', '2019-2023', 'naïve',
+             'machine_learning', 'projets', 'the', 'and', 'Straße', 'μ-services', '—', '']
+    texts = [' '.join(rng.choices(words, k=rng.randint(0, 40))) for _ in range(150)] + ['', '   ', '123 456']
+    preprocessor = api.TextPreprocessor()
+    expected = [preprocessor.preprocess(text) for text in texts]
+
+    try:
+        assert preprocessor.preprocess_many(texts, max_workers=2, chunk_size=16, min_parallel_batch=1) == expected
+        pool = api._preprocess_pool
+        assert pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+        # Le pool est conservé d'un lot à l'autre
+        assert preprocessor.preprocess_many(texts[:40], max_workers=2, min_parallel_batch=1) == expected[:40]
+        assert api._preprocess_pool is pool
+    finally:
+        api.shutdown_preprocess_pool()
+    # Petit lot : traité dans le processus courant, sans pool
+    assert preprocessor.preprocess_many(texts[:10], max_workers=2) == expected[:10]
+    assert api._preprocess_pool is None
+
+
+def test_add_cvs_bulk_matches_add_cv(api):
+    bulk = api.CVAnalyzer()
+    single = api.CVAnalyzer()
+    single.model_file, single.artifacts_dir = 'single.pkl', 'single_artifacts'
+
+    records = _records()
+    # Préprocessing réparti sur deux processus, même pour un petit lot
+    assert bulk.add_cvs_bulk([api._cv_from_record(r, f"cv_{i + 1:03d}") for i, r in enumerate(records)],
+                             max_workers=2, min_parallel_batch=1) == []
+    for i, record in enumerate(records):
+        single.add_cv(api._cv_from_record(record, f"cv_{i + 1:03d}"))
+    api.shutdown_preprocess_pool()
+    bulk.fit()
+    single.fit()
+
+    assert _cv_fields(bulk) == _cv_fields(single)
+    np.testing.assert_allclose(_vectors(bulk), _vectors(single), rtol=1e-5, atol=1e-6)
+
+
+def test_bulk_endpoint_matches_single_uploads(api, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(api.app)
+    # Créé avant toute sauvegarde : il ne recharge pas le modèle écrit par l'import en masse
+    single = api.CVAnalyzer()
+    single.model_file, single.artifacts_dir = 'single.pkl', 'single_artifacts'
+    records = _records()
+    # Corpus de départ commun (un entraînement sur un seul CV échoue à cause de min_df)
+    assert client.post('/api/demo/setup').status_code == 200
+    body = "\n".join(json.dumps(record) for record in records)
+    response = client.post('/api/cvs/bulk', content=body, headers={'content-type': 'application/x-ndjson'})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload['inserted'] == N_CVS and payload['errors'] == [] and payload['refitted']
+    bulk = api.resources.get('analyzer')
+
+    monkeypatch.setitem(api.resources._values, 'analyzer', single)
+    assert client.post('/api/demo/setup').status_code == 200
+    for record in records:
+        response = client.post('/api/cvs/upload', data={
+            'filename': record['filename'],
+            'content': record['content'],
+            'skills': ','.join(record['skills']),
+            'experience_years': str(record['experience_years']),
+            'education_level': record['education_level'],
+            'languages': ','.join(record['languages'])
+        })
+        assert response.status_code == 200
+
+    assert payload['cv_ids'] == [cv.id for cv in single.cvs_data][-N_CVS:]
+    assert _cv_fields(bulk) == _cv_fields(single)
+    np.testing.assert_allclose(_vectors(bulk), _vectors(single), rtol=1e-5, atol=1e-6)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""ConfigService : relecture sur changement de mtime, instantanés immuables, écriture atomique"""
+
+import json
+import os
+import stat
+import threading
+
+import pytest
+
+import config_service
+from config_service import ConfigService, get_config_service
+
+
+def _write_external(path, data, mtime_ns=None):
+    """Écriture par un tiers (non atomique), avec une date de modification explicite"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / 'config.json'
+    _write_external(path, {'language': 'fr', 'theme': {'mode': 'dark'}}, 1_000_000_000)
+    return str(path)
+
+
+def test_file_is_reread_only_when_mtime_or_size_changes(config_path):
+    service = ConfigService(config_path, revalidate_ms=0)
+    assert service.get('language') == 'fr'
+    for _ in range(5):
+        service.snapshot()
+    assert service.reads == 1
+
+    # Même taille, nouvelle date : relu
+    _write_external(config_path, {'language': 'en', 'theme': {'mode': 'dark'}}, 2_000_000_000)
+    assert service.get('language') == 'en' and service.reads == 2
+
+    # Contenu changé mais même taille et même date : le stat ne voit rien
+    _write_external(config_path, {'language': 'ar', 'theme': {'mode': 'dark'}}, 2_000_000_000)
+    assert service.get('language') == 'en' and service.reads == 2
+
+
+def test_revalidation_interval(config_path, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(config_service.time, 'monotonic', lambda: now[0])
+    service = ConfigService(config_path, revalidate_ms=1000)
+    assert service.get('language') == 'fr'
+
+    _write_external(config_path, {'language': 'english'}, 3_000_000_000)
+    now[0] += 0.5
+    assert service.get('language') == 'fr'
+    now[0] += 0.6
+    assert service.get('language') == 'english'
+
+    _write_external(config_path, {'language': 'arabic'}, 4_000_000_000)
+    assert service.reload().get('language') == 'arabic'
+
+
+def test_invalid_or_missing_file(config_path):
+    service = ConfigService(config_path, revalidate_ms=0)
+    assert service.get('language') == 'fr'
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write('{"language": ')
+    assert service.get('language') == 'fr'
+
+    os.remove(config_path)
+    assert dict(service.snapshot()) == {}
+
+
+def test_snapshots_are_read_only(config_path):
+    snapshot = ConfigService(config_path).snapshot()
+    with pytest.raises(TypeError):
+        snapshot['theme']['mode'] = 'light'
+    data = snapshot.to_dict()
+    data['theme']['mode'] = 'light'
+    assert snapshot['theme']['mode'] == 'dark'
+
+
+def test_write_is_atomic_and_keeps_permissions(config_path):
+    os.chmod(config_path, 0o640)
+    service = ConfigService(config_path, revalidate_ms=0)
+    snapshot = service.update(language='en')
+    assert snapshot.to_dict() == {'language': 'en', 'theme': {'mode': 'dark'}}
+    with open(config_path, encoding='utf-8') as f:
+        assert json.load(f) == {'language': 'en', 'theme': {'mode': 'dark'}}
+    assert stat.S_IMODE(os.stat(config_path).st_mode) == 0o640
+    assert service.reads == 1  # l'écriture met à jour l'instantané sans relecture
+    assert os.listdir(os.path.dirname(config_path)) == ['config.json']
+
+
+def test_failed_write_leaves_the_previous_file(config_path, monkeypatch):
+    service = ConfigService(config_path, revalidate_ms=0)
+
+    def failing_replace(source, target):
+        raise OSError('disque plein')
+
+    monkeypatch.setattr(config_service.os, 'replace', failing_replace)
+    with pytest.raises(OSError):
+        service.write({'language': 'en'})
+    with open(config_path, encoding='utf-8') as f:
+        assert json.load(f)['language'] == 'fr'
+    assert os.listdir(os.path.dirname(config_path)) == ['config.json']
+    assert service.get('language') == 'fr'
+
+
+def test_readers_never_see_a_partial_file(config_path):
+    service = ConfigService(config_path, revalidate_ms=0)
+    payload = {'items': list(range(2000))}
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with open(config_path, encoding='utf-8') as f:
+                    json.load(f)
+            except ValueError as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    try:
+        for i in range(30):
+            service.write(dict(payload, version=i))
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+    assert not errors
+    assert service.reload()['version'] == 29
+
+
+def test_one_service_per_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert get_config_service('config.json') is get_config_service(str(tmp_path / 'config.json'))
+    assert get_config_service('autre.json') is not get_config_service('config.json')
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Entraînement hors du verrou d'écriture et routes lourdes hors de la boucle d'événements"""
+
+import threading
+
+import pytest
+
+pytest.importorskip('httpx')
+
+
+def _gate_training(analyzer, monkeypatch):
+    """Bloque le prochain entraînement TF-IDF jusqu'à `release`"""
+    started, release = threading.Event(), threading.Event()
+    new_estimators = analyzer._new_estimators
+
+    def gated():
+        estimators = new_estimators()
+        vectorizer = estimators['tfidf_vectorizer']
+        fit = vectorizer.fit
+
+        def slow_fit(texts):
+            started.set()
+            release.wait(10)
+            return fit(texts)
+
+        vectorizer.fit = slow_fit
+        return estimators
+
+    monkeypatch.setattr(analyzer, '_new_estimators', gated)
+    return started, release
+
+
+def _run(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_writes_proceed_during_fit_and_reach_the_ann_index(api, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    assert TestClient(api.app).post('/api/demo/setup').status_code == 200
+    analyzer = api.resources.get('analyzer')
+    analyzer.ann_min_corpus = 1
+    analyzer.fit()
+    model_version = analyzer.model_version
+
+    started, release = _gate_training(analyzer, monkeypatch)
+    training = _run(analyzer.fit)
+    assert started.wait(5)
+
+    # Pendant l'entraînement : ajout et suppression sans attendre la fin
+    cv = api.CVData(id='cv_900', filename='nouveau.pdf', raw_text='Ingénieur Python et données',
+                    skills=['Python'], experience_years=2, education_level='Master', languages=[], certifications=[])
+    writer = _run(lambda: (analyzer.add_cv(cv), analyzer.remove_cv('cv_001')))
+    writer.join(5)
+    assert not writer.is_alive()
+    assert analyzer.model_version == model_version
+
+    release.set()
+    training.join(10)
+    assert not training.is_alive()
+
+    ids = {cv.id for cv in analyzer.cvs_data}
+    assert 'cv_900' in ids and 'cv_001' not in ids
+    assert analyzer.model_version == model_version + 1
+    assert set(analyzer.ann_index._locations) == ids
+
+
+def test_event_loop_keeps_serving_while_an_upload_trains(api, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        assert client.post('/api/demo/setup').status_code == 200
+        started, release = _gate_training(api.resources.get('analyzer'), monkeypatch)
+        responses = {}
+        upload = _run(lambda: responses.update(upload=client.post('/api/cvs/upload', data={
+            'filename': 'lent.pdf', 'content': 'Développeur Python, analyse de données'})))
+        assert started.wait(5)
+
+        try:
+            for path in ('/api/health', '/api/cvs/list', '/api/jobs/list'):
+                reader = _run(lambda path=path: responses.update({path: client.get(path)}))
+                reader.join(5)
+                assert not reader.is_alive(), f"{path} bloqué par l'entraînement"
+                assert responses[path].status_code == 200
+        finally:
+            release.set()
+        upload.join(10)
+        assert responses['upload'].status_code == 200
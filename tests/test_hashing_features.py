@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Moteur par hachage : IDF tenu par compteurs et échelle des features numériques apprise sur les CVs"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sklearn')
+
+from hashing_features import N_NUMERIC, HashingFeatureEngine
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return HashingFeatureEngine(n_features=2 ** 12, n_components=16)
+
+
+def test_numeric_statistics_follow_the_training_documents(engine):
+    numeric = np.array([[1, 2, 3, 1, 0], [5, 3, 7, 2, 0], [9, 4, 2, 3, 0]], dtype=float)
+    mean, scale = engine.numeric_statistics(numeric)
+    np.testing.assert_allclose(mean, numeric.mean(axis=0))
+    # Colonne constante : écart-type ramené à 1
+    np.testing.assert_allclose(scale, np.r_[numeric.std(axis=0)[:4], 1.0] * 4.0)
+
+    empty_mean, empty_scale = engine.numeric_statistics()
+    np.testing.assert_allclose(empty_mean, np.zeros(N_NUMERIC))
+    np.testing.assert_allclose(empty_scale, np.full(N_NUMERIC, 4.0))
+
+
+def test_scaled_numeric_block_weighs_like_a_projected_component(engine):
+    rng = np.random.default_rng(0)
+    numeric = np.c_[rng.uniform(0, 30, 200), rng.integers(0, 5, 200), rng.integers(0, 40, 200),
+                    rng.integers(1, 5, 200), rng.integers(0, 10, 200)]
+    estimators = engine.estimators(engine.empty_frequencies(), numeric)
+    scaled = estimators['scaler'].transform(np.c_[np.zeros((200, engine.n_components)), numeric])
+    block = scaled[:, engine.n_components:]
+    np.testing.assert_allclose(block.mean(axis=0), 0.0, atol=1e-5)
+    np.testing.assert_allclose(block.std(axis=0), 1 / np.sqrt(engine.n_components), rtol=1e-4)
+
+
+def test_analyzer_fits_the_numeric_scale_on_its_cvs(api):
+    analyzer = api.CVAnalyzer(feature_engine='hashing')
+    analyzer.model_file, analyzer.artifacts_dir = 'hashing.pkl', 'hashing_artifacts'
+    for i, years in enumerate([1.0, 4.0, 10.0]):
+        analyzer.add_cv(api.CVData(id=f"cv_{i}", filename='cv.pdf', raw_text=f"Développeur Python numéro {i}",
+                                   skills=['Python'] * (i + 1), experience_years=years, education_level='Master',
+                                   languages=['Français'], certifications=[]))
+    analyzer.fit()
+
+    n_components = analyzer.hashing_engine.n_components
+    expected_mean, expected_scale = analyzer.hashing_engine.numeric_statistics(
+        analyzer._cv_numeric_features(analyzer.cvs_data))
+    np.testing.assert_allclose(analyzer.scaler.mean_[n_components:], expected_mean)
+    np.testing.assert_allclose(analyzer.scaler.scale_[n_components:], expected_scale)
+    assert analyzer.scaler.mean_[n_components] == pytest.approx(5.0)
+
+    reloaded = api.CVAnalyzer(feature_engine='hashing')
+    reloaded.model_file = 'hashing.pkl'
+    reloaded.load_model()
+    np.testing.assert_allclose(reloaded.scaler.scale_, analyzer.scaler.scale_)
+
+
+TEXTS = ['développeur python données', 'ingénieur données cloud', 'chef de projet agile',
+         'développeur java cloud', 'analyste données python sql']
+
+
+def test_idf_follows_document_frequency_updates():
+    from sklearn.feature_extraction.text import TfidfTransformer
+
+    engine = HashingFeatureEngine(n_features=2 ** 12, n_components=16, min_df=1, max_df=1.0)
+    frequencies = engine.update_frequencies(engine.empty_frequencies(), added=TEXTS)
+    assert frequencies.n_documents == len(TEXTS)
+
+    # Même IDF lissé que scikit-learn sur les comptes hachés (features présentes)
+    counts = engine.counts(TEXTS)
+    present = np.unique(counts.indices)
+    expected = TfidfTransformer(smooth_idf=True).fit(counts).idf_
+    np.testing.assert_allclose(engine.idf(frequencies)[present], expected[present])
+
+    # Mise à jour incrémentale = recomptage complet ; le retrait rétablit les compteurs
+    updated = engine.update_frequencies(frequencies, added=['nouveau poste python'], removed=TEXTS[:2])
+    recounted = engine.update_frequencies(engine.empty_frequencies(), added=TEXTS[2:] + ['nouveau poste python'])
+    np.testing.assert_array_equal(updated.counts, recounted.counts)
+    assert updated.n_documents == recounted.n_documents == 4
+    restored = engine.update_frequencies(updated, added=TEXTS[:2], removed=['nouveau poste python'])
+    np.testing.assert_array_equal(restored.counts, frequencies.counts)
+    # Les compteurs publiés ne sont jamais modifiés
+    assert frequencies.n_documents == len(TEXTS)
+
+
+def test_idf_prunes_rare_and_frequent_features():
+    engine = HashingFeatureEngine(n_features=2 ** 12, n_components=256, min_df=2, max_df=0.5)
+    frequencies = engine.update_frequencies(engine.empty_frequencies(), added=TEXTS)
+    idf = engine.idf(frequencies)
+    df = frequencies.counts
+    assert np.all(idf[(df < 2) | (df > 2.5)] == 0)
+    assert np.all(idf[(df >= 2) & (df <= 2.5)] > 0)
+
+    projector = engine.estimators(frequencies)['tfidf_vectorizer']
+    # 'chef de projet agile' ne contient que des n-grammes élagués
+    vectors = projector.transform(['chef de projet agile', 'développeur python'])
+    assert vectors.shape == (2, engine.n_components)
+    assert not vectors[0].any() and vectors[1].any()
+
+
+def test_analyzer_frequencies_follow_added_and_removed_cvs(api):
+    analyzer = api.CVAnalyzer(feature_engine='hashing')
+    for i, text in enumerate(TEXTS):
+        analyzer.add_cv(api.CVData(id=f"cv_{i}", filename='cv.pdf', raw_text=text, skills=[],
+                                   experience_years=1.0, education_level='Master', languages=[], certifications=[]))
+    engine = analyzer.hashing_engine
+    snapshot = analyzer.snapshot
+    expected = engine.update_frequencies(engine.empty_frequencies(), added=[cv.processed_text for cv in snapshot.cvs])
+    np.testing.assert_array_equal(snapshot.document_frequencies.counts, expected.counts)
+
+    analyzer.remove_cv('cv_0')
+    snapshot = analyzer.snapshot
+    expected = engine.update_frequencies(engine.empty_frequencies(), added=[cv.processed_text for cv in snapshot.cvs])
+    assert snapshot.document_frequencies.n_documents == len(TEXTS) - 1
+    np.testing.assert_array_equal(snapshot.document_frequencies.counts, expected.counts)
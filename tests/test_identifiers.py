@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Identifiants de CVs et d'offres : jamais réattribués après une suppression"""
+
+import json
+
+import pytest
+
+pytest.importorskip('httpx')
+
+
+def _upload(client, name: str) -> str:
+    response = client.post('/api/cvs/upload', data={
+        'filename': f"{name}.pdf", 'content': f"Développeur Python {name} avec expérience en données",
+        'skills': 'Python,SQL', 'experience_years': '3', 'education_level': 'Master', 'languages': 'Français'})
+    assert response.status_code == 200
+    return response.json()['cv_id']
+
+
+def test_upload_after_delete_does_not_overwrite(api):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(api.app)
+    assert client.post('/api/demo/setup').status_code == 200
+    first = _upload(client, 'premier')
+    second = _upload(client, 'second')
+    assert client.delete(f"/api/cvs/{first}").status_code == 200
+
+    third = _upload(client, 'troisieme')
+    assert third not in (first, second, 'cv_001', 'cv_002', 'cv_003', 'cv_004')
+    filenames = {cv['id']: cv['filename'] for cv in client.get('/api/cvs/list').json()['cvs']}
+    assert filenames[second] == 'second.pdf' and filenames[third] == 'troisieme.pdf'
+    assert first not in filenames
+
+
+def test_bulk_and_jobs_use_the_same_allocator(api):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(api.app)
+    assert client.post('/api/demo/setup').status_code == 200
+    body = "\n".join(json.dumps({'content': f"cv {i} python données", 'id': 'cv_050'} if i == 1 else
+                                {'content': f"cv {i} python données"}) for i in range(3))
+    ids = client.post('/api/cvs/bulk', content=body, headers={'content-type': 'application/x-ndjson'}).json()['cv_ids']
+    assert ids == ['cv_005', 'cv_050', 'cv_006']
+    assert _upload(client, 'suivant') == 'cv_007'
+
+    job = {'title': 'Poste', 'description': 'Analyse de données en Python'}
+    created = client.post('/api/jobs/create', data=job).json()['job_id']
+    assert client.delete(f"/api/jobs/{created}").status_code == 200
+    assert client.post('/api/jobs/create', data=job).json()['job_id'] != created
+
+
+def test_counter_survives_restart(api):
+    analyzer = api.resources.get('analyzer')
+    assert analyzer.allocate_id('cv') == 'cv_001'
+    assert analyzer.allocate_id('cv') == 'cv_002'
+    analyzer.save_model()
+    assert api.CVAnalyzer().allocate_id('cv') == 'cv_003'
+
+
+def test_explicit_ids_in_a_batch_are_never_allocated(api):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(api.app)
+    assert client.post('/api/demo/setup').status_code == 200
+    # cv_001 à cv_004 existent : les CVs sans identifiant reçoivent cv_005, cv_006, ... sauf cv_006 et cv_008
+    records = [{'content': f"cv {i} python données"} for i in range(5)]
+    records.insert(3, {'content': "cv explicite python données", 'id': 'cv_006'})
+    records.append({'content': "cv explicite SQL données", 'id': 'cv_008'})
+    body = "\n".join(json.dumps(record) for record in records)
+    response = client.post('/api/cvs/bulk', content=body, headers={'content-type': 'application/x-ndjson'}).json()
+
+    assert response['errors'] == []
+    assert response['cv_ids'] == ['cv_005', 'cv_007', 'cv_009', 'cv_006', 'cv_010', 'cv_011', 'cv_008']
+    contents = {cv.id: cv.raw_text for cv in api.resources.get('analyzer').cvs_data}
+    assert len(contents) == 4 + len(records)
+    assert contents['cv_006'] == "cv explicite python données"
+    assert contents['cv_008'] == "cv explicite SQL données"
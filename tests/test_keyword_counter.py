@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""KeywordCounter : mêmes comptes que `texte.count(mot_clé)` pour chaque mot-clé"""
+
+import random
+
+import pytest
+
+ml_cv_matcher = pytest.importorskip('ml_cv_matcher')
+KeywordCounter = ml_cv_matcher.KeywordCounter
+
+KEYWORDS = ['python', 'java', 'javascript', 'script', 'c++', 'sql', 'nosql', 'machine learning', 'learning',
+            'data science', 'science', 'gestion de projet', 'projet', 'ans', 'ci/cd', 'aa', 'a a']
+
+
+def _expected(text_lower, keywords):
+    return [text_lower.count(keyword) for keyword in keywords]
+
+
+def _random_text(rng, n_words):
+    pieces = KEYWORDS + ['données', 'équipe', 'nosqlpython', 'javajava', 'aaa', 'machine', 'gestion', 'de']
+    separators = [' ', ' ', '  ', '\n', '\t', '', ', ']
+    return ''.join(rng.choice(pieces) + rng.choice(separators) for _ in range(n_words))
+
+
+def test_overlapping_and_embedded_keywords():
+    counter = KeywordCounter(KEYWORDS)
+    for text in ['javascript et java', 'nosql, sql et mysql', 'aaaa', 'a a a', 'machine learning, deep learning',
+                 'machine\nlearning', 'machine  learning', 'gestion de projet et projets', '', 'c++ c++c++']:
+        assert counter.count(text).tolist() == _expected(text, counter.keywords), text
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_texts_match_str_count(seed):
+    rng = random.Random(seed)
+    counter = KeywordCounter(KEYWORDS)
+    for _ in range(100):
+        text = _random_text(rng, rng.randint(0, 60)).lower()
+        assert counter.count(text).tolist() == _expected(text, counter.keywords)
+        # Tokens fournis par l'appelant : même résultat
+        assert counter.count(text, text.split()).tolist() == _expected(text, counter.keywords)
+
+
+def test_duplicate_keywords_and_cache_reset(monkeypatch):
+    counter = KeywordCounter(['python', 'sql', 'python'])
+    assert counter.keywords == ['python', 'sql'] and counter.ids == {'python': 0, 'sql': 1}
+
+    monkeypatch.setattr(KeywordCounter, '_MAX_CACHED_TOKENS', 3)
+    text = 'python sql pythonsql a b c d python'
+    for _ in range(3):
+        assert counter.count(text).tolist() == _expected(text, counter.keywords)
+    assert len(counter._token_hits) <= 3
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""KeywordIndex : mêmes étiquettes que la recherche `mot_clé in texte` de chaque mot-clé"""
+
+import random
+
+import pytest
+
+from keyword_index import KeywordIndex
+
+
+def _naive_labels(pairs, text_lower):
+    return {label for keyword, label in pairs if keyword and keyword.lower() in text_lower}
+
+
+def _random_text(rng, vocabulary, n_words=40):
+    words = [rng.choice(vocabulary) for _ in range(n_words)]
+    # Mots collés, ponctuation et majuscules : les mots-clés peuvent se chevaucher ou apparaître dans un mot
+    separators = [' ', ' ', ' ', '', ', ', '-', '.\n']
+    return ''.join(word + rng.choice(separators) for word in words)
+
+
+def test_overlaps_prefixes_and_regex_characters():
+    pairs = [('java', 'java'), ('javascript', 'js'), ('script', 'script'), ('c++', 'cpp'), ('c#', 'csharp'),
+             ('.net', 'dotnet'), ('ci/cd', 'cicd'), ('a', 'a'), ('ab', 'ab'), ('abc', 'abc'), ('bc', 'bc'),
+             ('Équipe', 'equipe'), ('(sql)', 'sql'), ('', 'vide')]
+    index = KeywordIndex(pairs)
+    for text in ['javascript', 'JAVASCRIPT et c++'.lower(), 'abc', 'xbcx', '.net, ci/cd, c#', 'équipe',
+                 '(sql) et sql', '', 'rien ici']:
+        assert index.labels(text) == _naive_labels(pairs, text), text
+    assert len(index) == len(pairs) - 1
+
+
+def test_same_keyword_with_several_labels():
+    index = KeywordIndex([('python', 'dev'), ('python', 'data'), ('PYTHON', 'script')])
+    assert index.labels('expert python') == {'dev', 'data', 'script'}
+    assert index.keywords('expert python') == {'python'}
+
+
+def test_empty_index():
+    index = KeywordIndex([])
+    assert index.labels('python') == set() and len(index) == 0
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_keywords_match_the_substring_semantics(seed):
+    rng = random.Random(seed)
+    alphabet = 'abcdeé+.# '
+    keywords = {''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 6))).strip() for _ in range(80)}
+    pairs = [(keyword, rng.randrange(20)) for keyword in keywords if keyword]
+    index = KeywordIndex(pairs)
+    vocabulary = [keyword for keyword, _ in pairs] + ['xyz', 'abba', 'é.#']
+    for _ in range(50):
+        text = _random_text(rng, vocabulary, rng.randint(0, 30)).lower()
+        assert index.labels(text) == _naive_labels(pairs, text)
+
+
+def test_matcher_bases_match_the_previous_loops():
+    """Bases réelles du matcher (compétences, soft skills, éducation) sur des CVs synthétiques"""
+    cv_matching_algorithm = pytest.importorskip('cv_matching_algorithm')
+    load_test = pytest.importorskip('load_test')
+
+    matcher_class = cv_matching_algorithm.UniversalCVJobMatcher
+    competencies = matcher_class._load_universal_competencies(None)
+    soft_skills = matcher_class._load_soft_skills(None)
+    education = matcher_class._load_education_levels(None)
+    pairs = ([(kw, ('competency', category)) for category, kws in competencies.items() for kw in kws] +
+             [(skill, ('soft_skill', skill)) for skill in soft_skills] +
+             [(kw, ('education', level)) for level, kws in education.items() for kw in kws])
+    index = KeywordIndex(pairs)
+
+    rng = random.Random(0)
+    keywords = [keyword for keyword, _ in pairs]
+    for i in range(200):
+        text = load_test.synthetic_cv(rng, i)['content'] + ' ' + _random_text(rng, keywords, 10).upper()
+        text_lower = text.lower()
+        expected_competencies = {category for category, kws in competencies.items()
+                                 if any(kw in text_lower for kw in kws)}
+        labels = index.labels(text_lower)
+        assert {label for kind, label in labels if kind == 'competency'} == expected_competencies
+        assert {label for kind, label in labels if kind == 'soft_skill'} == \
+            {skill for skill in soft_skills if skill in text_lower}
+        assert labels == _naive_labels(pairs, text_lower)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""Chargement paresseux de l'analyseur : les requêtes ne restent pas bloquées derrière le préchauffage"""
+
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip('httpx')
+
+
+@pytest.fixture
+def slow_api(api, monkeypatch):
+    """API dont l'analyseur ne finit de se charger que lorsque `release` est levé"""
+    release = threading.Event()
+
+    def load():
+        assert release.wait(10)
+        return api.CVAnalyzer()
+
+    manager = api.ResourceManager()
+    manager.register('analyzer', load)
+    monkeypatch.setattr(api, 'resources', manager)
+    monkeypatch.setattr(api, 'analyzer', api.LazyResource(manager, 'analyzer'))
+    return api, manager, release
+
+
+def test_data_routes_return_503_during_warm_up(slow_api):
+    from fastapi.testclient import TestClient
+
+    api, manager, release = slow_api
+    client = TestClient(api.app)
+    thread = manager.warm_up()
+    try:
+        health = client.get('/api/health')
+        assert health.status_code == 200 and health.json()['ready'] is False
+        response = client.get('/api/cvs/list')
+        assert response.status_code == 503 and response.headers['retry-after'] == '5'
+    finally:
+        release.set()
+        thread.join(10)
+
+    assert client.get('/api/cvs/list').status_code == 200
+
+
+def test_first_request_loads_off_the_event_loop(slow_api):
+    from fastapi.testclient import TestClient
+
+    api, manager, release = slow_api
+    release.set()
+    loop_running = []
+    load = manager._loaders['analyzer']
+
+    def load_and_check():
+        try:
+            asyncio.get_running_loop()
+            loop_running.append(True)
+        except RuntimeError:
+            loop_running.append(False)
+        return load()
+
+    manager._loaders['analyzer'] = load_and_check
+
+    response = TestClient(api.app).get('/api/jobs/list')
+    assert response.status_code == 200
+    assert manager.is_loaded('analyzer')
+    # Le chargement a eu lieu dans un thread du pool, pas dans celui de la boucle d'événements
+    assert loop_running == [False]
+
+
+def test_ready_is_503_while_health_stays_200(slow_api):
+    from fastapi.testclient import TestClient
+
+    api, manager, release = slow_api
+    client = TestClient(api.app)
+    thread = manager.warm_up()
+    try:
+        ready = client.get('/api/ready')
+        assert ready.status_code == 503 and ready.json()['ready'] is False
+        assert ready.json()['components']['analyzer']['state'] in ('pending', 'loading')
+        assert client.get('/api/health').status_code == 200
+        # Les routes sans analyseur restent servies pendant le chargement
+        assert client.get('/').status_code == 200
+        assert client.get('/metrics').status_code == 200
+    finally:
+        release.set()
+        thread.join(10)
+
+    ready = client.get('/api/ready')
+    assert ready.status_code == 200 and ready.json()['components']['analyzer']['state'] == 'ready'
+    assert client.get('/api/health').json()['ready'] is True
+
+
+def test_failed_load_returns_503_without_retry_after(api, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    def load():
+        raise RuntimeError("modèle corrompu")
+
+    manager = api.ResourceManager()
+    manager.register('analyzer', load)
+    monkeypatch.setattr(api, 'resources', manager)
+    monkeypatch.setattr(api, 'analyzer', api.LazyResource(manager, 'analyzer'))
+
+    response = TestClient(api.app).get('/api/cvs/list')
+    assert response.status_code == 503 and 'retry-after' not in response.headers
+    assert "modèle corrompu" in response.json()['detail']
+    ready = TestClient(api.app).get('/api/ready')
+    assert ready.status_code == 503 and ready.json()['components']['analyzer']['state'] == 'failed'
+
+
+@pytest.mark.parametrize('warmup, started', [('1', True), ('0', False)])
+def test_lifespan_starts_warm_up_and_releases_the_preprocess_pool(slow_api, monkeypatch, warmup, started):
+    from fastapi.testclient import TestClient
+
+    api, manager, release = slow_api
+    release.set()
+    monkeypatch.setenv('TALENTSCOPE_WARMUP', warmup)
+    calls = []
+    monkeypatch.setattr(api, 'shutdown_preprocess_pool', lambda: calls.append('shutdown'))
+
+    with TestClient(api.app) as client:
+        assert (manager._warm_up_thread is not None) == started
+        assert client.get('/api/health').status_code == 200
+        assert calls == []
+    assert calls == ['shutdown']
+    if started:
+        manager._warm_up_thread.join(10)
+        assert manager.is_loaded('analyzer')
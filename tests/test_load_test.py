@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Banc de charge en processus : répertoire de travail temporaire, dépôt intact"""
+
+import os
+
+import pytest
+
+import load_test
+
+
+def _fake_run(seen, error=None):
+    async def run_load_test(*args, **kwargs):
+        seen['cwd'] = os.getcwd()
+        seen['entries'] = sorted(os.listdir('.'))
+        seen['static'] = sorted(os.listdir('static')) if os.path.isdir('static') else None
+        # Tout fichier écrit par l'application reste dans le répertoire temporaire
+        with open('talent_scope_model.pkl', 'wb') as f:
+            f.write(b'modele')
+        if error:
+            raise error
+        return {'app': args[0]}
+    return run_load_test
+
+
+@pytest.mark.parametrize('app, expected', [('backend', ['static']), ('hybrid', ['static', 'templates']),
+                                           ('talent_scope', [])])
+def test_in_process_profiles_run_in_a_temporary_copy(tmp_path, monkeypatch, capsys, app, expected):
+    seen = {}
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(load_test, 'run_load_test', _fake_run(seen))
+    before = sorted(os.listdir(load_test.ROOT_DIR))
+
+    assert load_test.main(['--app', app]) == {'app': app}
+    assert seen['entries'] == expected
+    assert os.getcwd() == str(tmp_path)
+    assert not os.path.exists(seen['cwd'])
+    assert os.path.commonpath([seen['cwd'], load_test.ROOT_DIR]) != load_test.ROOT_DIR
+    assert sorted(os.listdir(load_test.ROOT_DIR)) == before
+    if 'static' in expected:
+        assert seen['static'] == sorted(os.listdir(load_test.PROFILES[app].resources['static']))
+
+
+def test_cwd_is_restored_when_the_run_fails(tmp_path, monkeypatch):
+    seen = {}
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(load_test, 'run_load_test', _fake_run(seen, RuntimeError('échec')))
+
+    with pytest.raises(RuntimeError):
+        load_test.main(['--app', 'backend'])
+    assert os.getcwd() == str(tmp_path)
+    assert not os.path.exists(seen['cwd'])
+
+
+def test_remote_target_keeps_the_current_directory(tmp_path, monkeypatch, capsys):
+    seen = {}
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(load_test, 'run_load_test', _fake_run(seen))
+
+    load_test.main(['--app', 'hybrid', '--base-url', 'http://localhost:8000'])
+    assert seen['cwd'] == str(tmp_path)
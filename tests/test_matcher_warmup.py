@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Matcher global paresseux : états prêt / chargement / erreur, reprise après échec, accès `matcher`"""
+
+import threading
+
+import pytest
+
+cv_matching_algorithm = pytest.importorskip('cv_matching_algorithm')
+
+
+@pytest.fixture
+def cma(monkeypatch):
+    """Module avec un matcher global réinitialisé et un constructeur remplaçable"""
+    monkeypatch.delenv('TALENTSCOPE_MATCHER_WARMUP', raising=False)
+    for name, value in (('_matcher', None), ('_matcher_error', None), ('_warmup_thread', None),
+                        ('_failures', 0), ('_failed_at', 0.0)):
+        monkeypatch.setattr(cv_matching_algorithm, name, value)
+    return cv_matching_algorithm
+
+
+class FakeMatcher:
+    built = 0
+
+    def __init__(self):
+        FakeMatcher.built += 1
+
+
+def _failing(calls):
+    def build():
+        calls.append(1)
+        raise RuntimeError("modèle introuvable")
+    return build
+
+
+def test_ready_after_warmup_and_matcher_attribute(cma, monkeypatch):
+    release = threading.Event()
+
+    class SlowMatcher(FakeMatcher):
+        def __init__(self):
+            assert release.wait(5)
+            super().__init__()
+
+    monkeypatch.setattr(cma, 'UniversalCVJobMatcher', SlowMatcher)
+    assert cma.matcher_status() == {'ready': False, 'loading': False, 'error': None, 'failures': 0, 'retry_in': 0.0}
+
+    thread = cma.start_warmup()
+    assert cma.start_warmup() is thread
+    assert cma.matcher_status()['loading'] and not cma.is_matcher_ready()
+    release.set()
+    thread.join(5)
+
+    status = cma.matcher_status()
+    assert status['ready'] and not status['loading'] and status['error'] is None
+    assert cma.matcher is cma.get_matcher() is cma._matcher
+    assert cma.start_warmup() is None
+    with pytest.raises(AttributeError):
+        cma.not_an_attribute
+
+
+def test_failed_load_is_not_retried_on_every_rerun(cma, monkeypatch):
+    calls = []
+    monkeypatch.setattr(cma, 'UniversalCVJobMatcher', _failing(calls))
+    monkeypatch.setattr(cma, 'WARMUP_RETRY_SECONDS', 60.0)
+
+    cma.start_warmup().join(5)
+    status = cma.matcher_status()
+    assert status['error'] == "modèle introuvable" and not status['ready'] and not status['loading']
+    assert status['failures'] == 1 and 0 < status['retry_in'] <= 60
+
+    # Réexécutions de la page : aucun nouveau chargement pendant le délai de reprise
+    for _ in range(5):
+        assert cma.start_warmup() is None
+    assert len(calls) == 1
+
+    # Relance demandée explicitement
+    cma.start_warmup(force=True).join(5)
+    assert len(calls) == 2 and cma.matcher_status()['failures'] == 2
+
+
+def test_retry_delay_doubles_and_recovery_resets_it(cma, monkeypatch):
+    calls = []
+    monkeypatch.setattr(cma, 'UniversalCVJobMatcher', _failing(calls))
+    monkeypatch.setattr(cma, 'WARMUP_RETRY_SECONDS', 10.0)
+    for expected in (10.0, 20.0, 40.0):
+        with pytest.raises(RuntimeError):
+            cma.get_matcher()
+        assert cma._retry_delay() == expected
+
+    # Délai écoulé : le préchauffage suivant recharge, et réussit
+    monkeypatch.setattr(cma, '_failed_at', cma._failed_at - 100)
+    monkeypatch.setattr(cma, 'UniversalCVJobMatcher', FakeMatcher)
+    cma.start_warmup().join(5)
+    status = cma.matcher_status()
+    assert status['ready'] and status['error'] is None and status['failures'] == 0
+
+
+def test_warmup_can_be_disabled(cma, monkeypatch):
+    monkeypatch.setenv('TALENTSCOPE_MATCHER_WARMUP', '0')
+    monkeypatch.setattr(cma, 'UniversalCVJobMatcher', FakeMatcher)
+    assert cma.start_warmup() is None
+    assert not cma.matcher_status()['loading']
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""MatchingPipeline : ordre des résultats, progression, annulation et fenêtre bornée"""
+
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('sklearn')
+
+from matching_pipeline import CancellationToken, MatchingCancelled, MatchingPipeline
+
+JOB = "Développeur Python, analyse de données SQL et cloud"
+
+
+class FakeAnalyzer:
+    """Analyseur minimal : lecture simulée avec délai, score = similarité + bonus du CV"""
+
+    def __init__(self, gate: threading.Event = None):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.vectorizer = TfidfVectorizer()
+        self.gate = gate
+        self.lock = threading.Lock()
+        self.started = 0
+        self.running = 0
+        self.max_running = 0
+
+    def extract_text_from_pdf(self, cv_file):
+        with self.lock:
+            self.started += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            if self.gate is not None:
+                self.gate.wait(5)
+            time.sleep(cv_file.delay)
+            if cv_file.text is None:
+                raise ValueError("PDF illisible")
+            return cv_file.text
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def extract_features(self, text):
+        return {'bonus': len(text.split()) / 100}
+
+    def preprocess_text(self, text):
+        return text.lower()
+
+    def scoring_weights(self):
+        return {'similarity': 100}
+
+    def calculate_comprehensive_score(self, job_description, cv_text, features, weights, similarity_score=0.0):
+        return round(weights['similarity'] * similarity_score + features['bonus'], 6)
+
+
+def _files(n, seed=0, unreadable=()):
+    rng = random.Random(seed)
+    words = ['python', 'données', 'sql', 'cloud', 'java', 'gestion', 'équipe', 'vente', 'marketing']
+    return [SimpleNamespace(name=f"cv_{i:02d}.pdf", delay=rng.uniform(0, 0.01),
+                            text=None if i in unreadable else ' '.join(rng.choices(words, k=rng.randint(3, 30))))
+            for i in range(n)]
+
+
+def _sequential(analyzer, files):
+    pipeline = MatchingPipeline(analyzer, io_workers=1, cpu_workers=1, max_in_flight=1)
+    return pipeline.run(JOB, files)
+
+
+def test_results_are_sorted_and_match_a_sequential_run():
+    files = _files(20, unreadable={3, 11})
+    results = MatchingPipeline(FakeAnalyzer(), io_workers=6, cpu_workers=1).run(JOB, files)
+
+    assert sorted(name for name, _, _ in results) == [f.name for f in files]
+    scores = [score for _, score, _ in results]
+    assert scores == sorted(scores, reverse=True)
+    assert {name: score for name, score, _ in results} == {name: score for name, score, _ in
+                                                           _sequential(FakeAnalyzer(), files)}
+    unreadable = {name: (score, features) for name, score, features in results if name in ('cv_03.pdf', 'cv_11.pdf')}
+    assert unreadable == {'cv_03.pdf': (0.0, {}), 'cv_11.pdf': (0.0, {})}
+
+
+def test_progress_reports_every_cv_then_scoring():
+    files = _files(12)
+    calls = []
+    MatchingPipeline(FakeAnalyzer(), io_workers=4, cpu_workers=1).run(
+        JOB, files, progress_callback=lambda done, total, message: calls.append((done, total, message)))
+
+    assert [done for done, _, _ in calls] == list(range(1, len(files) + 2))
+    assert {total for _, total, _ in calls} == {len(files) + 1}
+    assert sorted(message for _, _, message in calls[:-1]) == [f.name for f in files]
+    assert calls[-1][2] == 'scoring'
+
+
+def test_cancellation_stops_the_pipeline():
+    files = _files(40)
+    token = CancellationToken()
+    analyzer = FakeAnalyzer()
+
+    def progress(done, total, message):
+        if done == 3:
+            token.cancel()
+
+    with pytest.raises(MatchingCancelled):
+        MatchingPipeline(analyzer, io_workers=2, cpu_workers=1, max_in_flight=4).run(
+            JOB, files, progress_callback=progress, cancel_token=token)
+    assert analyzer.started < len(files)
+
+
+def test_cancelled_token_before_start():
+    token = CancellationToken()
+    token.cancel()
+    analyzer = FakeAnalyzer()
+    with pytest.raises(MatchingCancelled):
+        MatchingPipeline(analyzer, cpu_workers=1).run(JOB, _files(5), cancel_token=token)
+    assert analyzer.started == 0
+
+
+def test_in_flight_reads_are_bounded():
+    gate = threading.Event()
+    analyzer = FakeAnalyzer(gate)
+    pipeline = MatchingPipeline(analyzer, io_workers=8, cpu_workers=1, max_in_flight=3)
+    result = {}
+    runner = threading.Thread(target=lambda: result.update(value=pipeline.run(JOB, _files(15))))
+    runner.start()
+    time.sleep(0.3)
+    assert analyzer.started == 3
+    gate.set()
+    runner.join(10)
+    assert len(result['value']) == 15
+    assert analyzer.max_running <= 3
+
+
+def test_extraction_pool_is_persistent_and_not_forked():
+    import matching_pipeline
+
+    try:
+        pool = matching_pipeline._get_pool(2)
+        assert matching_pipeline._get_pool(2) is pool
+        assert pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        matching_pipeline.shutdown_pool()
+    assert matching_pipeline._pool is None
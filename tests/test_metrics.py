@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Métriques Prometheus : format d'exposition du registre et collecte sur /metrics"""
+
+import re
+
+import pytest
+
+from prometheus_metrics import CONTENT_TYPE, MetricsRegistry
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def _samples(text: str):
+    """{(nom, ((libellé, valeur), ...)): valeur} ; échoue sur toute ligne mal formée"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        name, labels, value = match.groups()
+        samples[(name, tuple(sorted(LABEL.findall(labels or ''))))] = float(value)
+    return samples
+
+
+def test_registry_renders_the_exposition_format():
+    registry = MetricsRegistry()
+    requests = registry.counter('app_requests_total', 'Requêtes', ('route',))
+    requests.inc(route='/a')
+    requests.inc(2, route='/a')
+    requests.inc(route='chemin "cité"\n')
+    registry.gauge('app_size', 'Taille', ('kind',), callback=lambda: {('cvs',): 3, ('jobs',): 1.5})
+    latency = registry.histogram('app_seconds', 'Durée', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 4.0):
+        latency.observe(value)
+    # Un nom déjà enregistré renvoie la métrique existante
+    assert registry.counter('app_requests_total', 'Requêtes', ('route',)) is requests
+
+    text = registry.render()
+    assert '# TYPE app_requests_total counter' in text and '# TYPE app_seconds histogram' in text
+    samples = _samples(text)
+    assert samples[('app_requests_total', (('route', '/a'),))] == 3
+    assert samples[('app_requests_total', (('route', 'chemin \\"cité\\"\\n'),))] == 1
+    assert samples[('app_size', (('kind', 'cvs'),))] == 3
+    assert samples[('app_size', (('kind', 'jobs'),))] == 1.5
+    assert [samples[('app_seconds_bucket', (('le', le),))] for le in ('0.1', '1', '+Inf')] == [2, 3, 4]
+    assert samples[('app_seconds_count', ())] == 4
+    assert samples[('app_seconds_sum', ())] == pytest.approx(4.65)
+
+
+def test_failing_gauge_callback_does_not_break_the_scrape():
+    registry = MetricsRegistry()
+    registry.gauge('app_broken', 'Cassée', callback=lambda: 1 / 0)
+    registry.counter('app_total', 'Total').inc()
+    assert _samples(registry.render()) == {('app_total', ()): 1}
+
+
+def test_metrics_endpoint(api):
+    pytest.importorskip('httpx')
+    from fastapi.testclient import TestClient
+
+    client = TestClient(api.app)
+    assert client.post('/api/demo/setup').status_code == 200
+    assert client.get('/api/analysis/ann/recall/job_001').status_code == 200
+    assert client.post('/api/analysis/rank', data={'job_id': 'job_001'}).status_code == 200
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == CONTENT_TYPE
+    samples = _samples(response.text)
+
+    # Durée par gabarit de route, jamais par URL brute
+    rank = (('method', 'POST'), ('route', '/api/analysis/rank'), ('status', '200'))
+    assert samples[('talentscope_http_request_duration_seconds_count', rank)] >= 1
+    routes = {dict(labels)['route'] for name, labels in samples
+              if name == 'talentscope_http_request_duration_seconds_count'}
+    assert '/api/analysis/ann/recall/{job_id}' in routes and '/api/analysis/ann/recall/job_001' not in routes
+
+    analyzer = api.resources.get('analyzer')
+    assert samples[('talentscope_corpus_size', (('kind', 'cvs'),))] == len(analyzer.cvs_data)
+    assert samples[('talentscope_corpus_size', (('kind', 'jobs'),))] == len(analyzer.jobs_data)
+    assert samples[('talentscope_model_info', (('field', 'model_version'),))] == analyzer.model_version
+    assert samples[('talentscope_fit_duration_seconds_count', ())] >= 1
+    assert samples[('talentscope_stage_duration_seconds_count', (('stage', 'score'),))] >= 1
+    assert ('talentscope_http_requests_in_flight', ()) in samples
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""Artefacts du modèle : aller-retour .npy (estimateurs et analyseur rechargé), recherche dans le vocabulaire
+et versions sur disque"""
+
+import json
+import os
+import pickle
+import random
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sklearn')
+
+from sklearn.decomposition import PCA, TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import StandardScaler
+
+from model_artifacts import MappedVocabulary, load_model_artifacts, prune_model_artifacts, save_model_artifacts
+
+WORDS = ['python', 'données', 'équipe', 'gestion', 'projet', 'analyse', 'développeur', 'sql', 'cloud',
+         'ingénieur', 'communication', 'leadership', 'réseau', 'sécurité', 'java', 'apprentissage']
+
+
+def _dense(matrix):
+    return matrix.toarray() if hasattr(matrix, 'toarray') else np.asarray(matrix)
+
+
+def _documents(n: int = 60, seed: int = 3):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))) for _ in range(n)]
+
+
+@pytest.mark.parametrize('params, reducer', [
+    ({'ngram_range': (1, 2), 'min_df': 2}, TruncatedSVD(5, random_state=0)),
+    ({'sublinear_tf': True, 'norm': 'l1'}, PCA(5, whiten=True, random_state=0)),
+    ({'binary': True, 'strip_accents': 'unicode'}, None),
+])
+def test_round_trip_matches_fitted_estimators(tmp_path, params, reducer):
+    documents = _documents()
+    vectorizer = TfidfVectorizer(**params).fit(documents)
+    features = vectorizer.transform(documents)
+    scaler = StandardScaler(with_mean=False).fit(features)
+    if reducer is not None:
+        reducer.fit(scaler.transform(features).toarray() if isinstance(reducer, PCA) else scaler.transform(features))
+
+    version = save_model_artifacts(str(tmp_path / 'artifacts'), vectorizer, scaler, reducer)
+    mapped_vectorizer, mapped_scaler, mapped_reducer = load_model_artifacts(version)
+
+    # Textes inconnus, vides et mots hors vocabulaire compris
+    texts = documents[:10] + ['', 'mot inconnu', 'python ' * 50 + 'x' * 200]
+    expected = vectorizer.transform(texts)
+    mapped = mapped_vectorizer.transform(texts)
+    assert mapped.shape == expected.shape
+    np.testing.assert_allclose(mapped.toarray(), expected.toarray(), rtol=1e-6, atol=1e-7)
+    np.testing.assert_allclose(_dense(mapped_scaler.transform(mapped)),
+                               _dense(scaler.transform(expected)), rtol=1e-5, atol=1e-6)
+    if reducer is None:
+        assert mapped_reducer is None
+    else:
+        scaled = scaler.transform(expected)
+        scaled = scaled.toarray() if isinstance(reducer, PCA) else scaled
+        np.testing.assert_allclose(mapped_reducer.transform(mapped_scaler.transform(mapped)),
+                                   reducer.transform(scaled), rtol=1e-4, atol=1e-5)
+
+
+def test_vocabulary_lookup():
+    terms = sorted(['a', 'ab', 'données', 'zèbre', 'équipe', 'python'])
+    vocabulary = MappedVocabulary(MappedVocabulary.encode(terms))
+    assert len(vocabulary) == len(terms)
+    assert [vocabulary[i] for i in range(len(terms))] == terms
+    assert [vocabulary.get(term) for term in terms] == list(range(len(terms)))
+    # Un préfixe tronqué à la largeur du tableau ne doit pas être confondu avec un terme
+    assert vocabulary.get('donnéesx') is None and vocabulary.get('zèbres') is None
+    assert 'b' not in vocabulary and '' not in vocabulary
+    assert vocabulary.lookup([]).tolist() == []
+    assert vocabulary.lookup(['python', 'inconnu', 'a']).tolist() == [terms.index('python'), -1, 0]
+
+
+def test_each_save_is_a_new_version_and_old_ones_are_pruned(tmp_path):
+    vectorizer = TfidfVectorizer().fit(_documents())
+    directory = str(tmp_path / 'artifacts')
+    os.makedirs(directory)  # ancien répertoire non versionné
+
+    first = save_model_artifacts(directory, vectorizer, None, None)
+    second = save_model_artifacts(directory, vectorizer, None, None)
+    assert first != second and os.path.dirname(first) == str(tmp_path)
+    assert load_model_artifacts(first) is not None
+
+    prune_model_artifacts(directory, keep=second)
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(second)]
+    assert load_model_artifacts(second) is not None
+
+
+def test_concurrent_saves_leave_a_consistent_model(api):
+    from fastapi.testclient import TestClient
+
+    assert TestClient(api.app).post('/api/demo/setup').status_code == 200
+    analyzer = api.resources.get('analyzer')
+    snapshot = analyzer._snapshot
+
+    threads = [threading.Thread(target=analyzer.save_model, args=(snapshot,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(analyzer.model_file, 'rb') as f:
+        saved = pickle.load(f)
+    versions = [name for name in os.listdir('.') if name.startswith(analyzer.artifacts_dir)]
+    assert versions == [os.path.basename(saved['artifacts_dir'])]
+    assert not [name for name in os.listdir('.') if name.endswith('.tmp')]
+
+    reloaded = api.CVAnalyzer()
+    assert reloaded.is_fitted and len(reloaded.cvs_data) == len(analyzer.cvs_data)
+    np.testing.assert_allclose(
+        reloaded._reduce(reloaded.extract_features_from_cvs(reloaded.cvs_data)),
+        analyzer._reduce(analyzer.extract_features_from_cvs(analyzer.cvs_data)), rtol=1e-4, atol=1e-5)
+    assert [job.id for job in reloaded.jobs_data] == [job.id for job in analyzer.jobs_data]
+
+
+def test_reloaded_analyzer_transforms_like_the_fitted_vectorizer(api):
+    pytest.importorskip('httpx')
+    from fastapi.testclient import TestClient
+
+    import load_test
+    from model_artifacts import MappedTfidfVectorizer
+
+    client = TestClient(api.app)
+    assert client.post('/api/demo/setup').status_code == 200
+    rng = random.Random(11)
+    body = "\n".join(json.dumps(load_test.synthetic_cv(rng, i)) for i in range(40))
+    assert client.post('/api/cvs/bulk', content=body,
+                       headers={'content-type': 'application/x-ndjson'}).status_code == 200
+    analyzer = api.resources.get('analyzer')
+    analyzer.fit()
+    fitted = analyzer.tfidf_vectorizer
+    assert isinstance(fitted, TfidfVectorizer)
+
+    reloaded = api.CVAnalyzer()
+    assert isinstance(reloaded.tfidf_vectorizer, MappedTfidfVectorizer)
+    texts = [cv.processed_text for cv in analyzer.cvs_data] + ['', 'python ' * 20 + 'mot inconnu']
+    expected, mapped = fitted.transform(texts), reloaded.tfidf_vectorizer.transform(texts)
+    assert mapped.shape == expected.shape and mapped.dtype == expected.dtype
+    np.testing.assert_allclose(mapped.toarray(), expected.toarray(), rtol=1e-6, atol=1e-7)
+
+    scores = {r['cv_id']: r['overall_score'] for r in analyzer.rank_candidates('job_001')}
+    for result in reloaded.rank_candidates('job_001'):
+        assert result['overall_score'] == pytest.approx(scores[result['cv_id']], abs=1e-6)
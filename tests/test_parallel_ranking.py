@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""Classement multi-processus : même résultat qu'en processus courant, fork seulement sans threads"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import parallel_ranking
+
+
+@dataclass
+class FakeScore:
+    overall_score: float
+    details: dict = field(default_factory=dict)
+
+
+class FakeCache:
+    def reset_locks(self):
+        pass
+
+
+class FakeMatcher:
+    """Matcher déterministe sans modèle, picklable ; `state` simule un état ajusté après construction"""
+
+    def __init__(self, language='fr', encoder_backend=None, use_ner=None):
+        self.language = language
+        self.sentence_model = SimpleNamespace(backend=encoder_backend or 'torch')
+        self.use_ner = bool(use_ner)
+        self.embedding_cache = FakeCache()
+        self.state = 'construit'
+
+    def compile_job(self, job_description, required_experience=0, required_education=0, sector_hint=None):
+        return set(job_description.split())
+
+    def calculate_keyword_scores(self, cv_texts, job):
+        return np.array([len(job & set(text.split())) / max(len(job), 1) for text in cv_texts])
+
+    def match_cvs_to_job(self, cv_texts, job_description, required_experience=0, required_education=0,
+                         sector_hint=None, batch_size=32, keyword_scores=None):
+        if keyword_scores is None:
+            keyword_scores = self.calculate_keyword_scores(cv_texts, self.compile_job(job_description))
+        return [FakeScore(round(float(score) + len(text) / 1000, 6), {'pid': os.getpid(), 'state': self.state})
+                for text, score in zip(cv_texts, keyword_scores)]
+
+    def rank_candidates(self, candidates, job_description, required_experience=0, required_education=0,
+                        sector_hint=None, batch_size=32):
+        scores = self.match_cvs_to_job([c['cv_text'] for c in candidates], job_description)
+        return sorted(zip(candidates, scores), key=lambda x: x[1].overall_score, reverse=True)
+
+
+WORDS = ['python', 'sql', 'java', 'données', 'cloud', 'équipe', 'projet', 'analyse', 'docker', 'react']
+JOB = 'python sql données cloud'
+
+
+def _candidates(n=80, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{'id': i, 'cv_text': ' '.join(rng.choice(WORDS, size=rng.integers(3, 30)))} for i in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def _stop_pool():
+    yield
+    parallel_ranking.shutdown_pool()
+
+
+def _ranking(results):
+    return [(candidate['id'], score.overall_score) for candidate, score in results]
+
+
+def test_fork_is_only_chosen_without_other_threads(monkeypatch):
+    monkeypatch.delenv('TALENTSCOPE_RANKING_START_METHOD', raising=False)
+    release = threading.Event()
+    worker = threading.Thread(target=release.wait, daemon=True)
+    worker.start()
+    try:
+        assert parallel_ranking.choose_start_method() in ('forkserver', 'spawn')
+    finally:
+        release.set()
+        worker.join()
+
+    monkeypatch.setattr(parallel_ranking.threading, 'active_count', lambda: 1)
+    expected = 'fork' if parallel_ranking.fork_available() else 'forkserver'
+    assert parallel_ranking.choose_start_method() in (expected, 'spawn')
+
+    monkeypatch.setenv('TALENTSCOPE_RANKING_START_METHOD', 'spawn')
+    assert parallel_ranking.choose_start_method() == 'spawn'
+    monkeypatch.setenv('TALENTSCOPE_RANKING_START_METHOD', 'inconnue')
+    with pytest.raises(ValueError):
+        parallel_ranking.choose_start_method()
+
+
+@pytest.mark.parametrize('method', parallel_ranking.START_METHODS)
+def test_parallel_ranking_matches_serial(method):
+    import multiprocessing
+
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{method} indisponible")
+    matcher, candidates = FakeMatcher(), _candidates()
+    expected = _ranking(matcher.rank_candidates(candidates, JOB))
+
+    results = parallel_ranking.rank_candidates_parallel(matcher, candidates, JOB, n_workers=2, start_method=method)
+    assert _ranking(results) == expected
+    assert {score.details['pid'] for _, score in results} - {os.getpid()}
+
+
+def test_spawned_pool_is_reused_between_calls():
+    matcher, candidates = FakeMatcher(), _candidates()
+    first = parallel_ranking.rank_candidates_parallel(matcher, candidates, JOB, n_workers=2, start_method='spawn')
+    pool = parallel_ranking._pool
+    second = parallel_ranking.rank_candidates_parallel(matcher, candidates[::-1], JOB, n_workers=2,
+                                                       start_method='spawn')
+    assert parallel_ranking._pool is pool
+    assert dict(_ranking(second)) == dict(_ranking(first))
+
+    # Un autre matcher (backend différent) ne réutilise pas les workers du précédent
+    parallel_ranking.rank_candidates_parallel(FakeMatcher(encoder_backend='onnx'), candidates, JOB, n_workers=2,
+                                              start_method='spawn')
+    assert parallel_ranking._pool is not pool
+
+
+def test_spawned_workers_receive_the_parent_matcher_state():
+    matcher, candidates = FakeMatcher(), _candidates()
+    matcher.state = 'ajusté'
+    results = parallel_ranking.rank_candidates_parallel(matcher, candidates, JOB, n_workers=2, start_method='spawn')
+    assert {score.details['state'] for _, score in results} == {'ajusté'}
+    assert {score.details['pid'] for _, score in results} - {os.getpid()}
+
+
+def test_unpicklable_matcher_is_rebuilt_in_workers():
+    matcher, candidates = FakeMatcher(), _candidates()
+    matcher.state = 'ajusté'
+    matcher.callback = lambda: None
+    assert parallel_ranking._matcher_payload(matcher)[0] == 'spec'
+    results = parallel_ranking.rank_candidates_parallel(matcher, candidates, JOB, n_workers=2, start_method='spawn')
+    assert {score.details['state'] for _, score in results} == {'construit'}
+    assert _ranking(results) == _ranking(matcher.rank_candidates(candidates, JOB))
+
+
+def test_small_batches_stay_in_process():
+    results = parallel_ranking.rank_candidates_parallel(FakeMatcher(), _candidates(10), JOB, n_workers=4,
+                                                        start_method='spawn')
+    assert {score.details['pid'] for _, score in results} == {os.getpid()}
+    assert parallel_ranking._pool is None
+
+
+class HashEncoder:
+    """Encodeur déterministe sans modèle (moyenne de vecteurs pseudo-aléatoires par mot)"""
+
+    backend = 'torch'
+    name = 'hash@torch'
+    max_seq_length = 128
+
+    def encode(self, texts, batch_size=32):
+        import zlib
+
+        vectors = []
+        for text in texts:
+            words = text.lower().split() or ['']
+            vectors.append(np.mean([np.random.default_rng(zlib.crc32(w.encode())).standard_normal(16)
+                                    for w in words], axis=0))
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), 16)
+
+
+def test_universal_matcher_state_is_shipped_to_spawned_workers(monkeypatch):
+    cv_matching_algorithm = pytest.importorskip('cv_matching_algorithm')
+    import pickle
+    import nltk.corpus
+
+    monkeypatch.setattr(cv_matching_algorithm, '_ensure_nltk_resources', lambda: None)
+    monkeypatch.setattr(cv_matching_algorithm, 'create_encoder', lambda backend=None: HashEncoder())
+    monkeypatch.setattr(nltk.corpus, 'stopwords', SimpleNamespace(words=lambda language: ['le', 'la', 'de', 'et']))
+    matcher = cv_matching_algorithm.UniversalCVJobMatcher()
+    candidates = [{'id': c['id'], 'cv_text': c['cv_text'] + ' master 5 ans expérience'} for c in _candidates(48)]
+    expected = _ranking(matcher.rank_candidates(candidates, JOB))
+    assert len(matcher.embedding_cache.stats()) and matcher.embedding_cache.stats()['entries']
+
+    copy = pickle.loads(pickle.dumps(matcher))
+    assert copy.embedding_cache.stats()['entries'] == 0 and copy.nlp is None
+    assert _ranking(copy.rank_candidates(candidates, JOB)) == expected
+
+    results = parallel_ranking.rank_candidates_parallel(matcher, candidates, JOB, n_workers=2, start_method='spawn')
+    assert parallel_ranking._pool_key[1] is matcher
+    assert dict(_ranking(results)) == pytest.approx(dict(expected))
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""Extraction PDF : budgets de pages et de caractères, ordre des pages en parallèle, backends"""
+
+import io
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+PyPDF2 = pytest.importorskip('PyPDF2')
+
+import pdf_extraction
+from pdf_extraction import extract_pdf, extract_pdf_text, get_pdf_backend, page_timings
+
+
+def make_pdf(n_pages: int, lines_per_page: int = 20) -> bytes:
+    """PDF minimal (police Helvetica standard) dont chaque page porte son numéro sur chaque ligne"""
+    font_id = 3 + 2 * n_pages
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(n_pages))
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>"]
+    for i in range(n_pages):
+        body = "BT /F1 10 Tf 20 800 Td " + " ".join(
+            f"(page{i + 1} ligne{j} python) Tj 0 -12 Td" for j in range(lines_per_page)) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 900] /Contents {4 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    return out
+
+
+@pytest.fixture(scope='module')
+def pdf_data():
+    return make_pdf(12)
+
+
+@pytest.fixture(scope='module')
+def reference(pdf_data):
+    return [page.extract_text() for page in PyPDF2.PdfReader(io.BytesIO(pdf_data)).pages]
+
+
+@pytest.fixture(autouse=True)
+def _pypdf2_backend(monkeypatch):
+    monkeypatch.setenv('TALENTSCOPE_PDF_BACKEND', 'pypdf2')
+
+
+def test_without_budget_every_page_is_extracted_in_order(pdf_data, reference, tmp_path):
+    path = tmp_path / 'cv.pdf'
+    path.write_bytes(pdf_data)
+    for source in (pdf_data, io.BytesIO(pdf_data), str(path)):
+        document = extract_pdf(source, max_pages=0, max_chars=0, workers=1)
+        assert [page.number for page in document.pages] == list(range(1, 13))
+        assert document.text == "\n".join(reference)
+        assert document.page_count == 12 and not document.truncated and document.backend == 'pypdf2'
+
+
+def test_no_budget_by_default(reference):
+    data = make_pdf(30, lines_per_page=5)
+    document = extract_pdf(data, workers=1)
+    assert len(document.pages) == 30 and not document.truncated
+
+
+def test_page_budget(pdf_data, reference):
+    document = extract_pdf(pdf_data, max_pages=5, max_chars=0, workers=1)
+    assert [page.text for page in document.pages] == reference[:5]
+    assert document.truncated and document.page_count == 12
+    assert extract_pdf(pdf_data, max_pages=50, max_chars=0, workers=1).truncated is False
+
+
+def test_char_budget_keeps_the_page_that_crosses_it(pdf_data, reference):
+    budget = len(reference[0]) + len(reference[1]) + 1
+    document = extract_pdf(pdf_data, max_pages=0, max_chars=budget, workers=1)
+    assert len(document.pages) == 3 and document.truncated
+    assert document.chars >= budget > document.chars - len(reference[2])
+
+    exact = extract_pdf(pdf_data, max_pages=0, max_chars=len(reference[0]), workers=1)
+    assert len(exact.pages) == 1
+
+
+def test_parallel_extraction_matches_serial_and_respects_budgets(pdf_data, reference, monkeypatch):
+    monkeypatch.setattr(pdf_extraction, 'PARALLEL_MIN_PAGES', 4)
+    try:
+        document = extract_pdf(pdf_data, max_pages=0, max_chars=0, workers=2)
+        assert [page.text for page in document.pages] == reference
+        assert [page.number for page in document.pages] == list(range(1, 13))
+
+        budget = sum(len(text) for text in reference[:5]) + 1
+        limited = extract_pdf(pdf_data, max_pages=0, max_chars=budget, workers=2)
+        assert [page.text for page in limited.pages] == reference[:6]
+
+        by_pages = extract_pdf(pdf_data, max_pages=9, max_chars=0, workers=2)
+        assert [page.text for page in by_pages.pages] == reference[:9]
+    finally:
+        pool = pdf_extraction._pool
+        if pool is not None:
+            pool.shutdown()
+        pdf_extraction._pool, pdf_extraction._pool_workers = None, 0
+
+
+def test_pool_workers_are_not_forked():
+    try:
+        pool = pdf_extraction._get_pool(2)
+        assert pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        pdf_extraction._pool.shutdown()
+        pdf_extraction._pool, pdf_extraction._pool_workers = None, 0
+
+
+def test_concurrent_readers_get_their_own_pages(pdf_data, reference):
+    other = make_pdf(3, lines_per_page=4)
+    other_reference = [page.extract_text() for page in PyPDF2.PdfReader(io.BytesIO(other)).pages]
+    sources = [pdf_data, other] * 4
+    with ThreadPoolExecutor(max_workers=4) as readers:
+        texts = list(readers.map(lambda data: extract_pdf_text(data, workers=1), sources))
+    assert texts == ["\n".join(reference), "\n".join(other_reference)] * 4
+
+
+def test_pdfium_calls_are_serialized(monkeypatch):
+    """Lecteurs de plusieurs threads : un seul appel pdfium à la fois (module pypdfium2 simulé)"""
+    active, overlaps = [0], []
+
+    def call(result):
+        active[0] += 1
+        if active[0] > 1:
+            overlaps.append(active[0])
+        time.sleep(0.001)
+        active[0] -= 1
+        return result
+
+    class FakeTextPage:
+        def get_text_range(self):
+            return call("texte")
+
+        def close(self):
+            call(None)
+
+    class FakePage:
+        def get_textpage(self):
+            return call(FakeTextPage())
+
+        def close(self):
+            call(None)
+
+    class FakeDocument:
+        def __init__(self, data):
+            call(None)
+
+        def __len__(self):
+            return call(3)
+
+        def __getitem__(self, index):
+            return call(FakePage())
+
+        def close(self):
+            call(None)
+
+    monkeypatch.setitem(sys.modules, 'pypdfium2', types.SimpleNamespace(PdfDocument=FakeDocument))
+    with ThreadPoolExecutor(max_workers=4) as readers:
+        texts = list(readers.map(lambda _: extract_pdf_text(b"%PDF", backend='pdfium', workers=1), range(8)))
+    assert texts == ["texte\ntexte\ntexte"] * 8
+    assert not overlaps
+
+
+def test_timings_and_text_helper(pdf_data, reference):
+    document = extract_pdf(pdf_data, max_pages=4, max_chars=0, workers=1)
+    timings = page_timings(document)
+    assert timings['pages_extracted'] == 4 and timings['page_count'] == 12 and timings['truncated']
+    assert len(timings['slowest_pages']) == 4
+    assert all(page.seconds >= 0 for page in document.pages)
+    assert extract_pdf_text(pdf_data, max_pages=2, max_chars=0, workers=1) == "\n".join(reference[:2])
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.delenv('TALENTSCOPE_PDF_BACKEND')
+    expected = 'pdfium' if pdf_extraction.pdfium_available() else 'pypdf2'
+    assert get_pdf_backend().name == expected
+    assert get_pdf_backend('pypdf2').name == 'pypdf2'
+    with pytest.raises(ValueError):
+        get_pdf_backend('fitz')
+
+
+def test_unreadable_pdf_raises():
+    with pytest.raises(Exception):
+        extract_pdf(b"pas un pdf", workers=1)
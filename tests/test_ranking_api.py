@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Classement des candidats : pagination, flux NDJSON"""
+
+import json
+import random
+
+import pytest
+
+pytest.importorskip('httpx')
+
+import load_test
+
+
+@pytest.fixture
+def client(api):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(api.app)
+    assert client.post('/api/demo/setup').status_code == 200
+    rng = random.Random(3)
+    body = "\n".join(json.dumps(load_test.synthetic_cv(rng, i)) for i in range(30))
+    assert client.post('/api/cvs/bulk', content=body,
+                       headers={'content-type': 'application/x-ndjson'}).status_code == 200
+    return client
+
+
+def _stream(client, **fields):
+    response = client.post('/api/analysis/rank', data={'job_id': 'job_001', 'stream': 'true', **fields})
+    assert response.status_code == 200
+    header, *results = [json.loads(line) for line in response.text.splitlines()]
+    return header, results
+
+
+def test_stream_honours_limit_and_cursor(client):
+    full = client.post('/api/analysis/rank', data={'job_id': 'job_001', 'top_n': '20'}).json()['results']
+
+    header, results = _stream(client, top_n='20', limit='7')
+    assert header['total_results'] == len(results) == 7
+    assert [r['cv_id'] for r in results] == [r['cv_id'] for r in full[:7]]
+    assert [r['rank'] for r in results] == list(range(1, 8))
+
+    header, results = _stream(client, top_n='20', limit='7', after=header['next_cursor'])
+    assert [r['cv_id'] for r in results] == [r['cv_id'] for r in full[7:14]]
+    assert [r['rank'] for r in results] == list(range(8, 15))
+
+    header, results = _stream(client, top_n='20', limit='10', after=header['next_cursor'])
+    assert len(results) == 6 and header['next_cursor'] is None
+
+
+def test_page_matches_stream(client):
+    page = client.post('/api/analysis/rank', data={'job_id': 'job_001', 'top_n': '10', 'limit': '4'}).json()
+    _, results = _stream(client, top_n='10', limit='4')
+    assert page['results'] == [{k: v for k, v in r.items() if k != 'type'} for r in results]
+
+
+def test_results_are_copies_of_the_cache(api, client):
+    analyzer = api.resources.get('analyzer')
+    ranked = analyzer.rank_candidates('job_001')
+    ranked[0]['overall_score'] = -1.0
+    ranked.clear()
+
+    _, _, second_page = analyzer.get_ranking_page('job_001', top_n=10, offset=5, limit=5)
+    again = analyzer.rank_candidates('job_001')
+    assert again[0]['overall_score'] != -1.0 and again[0]['rank'] == 1
+    assert [r['rank'] for r in second_page] == list(range(6, 11))
+    assert [r['cv_id'] for r in second_page] == [r['cv_id'] for r in again[5:10]]
+
+
+def test_cache_hit_reuses_selected_order(api, client, monkeypatch):
+    analyzer = api.resources.get('analyzer')
+    calls = []
+    argpartition = api.np.argpartition
+    monkeypatch.setattr(api.np, 'argpartition', lambda *a, **k: calls.append(1) or argpartition(*a, **k))
+
+    first = analyzer.get_top_candidates('job_001', top_n=8)
+    assert len(calls) == 1
+    assert analyzer.get_top_candidates('job_001', top_n=8) == first
+    assert analyzer.get_top_candidates('job_001', top_n=3) == first[:3]
+    assert len(calls) == 1
+
+
+def test_top_k_is_prefix_of_full_order_with_ties(api):
+    scores = api.np.array([0.5, 0.9, 0.5, 0.7, 0.5, 0.9, 0.1, 0.5])
+    full = api.np.lexsort((api.np.arange(len(scores)), -scores))
+    for k in range(1, len(scores)):
+        entry = {'scores': scores, 'order': None, 'top': None}
+        assert list(api.CVAnalyzer._select_top(entry, k)) == list(full[:k])
+
+
+def test_jobs_for_cv_match_pairwise_scores_after_job_changes(api, client):
+    rng = random.Random(11)
+    for i in range(6):
+        assert client.post('/api/jobs/create', data=load_test.synthetic_job(rng, i)).status_code == 200
+    assert client.delete('/api/jobs/job_003').status_code == 200
+
+    analyzer = api.resources.get('analyzer')
+    snapshot = analyzer.snapshot
+    cv = snapshot.cvs[4]
+    ranked = client.get(f'/api/analysis/jobs-for-cv/{cv.id}').json()['results']
+    assert sorted(r['job_id'] for r in ranked) == sorted(job.id for job in snapshot.jobs)
+    # Matrice construite d'un bloc pour l'instantané, réutilisée ensuite
+    matrix = snapshot.derived['job_matrix']
+    assert matrix.job_ids == [job.id for job in snapshot.jobs]
+    analyzer.rank_jobs_for_cv(cv.id)
+    assert analyzer.snapshot.derived['job_matrix'] is matrix
+
+    jobs = {job.id: job for job in snapshot.jobs}
+    for result in ranked:
+        expected = analyzer.calculate_similarity_score(cv, jobs[result['job_id']], snapshot)
+        for key in ('overall_score', 'overall_similarity', 'skills_match', 'experience_match',
+                    'education_match', 'language_match'):
+            assert result[key] == pytest.approx(expected[key], abs=1e-5)
+
+
+def test_cursor_is_bound_to_its_query(client):
+    page = client.post('/api/analysis/rank', data={'job_id': 'job_001', 'top_n': '10', 'limit': '3'}).json()
+    cursor = page['next_cursor']
+    assert client.post('/api/analysis/rank', data={'job_id': 'job_001', 'top_n': '10', 'limit': '3',
+                                                   'after': cursor}).status_code == 200
+    assert client.get('/api/analysis/results/job_001', params={'top_n': 10, 'limit': 3, 'after': cursor}).status_code == 200
+
+    for other in ({'top_n': '12'}, {'cv_ids': 'cv_001,cv_002,cv_005,cv_006'}, {'exact': 'true'}):
+        response = client.post('/api/analysis/rank', data={'job_id': 'job_001', 'top_n': '10', 'limit': '3',
+                                                           'after': cursor, **other})
+        assert response.status_code == 400
+    assert client.post('/api/analysis/rank', data={'job_id': 'job_001', 'top_n': '10',
+                                                   'after': cursor.replace('.', ':')}).status_code == 400
+
+
+def test_cursor_is_checked_against_the_ranked_snapshot(api, client, monkeypatch):
+    page = client.post('/api/analysis/rank', data={'job_id': 'job_001', 'top_n': '10', 'limit': '3'}).json()
+    analyzer = api.resources.get('analyzer')
+
+    # Réentraînement publié entre le décodage du curseur et le classement
+    original = analyzer._fitted_snapshot
+
+    def refit_then_snapshot():
+        analyzer.fit()
+        return original()
+
+    monkeypatch.setattr(analyzer, '_fitted_snapshot', refit_then_snapshot)
+    for stream in ('false', 'true'):
+        response = client.post('/api/analysis/rank', data={'job_id': 'job_001', 'top_n': '10', 'limit': '3',
+                                                           'after': page['next_cursor'], 'stream': stream})
+        assert response.status_code == 409
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Backends de l'encodeur de phrases : même forme et embeddings proches sur un petit modèle local
+
+Le modèle (BERT à 2 couches, poids aléatoires, vocabulaire de quelques mots) est construit dans
+un répertoire temporaire : aucun téléchargement.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from sentence_encoders import ENCODER_BACKENDS, create_encoder
+
+WORDS = ['python', 'java', 'sql', 'données', 'projet', 'gestion', 'équipe', 'ingénieur', 'développeur',
+         'analyse', 'cloud', 'docker', 'ans', 'expérience', 'master', 'licence', 'de', 'en', 'et', 'avec']
+TEXTS = ['Développeur Python avec 5 ans d\'expérience en données',
+         'Ingénieur cloud, docker et gestion de projet',
+         'Master en analyse de données, équipe java et sql',
+         'python']
+HIDDEN_SIZE = 32
+# int8 dynamique : erreur de quantification sensible sur un modèle aléatoire minuscule
+MIN_COSINE = {'torch': 0.9999, 'torch-int8': 0.9, 'onnx': 0.999}
+
+
+@pytest.fixture(scope='module')
+def tiny_models(tmp_path_factory):
+    torch = pytest.importorskip('torch')
+    transformers = pytest.importorskip('transformers')
+    sentence_transformers = pytest.importorskip('sentence_transformers')
+
+    root = tmp_path_factory.mktemp('encodeur')
+    bert_dir, st_dir = str(root / 'bert'), str(root / 'sentence')
+    os.makedirs(bert_dir)
+    vocab_file = os.path.join(bert_dir, 'vocab.txt')
+    with open(vocab_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + WORDS + list('0123456789,\'')))
+
+    torch.manual_seed(0)
+    config = transformers.BertConfig(vocab_size=5 + len(WORDS) + 12, hidden_size=HIDDEN_SIZE, num_hidden_layers=2,
+                                     num_attention_heads=2, intermediate_size=64, max_position_embeddings=64)
+    bert = transformers.BertModel(config).eval()
+    bert.save_pretrained(bert_dir)
+    transformers.BertTokenizerFast(vocab_file, do_lower_case=True).save_pretrained(bert_dir)
+
+    transformer = sentence_transformers.models.Transformer(bert_dir, max_seq_length=32)
+    pooling = sentence_transformers.models.Pooling(HIDDEN_SIZE, pooling_mode='mean')
+    sentence_transformers.SentenceTransformer(modules=[transformer, pooling], device='cpu').save(st_dir)
+
+    models = {'torch': st_dir, 'torch-int8': st_dir}
+    if _has('onnxruntime'):
+        onnx_dir = str(root / 'onnx')
+        shutil.copytree(bert_dir, onnx_dir)
+        with open(os.path.join(onnx_dir, 'sentence_bert_config.json'), 'w', encoding='utf-8') as f:
+            json.dump({'max_seq_length': 32, 'do_lower_case': False}, f)
+        sample = transformers.BertTokenizerFast.from_pretrained(bert_dir)(TEXTS[:2], padding=True, return_tensors='pt')
+        names = ['input_ids', 'attention_mask', 'token_type_ids']
+        axes = {name: {0: 'batch', 1: 'sequence'} for name in names}
+        axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+        torch.onnx.export(bert, tuple(sample[name] for name in names), os.path.join(onnx_dir, 'model.onnx'),
+                          input_names=names, output_names=['last_hidden_state'], dynamic_axes=axes,
+                          opset_version=14)
+        models['onnx'] = onnx_dir
+    return models
+
+
+def _has(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def _normalized(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize('backend', ENCODER_BACKENDS)
+def test_backends_agree_with_the_float32_reference(tiny_models, backend):
+    if backend not in tiny_models:
+        pytest.skip(f"{backend} indisponible")
+    reference = create_encoder('torch', tiny_models['torch'], num_threads=1).encode(TEXTS)
+    encoder = create_encoder(backend, tiny_models[backend], num_threads=1)
+
+    embeddings = encoder.encode(TEXTS, batch_size=3)
+    assert embeddings.shape == reference.shape == (len(TEXTS), HIDDEN_SIZE)
+    assert embeddings.dtype == np.float32
+    assert encoder.max_seq_length == 32
+    assert encoder.name.endswith(f"@{backend}")
+    cosine = np.sum(_normalized(embeddings) * _normalized(reference), axis=1)
+    assert cosine.min() >= MIN_COSINE[backend]
+
+
+def test_unknown_backend_and_missing_onnx_directory_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        create_encoder('tensorflow')
+    with pytest.raises(ValueError):
+        create_encoder('onnx', str(tmp_path / 'absent'))
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Pipeline de features creux : normalisation, SVD tronquée sur CSR et parité avec le chemin dense"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sklearn')
+pytest.importorskip('scipy')
+
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import StandardScaler, normalize
+
+from sparse_features import SparseFeatureScaler, feature_matrix
+
+
+def _features(n: int = 80, vocabulary: int = 300, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    text = sparse.random(n, vocabulary, density=0.05, format='csr', random_state=seed, dtype=np.float32)
+    numeric = np.c_[rng.integers(0, 15, n), rng.integers(0, 5, n), rng.integers(1, 10, n),
+                    rng.integers(1, 4, n), np.zeros(n)]
+    return feature_matrix(text, numeric)
+
+
+def test_scaler_centers_only_the_numeric_block():
+    features = _features()
+    scaled = SparseFeatureScaler(n_numeric=5).fit_transform(features)
+    assert sparse.issparse(scaled) and scaled.dtype == np.float32
+
+    dense = features.toarray()
+    np.testing.assert_allclose(scaled[:, :-5].toarray(),
+                               StandardScaler(with_mean=False).fit_transform(dense[:, :-5]), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(scaled[:, -5:].toarray(), StandardScaler().fit_transform(dense[:, -5:]),
+                               rtol=1e-4, atol=1e-5)
+    # Le bloc textuel reste aussi creux que l'entrée
+    assert scaled[:, :-5].nnz == features[:, :-5].nnz
+
+
+def test_scaler_accepts_dense_input():
+    features = _features()
+    scaler = SparseFeatureScaler(n_numeric=5).fit(features)
+    np.testing.assert_allclose(scaler.transform(features.toarray()), scaler.transform(features).toarray(),
+                               rtol=1e-5, atol=1e-6)
+
+
+def test_truncated_svd_on_csr_matches_dense_input():
+    scaled = SparseFeatureScaler(n_numeric=5).fit_transform(_features())
+    reduced_sparse = TruncatedSVD(10, random_state=0).fit(scaled).transform(scaled)
+    reduced_dense = TruncatedSVD(10, random_state=0).fit(scaled.toarray()).transform(scaled.toarray())
+
+    # Composantes définies au signe près : on compare les similarités cosinus
+    np.testing.assert_allclose(normalize(reduced_sparse) @ normalize(reduced_sparse).T,
+                               normalize(reduced_dense) @ normalize(reduced_dense).T, atol=1e-4)
+
+
+def _analyzer(api, n_cvs: int):
+    from fastapi.testclient import TestClient
+
+    import load_test
+
+    client = TestClient(api.app)
+    assert client.post('/api/demo/setup').status_code == 200
+    rng = random.Random(5)
+    body = "\n".join(json.dumps(load_test.synthetic_cv(rng, i)) for i in range(n_cvs))
+    assert client.post('/api/cvs/bulk', content=body,
+                       headers={'content-type': 'application/x-ndjson'}).status_code == 200
+    analyzer = api.resources.get('analyzer')
+    analyzer.fit()
+    return analyzer
+
+
+def _scores(analyzer, snapshot):
+    return {r['cv_id']: r['overall_score'] for r in analyzer._compute_scores(snapshot, 'job_001')}
+
+
+@pytest.mark.parametrize('n_cvs', [20, 120])
+def test_scores_match_the_dense_path(api, monkeypatch, n_cvs):
+    pytest.importorskip('httpx')
+    analyzer = _analyzer(api, n_cvs)
+    snapshot = analyzer._fitted_snapshot()
+    sparse_scores = _scores(analyzer, snapshot)
+    cv = snapshot.cvs[0]
+    sparse_pair = analyzer.calculate_similarity_score(cv, snapshot.jobs[0], snapshot)['overall_score']
+
+    # Même modèle, bloc TF-IDF densifié avant la normalisation et la SVD
+    transform = snapshot.tfidf_vectorizer.transform
+    monkeypatch.setattr(snapshot.tfidf_vectorizer, 'transform', lambda texts: transform(texts).toarray())
+    dense_scores = _scores(analyzer, snapshot)
+
+    assert sparse_scores.keys() == dense_scores.keys()
+    for cv_id, score in sparse_scores.items():
+        assert dense_scores[cv_id] == pytest.approx(score, abs=1e-5)
+    assert analyzer.calculate_similarity_score(cv, snapshot.jobs[0], snapshot)['overall_score'] == \
+        pytest.approx(sparse_pair, abs=1e-5)
+
+
+def test_tiny_corpus_is_not_squeezed_by_the_svd(api):
+    pytest.importorskip('httpx')
+    snapshot = _analyzer(api, 20)._fitted_snapshot()
+    # Moins de CVs que de composantes : pas de réduction plutôt qu'une projection sur n_samples axes
+    assert not hasattr(snapshot.pca, 'components_')
+
+    snapshot = _analyzer(api, 120)._fitted_snapshot()
+    assert snapshot.pca.components_.shape[0] == api.REDUCED_DIMENSIONS